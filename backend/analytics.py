@@ -0,0 +1,438 @@
+"""
+Single-pass, incremental analytics over the ``evaluations`` table.
+
+``AnalyticsSnapshot`` folds every evaluation row into running accumulators
+once (``add(row)``) and exposes one method per dashboard view. New rows are
+folded into the existing state, so a refresh only costs the rows added since. The
+``get_*`` analytics functions in ``backend/database.py`` are thin wrappers
+around a shared snapshot, so a full Analytics tab render fetches the table once
+instead of once per chart.
+
+Each view returns exactly what the original per-function scan returned,
+including its quirks: topic and student performance count an unparseable score
+as 0, while the other averages skip it.
+
+Rows are ``EvaluationRow`` tuples holding only the columns the views read, so
+the OCR text and JSON breakdowns of each evaluation are neither downloaded nor
+kept in memory.
+"""
+import math
+from typing import NamedTuple, Optional
+
+from backend.stats import GroupedStats, QuantileSketch, RunningStats, describe
+
+GRADES = ("A", "B", "C", "D", "F")
+SCORE_RANGES = ("0-2", "2-4", "4-6", "6-8", "8-10")
+
+
+class EvaluationRow(NamedTuple):
+    """The columns of an ``evaluations`` row that the analytics views use."""
+    id: Optional[int] = None
+    student_name: Optional[str] = None
+    student_roll: Optional[str] = None
+    topic: Optional[str] = None
+    score: Optional[str] = None
+    grade: Optional[str] = None
+    created_at: Optional[str] = None
+
+    @classmethod
+    def from_record(cls, record: dict):
+        return cls(*(record.get(field) for field in cls._fields))
+
+    def get(self, key, default=None):
+        """dict-style access, so views work on both rows and plain records."""
+        return getattr(self, key, default) if key in self._fields else default
+
+
+def parse_row_score(row):
+    """``float(row["score"])`` as the analytics views always did it, or None if unparseable.
+
+    "nan" and "inf" also count as unparseable, as in the SQL analytics_parse_score().
+    """
+    try:
+        score = float(row.get("score", 0))
+    except (ValueError, TypeError):
+        return None
+    return score if math.isfinite(score) else None
+
+
+def row_date(row):
+    """YYYY-MM-DD part of created_at, or None when the row has no timestamp."""
+    created_at = row.get("created_at", "")
+    if not created_at:
+        return None
+    return created_at.split("T")[0] if "T" in created_at else created_at
+
+
+def _score_range(score):
+    if score < 2:
+        return "0-2"
+    if score < 4:
+        return "2-4"
+    if score < 6:
+        return "4-6"
+    if score < 8:
+        return "6-8"
+    return "8-10"
+
+
+def _avg(total, count):
+    return round(total / count, 2) if count else 0
+
+
+def _touch(groups, key, factory):
+    """Return groups[key] (created by factory if missing), moved to the end of the dict."""
+    group = groups.pop(key, None)
+    groups[key] = group = group if group is not None else factory()
+    return group
+
+
+class AnalyticsSnapshot:
+    """Every dashboard aggregate, kept as running state over the evaluation rows.
+
+    Rows are folded in oldest first, so new evaluations can be added later
+    with ``add()`` without recomputing anything. ``watermark`` is the newest
+    ``created_at`` folded in; row ids are remembered so a row fetched twice
+    (refreshes overlap the watermark) is only counted once. Views list groups
+    most recently evaluated first, as a newest-first scan would meet them.
+    """
+
+    def __init__(self, rows=None):
+        self.rows = []                   # oldest first
+        self.total = 0
+        self.score_sum = 0.0
+        self.score_stats = RunningStats()        # valid scores
+        self.score_sketch = QuantileSketch()
+        self.grade_counts = dict.fromkeys(GRADES, 0)
+        self.score_ranges = dict.fromkeys(SCORE_RANGES, 0)
+        self.summary_students = set()
+        self.summary_topics = set()
+        # Group dicts are kept in least-recently-updated order (a group moves to the end when a row is added)
+        self.topics = {}                 # topic -> {"count", "sum_or_zero", "valid_scores"}
+        self.students = {}               # student -> {"count", "best"}
+        self.dates = {}                  # date -> {"count", "sum", "valid"}
+        self.by_grade = {}               # grade -> {"count", "sum", "valid"}
+        self.topic_stats = GroupedStats()
+        self.student_stats = GroupedStats()
+        self.date_stats = GroupedStats()
+        self.watermark = None
+        self._ids = set()
+        for row in rows or []:
+            self.add(row)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from rows in oldest-first order."""
+        return cls(rows)
+
+    def add(self, row) -> bool:
+        """Fold one evaluation row (EvaluationRow or dict) into every accumulator.
+
+        Returns False (and changes nothing) if a row with the same id was already added.
+        """
+        row_id = row.get("id")
+        if row_id is not None and row_id in self._ids:
+            return False
+        score = parse_row_score(row)
+        if row_id is not None:
+            self._ids.add(row_id)
+        self.rows.append(row)
+        self.total += 1
+        score_or_zero = score if score is not None else 0
+        created_at = row.get("created_at")
+        if created_at and (self.watermark is None or created_at > self.watermark):
+            self.watermark = created_at
+
+        self.summary_students.add(row.get("student_name", ""))
+        self.summary_topics.add(row.get("topic", ""))
+
+        if score is not None:
+            self.score_sum += score
+            self.score_stats.add(score)
+            self.score_sketch.add(score)
+            self.score_ranges[_score_range(score)] += 1
+            self.topic_stats.add(row.get("topic", "Unknown"), score)
+            self.student_stats.add(row.get("student_name", "Unknown"), score)
+
+        grade = (row.get("grade", "") or "").strip().upper()
+        if grade in self.grade_counts:
+            self.grade_counts[grade] += 1
+
+        topic = _touch(self.topics, row.get("topic", "Unknown"), lambda: {"count": 0, "sum_or_zero": 0.0, "valid_scores": []})
+        topic["count"] += 1
+        topic["sum_or_zero"] += score_or_zero
+        if score is not None:
+            topic["valid_scores"].append(score)
+
+        student = _touch(self.students, row.get("student_name", "Unknown"), lambda: {"count": 0, "best": None})
+        student["count"] += 1
+        student["best"] = score_or_zero if student["best"] is None else max(student["best"], score_or_zero)
+
+        date = row_date(row)
+        if date is not None:
+            self._fold(self.dates, date, score)
+            if score is not None:
+                self.date_stats.add(date, score)
+
+        grade_key = row.get("grade", "N/A")
+        grade_key = "N/A" if grade_key is None else grade_key.strip().upper()
+        self._fold(self.by_grade, grade_key, score)
+        return True
+
+    def add_rows(self, rows) -> int:
+        """Fold rows (oldest first) into the snapshot. Returns the number of new rows."""
+        return sum(1 for row in rows if self.add(row))
+
+    def replaced(self, row_id, changes: dict) -> "AnalyticsSnapshot":
+        """A snapshot with one row's fields changed (e.g. a re-scored evaluation).
+
+        Running accumulators cannot take a row back out, so the kept rows are
+        folded again: one pass in memory, nothing is fetched. Returns ``self``
+        when no row has that id.
+        """
+        if row_id not in self._ids:
+            return self
+
+        def patch(row):
+            if row.get("id") != row_id:
+                return row
+            return row._replace(**changes) if hasattr(row, "_replace") else {**row, **changes}
+        return AnalyticsSnapshot(patch(row) for row in self.rows)
+
+    @staticmethod
+    def _fold(groups, key, score):
+        group = _touch(groups, key, lambda: {"count": 0, "sum": 0.0, "valid": 0})
+        group["count"] += 1
+        if score is not None:
+            group["sum"] += score
+            group["valid"] += 1
+
+    # ----- views (same shapes as the original database.get_* functions) -----
+    def average_score(self):
+        return _avg(self.score_sum, self.score_stats.count)
+
+    def summary(self):
+        return {
+            "total": self.total,
+            "avg_score": self.average_score(),
+            "unique_students": len(self.summary_students),
+            "unique_topics": len(self.summary_topics),
+        }
+
+    def grade_distribution(self):
+        return dict(self.grade_counts)
+
+    def topic_performance(self):
+        return {topic: _avg(data["sum_or_zero"], data["count"]) for topic, data in reversed(self.topics.items())}
+
+    def _best_scores(self):
+        return {student: data["best"] for student, data in reversed(self.students.items())}
+
+    def student_performance(self):
+        return dict(sorted(self._best_scores().items(), key=lambda x: x[1], reverse=True))
+
+    def top_students(self, limit=10):
+        from backend.ranking import top_k_items
+        return top_k_items(self._best_scores(), limit)
+
+    def evaluations_by_topic(self):
+        counts = {topic: data["count"] for topic, data in reversed(self.topics.items())}
+        return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
+
+    def evaluations_over_time(self):
+        return {date: data["count"] for date, data in sorted(self.dates.items())}
+
+    def score_distribution(self):
+        return dict(self.score_ranges)
+
+    def topic_evaluation_count(self):
+        return {
+            topic: {"count": data["count"], "scores": data["valid_scores"][::-1],
+                    "avg_score": _avg(sum(data["valid_scores"]), len(data["valid_scores"]))}
+            for topic, data in reversed(self.topics.items())
+        }
+
+    def student_evaluation_count(self):
+        counts = {student: data["count"] for student, data in reversed(self.students.items())}
+        return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
+
+    def weak_students(self, threshold=5):
+        weak = {k: v for k, v in self.student_performance().items() if v < threshold}
+        return dict(sorted(weak.items(), key=lambda x: x[1]))
+
+    def strong_students(self, threshold=7):
+        strong = {k: v for k, v in self.student_performance().items() if v >= threshold}
+        return dict(sorted(strong.items(), key=lambda x: x[1], reverse=True))
+
+    def class_stats(self):
+        """Min, max, mean, median and std_dev of the valid scores.
+
+        The median is exact: it comes from the quantile sketch while every
+        score has at most two decimals (the sketch's 0.01 grid), and from a
+        sort of the scores otherwise.
+        """
+        stats = self.score_stats
+        if not self.total or not stats.count:
+            return None
+        if self.score_sketch.exact:
+            median = self.score_sketch.median()
+        else:
+            scores = sorted(s for topic in self.topics.values() for s in topic["valid_scores"])
+            n = len(scores)
+            median = scores[n // 2] if n % 2 == 1 else (scores[n // 2 - 1] + scores[n // 2]) / 2
+        return {
+            "min_score": stats.min,
+            "max_score": stats.max,
+            "mean": round(stats.mean, 2),
+            "median": median if stats.count % 2 == 1 else round(median, 2),
+            "std_dev": round(stats.std_dev, 2),
+            "total_scores": stats.count,
+        }
+
+    def score_percentiles(self):
+        """Class-wide count, mean, std_dev, min, max and p10..p90."""
+        return describe(self.score_stats, self.score_sketch)
+
+    def score_stats_by_topic(self):
+        return self.topic_stats.describe(reversed(self.topics))
+
+    def score_stats_by_student(self):
+        return self.student_stats.describe(reversed(self.students))
+
+    def score_stats_by_date(self):
+        return self.date_stats.describe(sorted(self.date_stats.groups))
+
+    def performance_by_grade(self):
+        return {grade: {"count": data["count"], "avg_score": _avg(data["sum"], data["valid"])}
+                for grade, data in reversed(self.by_grade.items())}
+
+    def topic_difficulty(self):
+        return dict(sorted(self.topic_performance().items(), key=lambda x: x[1]))
+
+    def newest(self, limit=None):
+        """Rows newest first (all of them when limit is None)."""
+        start = 0 if limit is None else max(len(self.rows) - limit, 0)
+        return self.rows[start:][::-1]
+
+    def recent(self, limit=50):
+        return self.newest(limit)
+
+    def evaluation_stats_by_date(self):
+        return {date: {"count": data["count"], "avg_score": _avg(data["sum"], data["valid"])}
+                for date, data in sorted(self.dates.items())}
+
+
+# ===============================
+# Server-Side Aggregates
+# ===============================
+class AggregateUnavailable(Exception):
+    """Raised when a server-side aggregate function is not installed or failed."""
+
+
+class ServerAggregateViews:
+    """The AnalyticsSnapshot views, computed from the SQL aggregates in
+    ``backend/migrations/001_analytics_aggregates.sql``.
+
+    ``fetch(name)`` returns the rows of the named RPC or None when it is not
+    available; every view then raises ``AggregateUnavailable`` so the caller can
+    fall back to the client-side snapshot.
+    """
+
+    def __init__(self, fetch):
+        self._fetch = fetch
+
+    def _rows(self, name):
+        rows = self._fetch(name)
+        if rows is None:
+            raise AggregateUnavailable(name)
+        return rows
+
+    def _summary(self):
+        rows = self._rows("analytics_summary")
+        return rows[0] if rows else {}
+
+    def average_score(self):
+        row = self._summary()
+        return _avg(row.get("score_sum") or 0.0, row.get("scored") or 0)
+
+    def summary(self):
+        row = self._summary()
+        return {
+            "total": row.get("total") or 0,
+            "avg_score": _avg(row.get("score_sum") or 0.0, row.get("scored") or 0),
+            "unique_students": row.get("unique_students") or 0,
+            "unique_topics": row.get("unique_topics") or 0,
+        }
+
+    def class_stats(self):
+        row = self._summary()
+        n = row.get("scored") or 0
+        if not row.get("total") or not n:
+            return None
+        median = row["median"]
+        return {
+            "min_score": row["min_score"],
+            "max_score": row["max_score"],
+            "mean": round(row["score_sum"] / n, 2),
+            "median": median if n % 2 == 1 else round(median, 2),
+            "std_dev": round(row["std_dev"] or 0.0, 2),
+            "total_scores": n,
+        }
+
+    def grade_distribution(self):
+        counts = dict.fromkeys(GRADES, 0)
+        for row in self._rows("analytics_grade_distribution"):
+            if row.get("grade") in counts:
+                counts[row["grade"]] += row["count"]
+        return counts
+
+    def performance_by_grade(self):
+        return {row["grade"]: {"count": row["count"], "avg_score": _avg(row.get("score_sum") or 0.0, row.get("scored") or 0)}
+                for row in self._rows("analytics_grade_distribution")}
+
+    def score_distribution(self):
+        ranges = dict.fromkeys(SCORE_RANGES, 0)
+        for row in self._rows("analytics_score_histogram"):
+            if row.get("bucket") in ranges:
+                ranges[row["bucket"]] = row["count"]
+        return ranges
+
+    def topic_performance(self):
+        return {row["topic"]: _avg(row.get("sum_or_zero") or 0.0, row["count"])
+                for row in self._rows("analytics_topic_performance")}
+
+    def evaluations_by_topic(self):
+        counts = {row["topic"]: row["count"] for row in self._rows("analytics_topic_performance")}
+        return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
+
+    def topic_difficulty(self):
+        return dict(sorted(self.topic_performance().items(), key=lambda x: x[1]))
+
+    def _best_scores(self):
+        return {row["student_name"]: row["best_score"] for row in self._rows("analytics_student_performance")}
+
+    def student_performance(self):
+        return dict(sorted(self._best_scores().items(), key=lambda x: x[1], reverse=True))
+
+    def top_students(self, limit=10):
+        from backend.ranking import top_k_items
+        return top_k_items(self._best_scores(), limit)
+
+    def student_evaluation_count(self):
+        counts = {row["student_name"]: row["count"] for row in self._rows("analytics_student_performance")}
+        return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
+
+    def weak_students(self, threshold=5):
+        weak = {k: v for k, v in self.student_performance().items() if v < threshold}
+        return dict(sorted(weak.items(), key=lambda x: x[1]))
+
+    def strong_students(self, threshold=7):
+        strong = {k: v for k, v in self.student_performance().items() if v >= threshold}
+        return dict(sorted(strong.items(), key=lambda x: x[1], reverse=True))
+
+    def evaluations_over_time(self):
+        return {row["day"]: row["count"] for row in self._rows("analytics_daily_stats")}
+
+    def evaluation_stats_by_date(self):
+        return {row["day"]: {"count": row["count"], "avg_score": _avg(row.get("score_sum") or 0.0, row.get("scored") or 0)}
+                for row in self._rows("analytics_daily_stats")}
@@ -0,0 +1,223 @@
+"""
+Local columnar mirror of the ``evaluations`` table.
+
+Rows are stored as Parquet files partitioned by month of ``created_at``
+(``month=2024-05/part-00003.parquet``, ``month=unknown`` for rows without a
+timestamp) and read back as a pandas DataFrame, so ad-hoc analytics and the
+dashboard can run vectorized, offline, without touching Supabase.
+
+The mirror is synced incrementally: each sync fetches rows with ``created_at``
+at or after the watermark minus a short lag window, drops ids already stored,
+and appends the rest as new part files. Months with many small parts are
+compacted into one file. Deleted rows are not detected; call ``reset()`` after
+deleting evaluations.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+
+try:
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    _HAS_ARROW = True
+except Exception:
+    pd = pa = pq = None
+    _HAS_ARROW = False
+
+from backend.analytics import parse_row_score
+
+COLUMNS = ("id", "student_name", "student_roll", "topic", "score", "grade", "created_at")
+COMPACT_PARTS = 16
+_UNKNOWN_MONTH = "unknown"
+
+
+def _schema():
+    # Explicit types so a batch where a column is all NULL still matches the other parts
+    return pa.schema([
+        ("id", pa.int64()),
+        ("student_name", pa.string()),
+        ("student_roll", pa.string()),
+        ("topic", pa.string()),
+        ("score", pa.string()),
+        ("grade", pa.string()),
+        ("created_at", pa.string()),
+        ("score_value", pa.float64()),    # parse_row_score(), NaN when unparseable
+    ])
+
+
+def _month(created_at):
+    return created_at[:7] if created_at else _UNKNOWN_MONTH
+
+
+class EvaluationColumnarCache:
+    """Month-partitioned Parquet mirror of ``evaluations``."""
+
+    def __init__(self, cache_dir: str, lag_seconds: float = 30.0):
+        if not _HAS_ARROW:
+            raise RuntimeError("pandas and pyarrow are required for the columnar cache")
+        self.cache_dir = cache_dir
+        self.lag_seconds = lag_seconds
+        self._lock = threading.RLock()
+        self.watermark = None    # created_at of the newest stored row
+        self.row_count = 0
+        self.last_sync = 0.0
+        self._ids = None         # loaded from the id column on first sync
+        self._load()
+
+    # ----- files -----
+    @property
+    def _state_path(self):
+        return os.path.join(self.cache_dir, "state.json")
+
+    def _month_dir(self, month):
+        return os.path.join(self.cache_dir, f"month={month}")
+
+    def _part_files(self, months=None):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        files = []
+        for name in sorted(os.listdir(self.cache_dir)):
+            if not name.startswith("month=") or (months is not None and name[len("month="):] not in months):
+                continue
+            month_dir = os.path.join(self.cache_dir, name)
+            files.extend(os.path.join(month_dir, f) for f in sorted(os.listdir(month_dir)) if f.endswith(".parquet"))
+        return files
+
+    def _load(self):
+        if not os.path.exists(self._state_path):
+            return
+        try:
+            with open(self._state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.watermark = state.get("watermark")
+            self.row_count = state.get("rows", 0)
+            print(f"[COLUMNAR_CACHE] Loaded {self.row_count} evaluations (watermark: {self.watermark})")
+        except Exception as e:
+            print(f"[COLUMNAR_CACHE] Ignoring unreadable state, rebuilding: {e}")
+            self.reset()
+
+    def _save_state(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self._state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"watermark": self.watermark, "rows": self.row_count}, f)
+        os.replace(tmp, self._state_path)
+
+    def _write_part(self, month, table):
+        month_dir = self._month_dir(month)
+        os.makedirs(month_dir, exist_ok=True)
+        existing = [f for f in os.listdir(month_dir) if f.endswith(".parquet")]
+        path = os.path.join(month_dir, f"part-{len(existing):05d}.parquet")
+        pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        if len(existing) + 1 > COMPACT_PARTS:
+            self._compact(month)
+
+    def _compact(self, month):
+        """Rewrite a month's part files as a single file."""
+        files = self._part_files([month])
+        table = pa.concat_tables([pq.read_table(f, schema=_schema()) for f in files])
+        path = os.path.join(self._month_dir(month), "part-00000.parquet")
+        pq.write_table(table, path + ".tmp")
+        for f in files:
+            os.remove(f)
+        os.replace(path + ".tmp", path)
+
+    # ----- sync -----
+    def _since(self):
+        if not self.watermark:
+            return None
+        try:
+            return (datetime.fromisoformat(self.watermark) - timedelta(seconds=self.lag_seconds)).isoformat()
+        except ValueError:
+            return self.watermark
+
+    def sync(self, fetch_rows) -> int:
+        """Append rows newer than the watermark. Returns the number of rows added.
+
+        ``fetch_rows(since)`` must yield evaluation records (dicts) with
+        ``created_at >= since``, or every record when ``since`` is None.
+        """
+        with self._lock:
+            if self._ids is None:
+                self._ids = set(self.frame(columns=["id"])["id"].tolist()) if self.row_count else set()
+            by_month = {}
+            for row in fetch_rows(self._since()):
+                if row.get("id") in self._ids:
+                    continue
+                self._ids.add(row.get("id"))
+                record = {c: row.get(c) for c in COLUMNS}
+                record["score"] = None if record["score"] is None else str(record["score"])
+                score = parse_row_score(row)
+                record["score_value"] = float("nan") if score is None else score
+                by_month.setdefault(_month(record["created_at"]), []).append(record)
+                if record["created_at"] and (self.watermark is None or record["created_at"] > self.watermark):
+                    self.watermark = record["created_at"]
+            added = 0
+            for month, records in by_month.items():
+                self._write_part(month, pa.Table.from_pylist(records, schema=_schema()))
+                added += len(records)
+            self.row_count += added
+            self.last_sync = time.time()
+            if added:
+                self._save_state()
+                print(f"[COLUMNAR_CACHE] Synced {added} new evaluations ({self.row_count} total)")
+        return added
+
+    def update_row(self, row_id, changes: dict) -> bool:
+        """Rewrite the stored row with this id (e.g. a re-scored evaluation) in place.
+
+        Only the part file holding the row is rewritten. Returns False if the
+        row is not stored.
+        """
+        schema = _schema()
+        with self._lock:
+            for path in self._part_files():
+                if row_id not in pq.read_table(path, columns=["id"], schema=schema).column("id").to_pylist():
+                    continue
+                records = pq.read_table(path, schema=schema).to_pylist()
+                for record in records:
+                    if record["id"] == row_id:
+                        record.update({c: v for c, v in changes.items() if c in COLUMNS and c not in ("id", "created_at")})
+                        record["score"] = None if record["score"] is None else str(record["score"])
+                        score = parse_row_score(record)
+                        record["score_value"] = float("nan") if score is None else score
+                pq.write_table(pa.Table.from_pylist(records, schema=schema), path + ".tmp")
+                os.replace(path + ".tmp", path)
+                return True
+        return False
+
+    def reset(self):
+        """Delete the mirror; the next sync fetches everything again."""
+        with self._lock:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            self.watermark, self.row_count, self._ids = None, 0, None
+
+    # ----- query -----
+    def frame(self, columns=None, months=None):
+        """Return the stored rows as a DataFrame (oldest part files first).
+
+        ``months`` (e.g. ``["2024-05", "2024-06"]``) reads only those partitions.
+        """
+        schema = _schema()
+        columns = list(columns) if columns is not None else schema.names
+        with self._lock:
+            files = self._part_files(months)
+            if not files:
+                return pd.DataFrame({name: pd.Series(dtype=schema.field(name).type.to_pandas_dtype()) for name in columns})
+            table = pa.concat_tables([pq.read_table(f, columns=columns, schema=schema) for f in files])
+        return table.to_pandas()
+
+    def stats(self):
+        files = self._part_files()
+        return {
+            "rows": self.row_count,
+            "watermark": self.watermark,
+            "months": len({os.path.basename(os.path.dirname(f)) for f in files}),
+            "part_files": len(files),
+            "bytes": sum(os.path.getsize(f) for f in files),
+        }
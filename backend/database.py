@@ -1,9 +1,6 @@
 import os
 from dotenv import load_dotenv
-import sys
-from supabase import create_client
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import SupabaseVectorStore
+import threading
 
 # ===============================
 # Environment Setup
@@ -14,21 +11,212 @@ load_dotenv(os.path.join(project_root, ".env"))
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+# Use anon key for client-side, service role key for backend
+SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY", SUPABASE_KEY)
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("SUPABASE_URL or SUPABASE_KEY not set in environment variables")
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# "huggingface" (torch, default) or "onnx" (int8-quantized export run with onnxruntime, no torch)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "huggingface").strip().lower()
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join(project_root, "backend", "data", "onnx-minilm"))
 
 # ===============================
-# Client & Embedding Model Initialization
+# Client & Embedding Model Initialization (Lazy)
 # ===============================
-# Use anon key for client-side, service role key for backend
-SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY", SUPABASE_KEY)
-supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+# Neither the Supabase client nor the embedding model is created at import time.
+# The embedding model pulls in torch and takes seconds to load, and most page
+# loads (e.g. the Analytics tab) never need it.
+_supabase_client = None
+_embeddings_model = None
+_init_lock = threading.Lock()
+
+
+def get_supabase():
+    """Return the shared Supabase client, creating it on first use."""
+    global _supabase_client
+    if _supabase_client is None:
+        with _init_lock:
+            if _supabase_client is None:
+                if not SUPABASE_URL or not SUPABASE_KEY:
+                    raise ValueError("SUPABASE_URL or SUPABASE_KEY not set in environment variables")
+                from supabase import create_client
+                _supabase_client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    return _supabase_client
+
+
+def get_embeddings():
+    """Return the shared embedding model, loading it on first use."""
+    global _embeddings_model
+    if _embeddings_model is None:
+        with _init_lock:
+            if _embeddings_model is None:
+                if EMBEDDING_BACKEND == "onnx":
+                    from backend.onnx_embeddings import OnnxMiniLMEmbeddings
+                    print(f"[DATABASE] Loading ONNX embedding model from: {ONNX_MODEL_DIR}")
+                    _embeddings_model = OnnxMiniLMEmbeddings(ONNX_MODEL_DIR)
+                else:
+                    # Initializing embeddings (MiniLM is great for speed/memory)
+                    from langchain_huggingface import HuggingFaceEmbeddings
+                    print(f"[DATABASE] Loading embedding model: {EMBEDDING_MODEL_NAME}")
+                    _embeddings_model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+    return _embeddings_model
+
+
+def __getattr__(name):
+    # Backwards compatibility for code that still reads `database.supabase` / `database.embeddings`
+    if name == "supabase":
+        return get_supabase()
+    if name == "embeddings":
+        return get_embeddings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# ===============================
+# Query Embedding Cache
+# ===============================
+# Many students submit under the same topic string, so the same text is embedded
+# over and over. Embeddings are cached by normalized text in an in-memory LRU,
+# optionally backed by a SQLite file so the cache survives restarts.
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")  # e.g. backend/data/embedding_cache.db
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys: NFKC, collapse whitespace, casefold.
+
+    all-MiniLM-L6-v2 uses an uncased tokenizer, so case differences never change
+    the embedding.
+    """
+    import unicodedata
+    text = unicodedata.normalize("NFKC", text or "")
+    return " ".join(text.split()).casefold()
+
+
+def _pack_vector(vector) -> bytes:
+    """float32 bytes: ~4x smaller than JSON text and lossless for model output (float32)."""
+    from array import array
+    return array("f", vector).tobytes()
+
+
+def _unpack_vector(blob) -> list:
+    from array import array
+    values = array("f")
+    values.frombytes(bytes(blob))
+    return values.tolist()
+
+
+class EmbeddingCache:
+    """LRU cache of text -> embedding with optional on-disk persistence."""
+
+    def __init__(self, max_size: int = EMBEDDING_CACHE_SIZE, path: str = None, model_name: str = EMBEDDING_MODEL_NAME):
+        from collections import OrderedDict
+        self.max_size = max_size
+        self.path = path
+        self.model_name = model_name
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        import hashlib
+        return hashlib.sha256(f"{self.model_name}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _disk_conn(self):
+        if self.path and self._disk is None:
+            import sqlite3
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._disk = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            # Packed float32 BLOBs; files created before that declared TEXT and may still hold JSON
+            # rows, which get() reads as before (SQLite keeps BLOBs as-is in a TEXT column)
+            self._disk.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        return self._disk
+
+    def _remember(self, key, vector):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, text: str):
+        """Return the cached embedding for ``text`` or None."""
+        import json
+        key = self._key(text)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            conn = self._disk_conn()
+            if conn is not None:
+                row = conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row:
+                    # Packed float32 bytes; rows written by older versions are JSON text
+                    vector = json.loads(row[0]) if isinstance(row[0], str) else _unpack_vector(row[0])
+                    self._remember(key, vector)
+                    self.hits += 1
+                    return vector
+            self.misses += 1
+            return None
+
+    def put(self, text: str, vector):
+        key = self._key(text)
+        vector = list(vector)
+        with self._lock:
+            self._remember(key, vector)
+            conn = self._disk_conn()
+            if conn is not None:
+                conn.execute("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", (key, _pack_vector(vector)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits,
+                "misses": self.misses, "persistent": bool(self.path)}
+
+
+# Quantized vectors differ slightly from the torch ones, so the ONNX backend gets its own cache keys
+_EMBEDDING_CACHE_MODEL = EMBEDDING_MODEL_NAME if EMBEDDING_BACKEND != "onnx" else f"{EMBEDDING_MODEL_NAME}:onnx-int8"
+embedding_cache = EmbeddingCache(path=EMBEDDING_CACHE_PATH, model_name=_EMBEDDING_CACHE_MODEL)
+
+
+def embed_text(text: str):
+    """Embed a single text through the shared cache."""
+    vector = embedding_cache.get(text)
+    if vector is None:
+        vector = get_embeddings().embed_query(text)
+        embedding_cache.put(text, vector)
+    return vector
+
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+
+
+def embed_texts(texts, batch_size: int = None):
+    """Embed many texts through the shared cache.
+
+    Only uncached texts reach the model, through ``embed_documents`` in batches of
+    ``batch_size`` (one forward pass per batch instead of one per text).
+    """
+    batch_size = max(1, batch_size or EMBED_BATCH_SIZE)
+    vectors = [embedding_cache.get(t) for t in texts]
+    pending = {}
+    for i, vector in enumerate(vectors):
+        if vector is None:
+            # Identical (normalized) texts in one call are embedded once
+            pending.setdefault(normalize_text(texts[i]), []).append(i)
+    keys = list(pending)
+    for start in range(0, len(keys), batch_size):
+        batch_keys = keys[start:start + batch_size]
+        batch_texts = [texts[pending[k][0]] for k in batch_keys]
+        for key, text, vector in zip(batch_keys, batch_texts, get_embeddings().embed_documents(batch_texts)):
+            embedding_cache.put(text, vector)
+            for i in pending[key]:
+                vectors[i] = vector
+    return vectors
 
-# Initializing embeddings (MiniLM is great for speed/memory)
-embeddings = HuggingFaceEmbeddings(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
-)
 
 # ===============================
 # Store Guideline Logic (Direct Insert - Bypassing LangChain Vector Store)
@@ -43,18 +231,23 @@ def store_guideline(question_text: str, solution_text: str):
         from datetime import datetime
         
         # Generate embeddings for the question text
-        question_embedding = embeddings.embed_query(question_text)
+        question_embedding = embed_text(question_text)
         
         # Prepare the data for direct insert
+        content_hash = guideline_content_hash(question_text, solution_text)
         data = {
             "content": question_text,
-            "metadata": json.dumps({"solution": solution_text, "type": "guideline"}),
+            "metadata": json.dumps({"solution": solution_text, "type": "guideline", "content_hash": content_hash}),
             "embedding": question_embedding,
             "created_at": datetime.utcnow().isoformat()
         }
         
-        # Direct insert into assignments table
-        result = supabase.table("assignments").insert(data).execute()
+        # Direct insert into assignments table (or skip/update a duplicate)
+        action, guideline_id = _write_guideline(data, solution_text, content_hash)
+        if action == "skipped":
+            return f"ℹ️ Guideline already indexed (matches guideline #{guideline_id}); nothing stored"
+        if action == "updated":
+            return f"✅ Existing guideline #{guideline_id} updated"
         
         print(f"✅ Guideline stored successfully")
         return "✅ Question & Solution Indexed Successfully"
@@ -64,19 +257,303 @@ def store_guideline(question_text: str, solution_text: str):
         traceback.print_exc()
         raise RuntimeError(f"Supabase insert failed: {e}")
 
+# ===============================
+# Duplicate Guideline Detection
+# ===============================
+# Teachers re-upload the same answer key. Before inserting, a guideline is
+# checked against existing ones: an identical content hash is always skipped;
+# a near-duplicate (embedding similarity >= threshold) is skipped or updated in
+# place depending on GUIDELINE_DEDUP_MODE ("upsert", "skip" or "off").
+GUIDELINE_DEDUP_MODE = os.getenv("GUIDELINE_DEDUP_MODE", "upsert").strip().lower()
+GUIDELINE_DEDUP_THRESHOLD = float(os.getenv("GUIDELINE_DEDUP_THRESHOLD", "0.97"))
+
+
+def guideline_content_hash(content: str, solution: str) -> str:
+    """Hash of a guideline's normalized content and solution."""
+    import hashlib
+    return hashlib.sha256(f"{normalize_text(content)}\x00{normalize_text(solution)}".encode("utf-8")).hexdigest()
+
+
+def find_duplicate_guideline(content_hash: str, embedding):
+    """Return ``{"id", "kind", "similarity"}`` for an existing duplicate, or None.
+
+    ``kind`` is "exact" (same content hash) or "near" (embedding similarity at
+    or above GUIDELINE_DEDUP_THRESHOLD).
+    """
+    if GUIDELINE_DEDUP_MODE == "off":
+        return None
+    try:
+        index = get_lexical_index()
+        existing_id = index.find_hash(content_hash) if index is not None else None
+        if existing_id is not None:
+            return {"id": existing_id, "kind": "exact", "similarity": 1.0}
+    except Exception as e:
+        print(f"[DEDUP] Content hash check failed: {e}")
+    try:
+        index = get_vector_index()
+        if index is not None:
+            rows = index.search(embedding, k=1, threshold=GUIDELINE_DEDUP_THRESHOLD)
+        else:
+            results = get_supabase().rpc(
+                "match_assignments",
+                {
+                    "query_embedding": embedding,
+                    "match_count": 1,
+                    "similarity_threshold": GUIDELINE_DEDUP_THRESHOLD
+                }
+            ).execute()
+            rows = getattr(results, "data", None) or []
+        if rows and (rows[0].get("similarity") or 0) >= GUIDELINE_DEDUP_THRESHOLD:
+            return {"id": rows[0].get("id"), "kind": "near", "similarity": rows[0].get("similarity")}
+    except Exception as e:
+        print(f"[DEDUP] Similarity check failed: {e}")
+    return None
+
+
+def _write_guideline(data: dict, solution: str, content_hash: str):
+    """Insert an assignments row unless it duplicates an existing guideline.
+
+    Returns ``(action, guideline_id)`` where action is "inserted", "updated" or "skipped".
+    """
+    duplicate = find_duplicate_guideline(content_hash, data["embedding"])
+    if duplicate and (duplicate["kind"] == "exact" or GUIDELINE_DEDUP_MODE == "skip"):
+        print(f"[DEDUP] Skipping {duplicate['kind']} duplicate of guideline #{duplicate['id']} (similarity {duplicate['similarity']:.3f})")
+        return "skipped", duplicate["id"]
+
+    client = get_supabase()
+    if duplicate:
+        print(f"[DEDUP] Updating near-duplicate guideline #{duplicate['id']} (similarity {duplicate['similarity']:.3f})")
+        result = client.table("assignments").update(data).eq("id", duplicate["id"]).execute()
+        try:
+            client.table("guideline_chunks").delete().eq("guideline_id", duplicate["id"]).execute()
+        except Exception as e:
+            print(f"[CHUNKS] Could not remove old passages of guideline #{duplicate['id']}: {e}")
+        _store_guideline_chunks([(duplicate["id"], solution)])
+        _lexical_index_add(result, replace=True)
+        bump_guideline_version()
+        return "updated", duplicate["id"]
+
+    result = client.table("assignments").insert(data).execute()
+    guideline_id = _inserted_id(result)
+    _store_guideline_chunks([(guideline_id, solution)])
+    _lexical_index_add(result)
+    bump_guideline_version()
+    return "inserted", guideline_id
+
+
+# ===============================
+# Data Versions (Cache Invalidation)
+# ===============================
+# One counter per data namespace ("guidelines", "evaluations"). Caches key their
+# entries by the version of the data they were computed from, so a write only
+# invalidates what depends on that namespace: saving an evaluation no longer
+# wipes cached guidelines, PDFs or other sessions' st.cache_data entries.
+_data_versions = {}
+_data_versions_lock = threading.Lock()
+
+
+def data_version(namespace: str) -> int:
+    """Current version of a data namespace (0 until its first write)."""
+    return _data_versions.get(namespace, 0)
+
+
+def bump_data_version(namespace: str) -> int:
+    """Mark every cache entry computed from this namespace as stale."""
+    with _data_versions_lock:
+        _data_versions[namespace] = _data_versions.get(namespace, 0) + 1
+        return _data_versions[namespace]
+
+
+# ===============================
+# Topic -> Guideline Cache
+# ===============================
+# Batch grading resolves the same topic many times within seconds. Resolved
+# guidelines are cached per normalized topic for a TTL, tagged with the
+# "guidelines" data version; every guideline write bumps it, which invalidates
+# all cached entries at once.
+GUIDELINE_CACHE_TTL_SECONDS = float(os.getenv("GUIDELINE_CACHE_TTL_SECONDS", "300"))
+GUIDELINE_CACHE_SIZE = int(os.getenv("GUIDELINE_CACHE_SIZE", "1024"))
+# "No guideline" can also mean the lookup failed transiently, so keep it briefly
+GUIDELINE_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("GUIDELINE_CACHE_NEGATIVE_TTL_SECONDS", "30"))
+
+_guideline_cache = None
+_guideline_cache_lock = threading.Lock()
+
+
+def bump_guideline_version():
+    """Invalidate every cached topic -> guideline result (called after guideline writes)."""
+    with _guideline_cache_lock:
+        version = bump_data_version("guidelines")
+        if _guideline_cache is not None:
+            _guideline_cache.clear()
+    mark_vector_index_stale()
+    return version
+
+
+def _guideline_cache_get(topic: str):
+    """Return (hit, match) for a topic from the cache."""
+    import time
+    key = normalize_text(topic)
+    with _guideline_cache_lock:
+        entry = _guideline_cache.get(key) if _guideline_cache is not None else None
+        if entry is None:
+            return False, None
+        version, expires_at, match = entry
+        if version != data_version("guidelines") or expires_at < time.monotonic():
+            del _guideline_cache[key]
+            return False, None
+        _guideline_cache.move_to_end(key)
+        return True, match
+
+
+def _guideline_cache_put(topic: str, version: int, match):
+    import time
+    from collections import OrderedDict
+    global _guideline_cache
+    with _guideline_cache_lock:
+        # A write landed while we were resolving; this result may already be stale
+        if version != data_version("guidelines"):
+            return
+        if _guideline_cache is None:
+            _guideline_cache = OrderedDict()
+        key = normalize_text(topic)
+        ttl = GUIDELINE_CACHE_TTL_SECONDS if match is not None else GUIDELINE_CACHE_NEGATIVE_TTL_SECONDS
+        _guideline_cache[key] = (version, time.monotonic() + ttl, match)
+        _guideline_cache.move_to_end(key)
+        while len(_guideline_cache) > GUIDELINE_CACHE_SIZE:
+            _guideline_cache.popitem(last=False)
+
+
+# ===============================
+# Local Vector Index (Optional)
+# ===============================
+# When enabled, similarity search runs in-process over a memory-mapped snapshot
+# of guideline embeddings (see backend/vector_index.py). The match_assignments
+# RPC stays as the fallback.
+LOCAL_VECTOR_INDEX = os.getenv("LOCAL_VECTOR_INDEX", "0").strip().lower() in ("1", "true", "yes")
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", os.path.join(project_root, "backend", "data", "vector_index"))
+VECTOR_INDEX_SYNC_SECONDS = float(os.getenv("VECTOR_INDEX_SYNC_SECONDS", "60"))
+# How snapshot embeddings are stored: float32 (exact), float16 or int8 (per-vector scale)
+EMBEDDING_STORAGE_DTYPE = os.getenv("EMBEDDING_STORAGE_DTYPE", "float32").strip().lower()
+
+_vector_index = None
+_vector_index_stale = True
+_vector_index_lock = threading.Lock()
+
+
+def mark_vector_index_stale():
+    """Force a sync before the next local index query (called after guideline writes)."""
+    global _vector_index_stale
+    _vector_index_stale = True
+
+
+def get_vector_index():
+    """Return the local vector index, synced if stale, or None when disabled/unavailable."""
+    import time
+    global _vector_index, _vector_index_stale
+    if not LOCAL_VECTOR_INDEX:
+        return None
+    with _vector_index_lock:
+        if _vector_index is None:
+            try:
+                from backend.vector_index import LocalVectorIndex
+                _vector_index = LocalVectorIndex(VECTOR_INDEX_DIR, storage_dtype=EMBEDDING_STORAGE_DTYPE)
+            except Exception as e:
+                print(f"[VECTOR_INDEX] Local index unavailable, using RPC only: {e}")
+                return None
+        if _vector_index_stale or time.time() - _vector_index.last_sync > VECTOR_INDEX_SYNC_SECONDS:
+            try:
+                _vector_index.sync(get_supabase())
+                _vector_index_stale = False
+            except Exception as e:
+                # Keep serving the last snapshot; the RPC fallback covers anything it misses
+                print(f"[VECTOR_INDEX] Sync failed, serving last snapshot: {e}")
+                _vector_index.last_sync = time.time()
+    return _vector_index
+
+
+# ===============================
+# Lexical Fallback Index (BM25)
+# ===============================
+# Used when vector search is unavailable. Built lazily from id/content/metadata
+# (see backend/lexical_index.py), updated directly on local inserts and synced
+# for rows inserted by other processes.
+LEXICAL_INDEX_SYNC_SECONDS = float(os.getenv("LEXICAL_INDEX_SYNC_SECONDS", "300"))
+
+_lexical_index = None
+_lexical_index_lock = threading.Lock()
+
+
+def _lexical_index_add(response, replace: bool = False):
+    """Add freshly inserted (or updated) assignments rows to the lexical index, if it is built."""
+    index = _lexical_index
+    if index is not None:
+        index.add_rows(getattr(response, "data", None) or [], replace=replace)
+
+
+def get_lexical_index():
+    """Return the BM25 guideline index, building or syncing it as needed (None on failure)."""
+    import time
+    global _lexical_index
+    with _lexical_index_lock:
+        if _lexical_index is None:
+            from backend.lexical_index import BM25Index
+            index = BM25Index(hash_fn=guideline_content_hash)
+            try:
+                index.sync(get_supabase())
+            except Exception as e:
+                print(f"[LEXICAL_INDEX] Build failed: {e}")
+                return None
+            _lexical_index = index
+        elif time.time() - _lexical_index.last_sync > LEXICAL_INDEX_SYNC_SECONDS:
+            try:
+                _lexical_index.sync(get_supabase())
+            except Exception as e:
+                print(f"[LEXICAL_INDEX] Sync failed, serving current index: {e}")
+                _lexical_index.last_sync = time.time()
+    return _lexical_index
+
+
 # ===============================
 # Retrieve Relevant Guideline (Updated for Direct Insert Format)
 # ===============================
-def retrieve_relevant_guideline(query_text: str):
+def _extract_solution(row: dict):
+    """Pull the solution text out of an assignments row's metadata (JSON string or dict)."""
+    import json
+    metadata = row.get("metadata")
+    if isinstance(metadata, str):
+        metadata = json.loads(metadata)
+    if isinstance(metadata, dict):
+        return metadata.get("solution") or None
+    return None
+
+
+def _resolve_guideline(query_text: str):
+    """Find the best guideline for a topic without caching.
+
+    Returns a dict with ``id``, ``solution``, ``similarity`` and ``source``
+    ("local_index", "vector_rpc" or "lexical_fallback"), or None.
+    """
     try:
         print(f"--- DEBUG: Searching for Topic: '{query_text}' ---")
         
         # Generate embedding for the query
-        query_embedding = embeddings.embed_query(query_text)
+        query_embedding = embed_text(query_text)
+
+        # Local in-process index first (if enabled)
+        try:
+            index = get_vector_index()
+            if index is not None:
+                for row in index.search(query_embedding, k=1, threshold=0.0):
+                    if row.get("solution"):
+                        print(f"--- DEBUG: Match Found via local vector index ---")
+                        return {"id": row.get("id"), "solution": row["solution"], "similarity": row["similarity"], "source": "local_index"}
+        except Exception as e:
+            print(f"--- DEBUG: Local vector index search failed: {e}")
         
         # Use Supabase RPC for vector similarity search
         try:
-            results = supabase.rpc(
+            results = get_supabase().rpc(
                 "match_assignments",
                 {
                     "query_embedding": query_embedding,
@@ -91,46 +568,29 @@ def retrieve_relevant_guideline(query_text: str):
                 row = rows[0]
                 # Extract solution from metadata JSON
                 try:
-                    import json
-                    metadata = row.get("metadata")
-                    if isinstance(metadata, str):
-                        metadata = json.loads(metadata)
-                    if isinstance(metadata, dict):
-                        solution = metadata.get("solution")
-                        if solution:
-                            print(f"--- DEBUG: Match Found via vector RPC ---")
-                            return solution
+                    solution = _extract_solution(row)
+                    if solution:
+                        print(f"--- DEBUG: Match Found via vector RPC ---")
+                        return {"id": row.get("id"), "solution": solution, "similarity": row.get("similarity"), "source": "vector_rpc"}
                 except Exception as e:
                     print(f"--- DEBUG: Failed extracting solution from RPC result: {e}")
         except Exception as e:
             print(f"--- DEBUG: Vector RPC call failed: {e}")
         
-        # FALLBACK: Direct SQL query to assignments table
-        print("--- DEBUG: Attempting SQL fallback...")
+        # FALLBACK: best lexical (BM25) match over guideline titles and solutions
+        print("--- DEBUG: Attempting lexical fallback...")
         try:
-            resp = supabase.table("assignments").select("*").limit(10).execute()
-            rows = getattr(resp, "data", None) or (resp.get("data") if isinstance(resp, dict) else None)
-            
-            if rows:
-                for row in rows:
-                    try:
-                        import json
-                        metadata = row.get("metadata")
-                        if isinstance(metadata, str):
-                            metadata = json.loads(metadata)
-                        if isinstance(metadata, dict):
-                            solution = metadata.get("solution")
-                            if solution:
-                                print(f"--- DEBUG: Match Found via SQL fallback ---")
-                                return solution
-                    except Exception as e:
-                        pass
-            
-            print("--- DEBUG: SQL fallback found no solutions ---")
+            index = get_lexical_index()
+            hits = index.search(query_text, k=1) if index is not None else []
+            if hits:
+                print(f"--- DEBUG: Match Found via lexical fallback (BM25 score {hits[0]['score']:.2f}) ---")
+                return {"id": hits[0]["id"], "solution": hits[0]["solution"], "similarity": None, "source": "lexical_fallback"}
+
+            print("--- DEBUG: Lexical fallback found no matching guideline ---")
             return None
-            
+
         except Exception as e:
-            print(f"--- DEBUG: SQL fallback failed: {e}")
+            print(f"--- DEBUG: Lexical fallback failed: {e}")
             return None
     
     except Exception as e:
@@ -140,6 +600,98 @@ def retrieve_relevant_guideline(query_text: str):
         return None
 
 
+def resolve_guideline(query_text: str):
+    """Cached version of _resolve_guideline (see the topic -> guideline cache above)."""
+    hit, match = _guideline_cache_get(query_text)
+    if hit:
+        print(f"--- DEBUG: Guideline cache hit for Topic: '{query_text}' ---")
+        return match
+    version = data_version("guidelines")
+    match = _resolve_guideline(query_text)
+    _guideline_cache_put(query_text, version, match)
+    return match
+
+
+def retrieve_relevant_guideline(query_text: str):
+    match = resolve_guideline(query_text)
+    return match["solution"] if match else None
+
+
+def _match_topics_multi(query_embeddings):
+    """Best guideline per embedding with one match_assignments_multi round-trip.
+
+    Returns a list aligned with ``query_embeddings`` (None where nothing matched).
+    """
+    results = get_supabase().rpc(
+        "match_assignments_multi",
+        {
+            "query_embeddings": query_embeddings,
+            "match_count": 1,
+            "similarity_threshold": 0.0
+        }
+    ).execute()
+    matches = [None] * len(query_embeddings)
+    for row in getattr(results, "data", None) or []:
+        i = row.get("query_index")
+        solution = _extract_solution(row)
+        if i is None or not solution or not 0 <= i < len(matches):
+            continue
+        if matches[i] is None or (row.get("similarity") or 0) > (matches[i]["similarity"] or 0):
+            matches[i] = {"id": row.get("id"), "solution": solution, "similarity": row.get("similarity"), "source": "vector_rpc"}
+    return matches
+
+
+def retrieve_guidelines_batch(topics):
+    """Resolve many topics at once. Returns {topic: match or None}.
+
+    Each match is the same dict ``resolve_guideline`` returns (``id``,
+    ``solution``, ``similarity``, ``source``). Cached topics are answered from
+    the topic cache; the rest are embedded in one batch and matched with the
+    local vector index or a single ``match_assignments_multi`` call. Topics
+    that still have no match go through the per-topic path (with its lexical
+    fallback).
+    """
+    results, pending = {}, {}
+    for topic in topics:
+        if topic in results or topic in pending:
+            continue
+        hit, match = _guideline_cache_get(topic)
+        if hit:
+            results[topic] = match
+        else:
+            pending[topic] = None
+    if not pending:
+        return results
+
+    version = data_version("guidelines")
+    texts = list(pending)
+    print(f"--- DEBUG: Batch guideline lookup for {len(texts)} topics ({len(results)} cached) ---")
+    try:
+        vectors = embed_texts(texts)
+        index = get_vector_index()
+        if index is not None:
+            for topic, vector in zip(texts, vectors):
+                for row in index.search(vector, k=1, threshold=0.0):
+                    if row.get("solution"):
+                        pending[topic] = {"id": row.get("id"), "solution": row["solution"], "similarity": row["similarity"], "source": "local_index"}
+        missing = [i for i, topic in enumerate(texts) if pending[topic] is None]
+        if missing:
+            for i, match in zip(missing, _match_topics_multi([vectors[i] for i in missing])):
+                pending[texts[i]] = match
+    except Exception as e:
+        print(f"--- DEBUG: Batch guideline lookup failed, resolving topics one by one: {e}")
+
+    for topic in texts:
+        match = pending[topic]
+        if match is None:
+            # resolve_guideline caches its own result
+            results[topic] = resolve_guideline(topic)
+        else:
+            _guideline_cache_put(topic, version, match)
+            results[topic] = match
+    return results
+
+
 # ===============================
 # Store Guideline with Metadata (Updated to Direct Insert)
 # ===============================
@@ -150,24 +702,26 @@ def store_guideline_with_metadata(extracted_text: str, question_title: str):
         from datetime import datetime
         
         # Generate embeddings
-        text_embedding = embeddings.embed_query(extracted_text)
+        text_embedding = embed_text(extracted_text)
         
         # Prepare data
+        content_hash = guideline_content_hash(extracted_text, extracted_text)
         data = {
             "content": extracted_text,
             "metadata": json.dumps({
                 "question": question_title,
                 "solution": extracted_text,
-                "type": "guideline"
+                "type": "guideline",
+                "content_hash": content_hash
             }),
             "embedding": text_embedding,
             "created_at": datetime.utcnow().isoformat()
         }
         
-        # Direct insert
-        supabase.table("assignments").insert(data).execute()
+        # Direct insert (or skip/update a duplicate)
+        action, _ = _write_guideline(data, extracted_text, content_hash)
         
-        print(f"✅ Guideline with metadata stored successfully")
+        print(f"✅ Guideline with metadata {action}")
         return True
     except Exception as e:
         print(f"[ERROR] Ingestion Error: {e}")
@@ -176,6 +730,232 @@ def store_guideline_with_metadata(extracted_text: str, question_title: str):
         return False
 
 
+# ===============================
+# Bulk Guideline Ingestion
+# ===============================
+GUIDELINE_INSERT_CHUNK_SIZE = int(os.getenv("GUIDELINE_INSERT_CHUNK_SIZE", "100"))
+
+
+def store_guidelines_bulk(guidelines, embed_batch_size: int = None, insert_chunk_size: int = None):
+    """Store many (question_text, solution_text) guidelines at once.
+
+    Question texts are embedded in batches through ``embed_documents`` and rows are
+    written with chunked bulk inserts. Guidelines whose content hash is already
+    stored (or repeated within the batch) are skipped; near-duplicate checks are
+    left to the single-guideline path. Returns a report dict with ``rows``,
+    ``failed``, ``skipped``, timings and ``rows_per_sec``.
+    """
+    import json
+    import time
+    from datetime import datetime, timedelta
+
+    insert_chunk_size = max(1, insert_chunk_size or GUIDELINE_INSERT_CHUNK_SIZE)
+    items = [(str(q or ""), str(sol or "")) for q, sol in guidelines]
+    report = {"rows": 0, "failed": 0, "skipped": 0, "embed_seconds": 0.0, "insert_seconds": 0.0, "rows_per_sec": 0.0}
+
+    hashes = [guideline_content_hash(q, sol) for q, sol in items]
+    if GUIDELINE_DEDUP_MODE != "off" and items:
+        index = get_lexical_index()
+        seen, unique = set(), []
+        for item, content_hash in zip(items, hashes):
+            if content_hash in seen or (index is not None and index.find_hash(content_hash) is not None):
+                continue
+            seen.add(content_hash)
+            unique.append((item, content_hash))
+        report["skipped"] = len(items) - len(unique)
+        items, hashes = [u[0] for u in unique], [u[1] for u in unique]
+        if report["skipped"]:
+            print(f"[DEDUP] Skipping {report['skipped']} guidelines that are already stored")
+    if not items:
+        return report
+
+    started = time.perf_counter()
+    vectors = embed_texts([q for q, _ in items], batch_size=embed_batch_size)
+    report["embed_seconds"] = round(time.perf_counter() - started, 3)
+
+    # One microsecond apart: distinct, input-ordered timestamps for the incremental index syncs
+    # (a DB default would repeat one NOW() for every row of an insert)
+    base = datetime.utcnow()
+    records = [
+        {
+            "content": question,
+            "metadata": json.dumps({"solution": solution, "type": "guideline", "content_hash": content_hash}),
+            "embedding": vector,
+            "created_at": (base + timedelta(microseconds=i)).isoformat()
+        }
+        for i, ((question, solution), content_hash, vector) in enumerate(zip(items, hashes, vectors))
+    ]
+
+    insert_started = time.perf_counter()
+    for start in range(0, len(records), insert_chunk_size):
+        chunk = records[start:start + insert_chunk_size]
+        try:
+            resp = get_supabase().table("assignments").insert(chunk).execute()
+            report["rows"] += len(chunk)
+            _lexical_index_add(resp)
+            inserted = getattr(resp, "data", None) or []
+            _store_guideline_chunks([
+                (row.get("id"), solution)
+                for row, (_, solution) in zip(inserted, items[start:start + len(chunk)])
+            ])
+        except Exception as e:
+            report["failed"] += len(chunk)
+            print(f"[ERROR] Bulk insert of rows {start}-{start + len(chunk) - 1} failed: {e}")
+    report["insert_seconds"] = round(time.perf_counter() - insert_started, 3)
+
+    if report["rows"]:
+        bump_guideline_version()
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_sec"] = round(report["rows"] / elapsed, 2) if elapsed > 0 else 0.0
+    print(f"✅ Bulk ingestion: {report['rows']} rows stored, {report['failed']} failed, {report['skipped']} duplicates skipped, {report['rows_per_sec']} rows/sec")
+    return report
+
+
+# ===============================
+# Guideline Passages (Chunk-Level Index)
+# ===============================
+# Long solutions are split into passages stored in `guideline_chunks` with a link
+# to their parent `assignments` row. At evaluation time only the top-k passages
+# closest to the student's answer go into the prompt instead of the whole answer
+# key. Solutions short enough to fit in k passages are always used whole.
+GUIDELINE_CHUNKING = os.getenv("GUIDELINE_CHUNKING", "1").strip().lower() in ("1", "true", "yes")
+GUIDELINE_CHUNK_CHARS = int(os.getenv("GUIDELINE_CHUNK_CHARS", "800"))
+GUIDELINE_PASSAGE_TOP_K = int(os.getenv("GUIDELINE_PASSAGE_TOP_K", "4"))
+
+
+def _inserted_id(response):
+    rows = getattr(response, "data", None) or []
+    return rows[0].get("id") if rows else None
+
+
+def _needs_chunking(solution: str) -> bool:
+    return GUIDELINE_CHUNKING and len(solution or "") > GUIDELINE_CHUNK_CHARS * GUIDELINE_PASSAGE_TOP_K
+
+
+def split_into_passages(text: str, max_chars: int = None):
+    """Split text into passages of at most ``max_chars``.
+
+    Paragraphs are kept whole when they fit, otherwise split on sentence
+    boundaries (and hard-wrapped as a last resort). Each passage repeats the
+    previous passage's last paragraph/sentence when it fits, so an idea that
+    straddles a boundary is not lost.
+    """
+    import re
+    max_chars = max_chars or GUIDELINE_CHUNK_CHARS
+    units = []
+    for paragraph in re.split(r"\n\s*\n", text or ""):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            units.append(paragraph)
+            continue
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            while len(sentence) > max_chars:
+                units.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if sentence:
+                units.append(sentence)
+
+    passages, current = [], []
+    for unit in units:
+        if current and len(" ".join(current + [unit])) > max_chars:
+            passages.append(" ".join(current))
+            overlap = current[-1]
+            current = [overlap] if len(overlap) + 1 + len(unit) <= max_chars else []
+        current.append(unit)
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def _store_guideline_chunks(parents):
+    """Split, embed and insert passages for [(guideline_id, solution), ...]. Returns passages stored."""
+    records = []
+    for guideline_id, solution in parents:
+        if guideline_id is None or not _needs_chunking(solution):
+            continue
+        for index, passage in enumerate(split_into_passages(solution)):
+            records.append({"guideline_id": guideline_id, "chunk_index": index, "content": passage})
+    if not records:
+        return 0
+    try:
+        vectors = embed_texts([r["content"] for r in records])
+        for record, vector in zip(records, vectors):
+            record["embedding"] = vector
+        get_supabase().table("guideline_chunks").insert(records).execute()
+        print(f"[CHUNKS] Indexed {len(records)} passages for {len({r['guideline_id'] for r in records})} guideline(s)")
+        return len(records)
+    except Exception as e:
+        # The parent guideline is stored either way; retrieval falls back to the full solution
+        print(f"[CHUNKS] Passage indexing failed (is the guideline_chunks table set up?): {e}")
+        return 0
+
+
+def backfill_guideline_chunks(page_size: int = 100):
+    """Index passages for existing guidelines that have none yet. Returns passages stored.
+
+    Guidelines are paged by id, and each page checks only its own ids against
+    ``guideline_chunks`` (one chunk_index 0 row per chunked guideline), so no
+    request can be cut off by the PostgREST row cap.
+    """
+    client = get_supabase()
+    stored, last_id = 0, None
+    while True:
+        query = client.table("assignments").select("id,metadata")
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        resp = query.order("id").limit(page_size).execute()
+        rows = getattr(resp, "data", None) or []
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        ids = [row["id"] for row in rows]
+        resp = client.table("guideline_chunks").select("guideline_id").in_("guideline_id", ids).eq("chunk_index", 0).execute()
+        done = {row["guideline_id"] for row in (getattr(resp, "data", None) or [])}
+        stored += _store_guideline_chunks([
+            (row["id"], _extract_solution(row)) for row in rows if row["id"] not in done
+        ])
+        if len(rows) < page_size:
+            break
+    return stored
+
+
+def retrieve_relevant_passages(query_text: str, student_answer: str = None, k: int = None):
+    """Return the reference guideline for a topic, trimmed to the passages that matter.
+
+    The guideline is resolved as usual (cached); when it is long and a student
+    answer is given, only the ``k`` passages most similar to the answer are
+    returned, in their original order. Falls back to the full solution whenever
+    passages are unavailable.
+    """
+    match = resolve_guideline(query_text)
+    if not match:
+        return None
+    solution = match["solution"]
+    if not student_answer or not student_answer.strip() or match.get("id") is None or not _needs_chunking(solution):
+        return solution
+
+    k = k or GUIDELINE_PASSAGE_TOP_K
+    try:
+        # Student answers are one-off texts, so they bypass the embedding cache
+        answer_embedding = get_embeddings().embed_query(student_answer)
+        resp = get_supabase().rpc(
+            "match_guideline_chunks",
+            {"query_embedding": answer_embedding, "parent_id": match["id"], "match_count": k}
+        ).execute()
+        rows = getattr(resp, "data", None) or []
+        if not rows:
+            return solution
+        rows.sort(key=lambda r: r.get("chunk_index", 0))
+        print(f"--- DEBUG: Using {len(rows)} guideline passages ({sum(len(r['content']) for r in rows)} of {len(solution)} chars) ---")
+        return "\n...\n".join(r["content"] for r in rows)
+    except Exception as e:
+        print(f"--- DEBUG: Passage retrieval failed, using full guideline: {e}")
+        return solution
+
+
 # ===============================
 # Retrieve with Fallback (Enhanced)
 # ===============================
@@ -208,7 +988,10 @@ def save_evaluation_result(topic: str, student_name: str, evaluation_data: dict,
             "rubric_breakdown": json.dumps(evaluation_data.get("rubric_breakdown", [])),
             "missing_concepts": json.dumps(evaluation_data.get("missing_concepts", [])),
             "suggested_resources": json.dumps(evaluation_data.get("suggested_resources", [])),
-            "evaluation_metadata": json.dumps(evaluation_data.get("metadata", {}))
+            "evaluation_metadata": json.dumps({
+                **(evaluation_data.get("metadata") or {}),
+                **({"score_check": evaluation_data["score_check"]} if evaluation_data.get("score_check") else {})
+            })
         }
         
         # Add roll number and student answer if provided
@@ -219,7 +1002,7 @@ def save_evaluation_result(topic: str, student_name: str, evaluation_data: dict,
         
         # Insert into evaluations table
         try:
-            result = supabase.table("evaluations").insert(eval_record).execute()
+            result = get_supabase().table("evaluations").insert(eval_record).execute()
         except Exception as e:
             # FALLBACK: If new columns are missing, try saving only primary fields
             err_str = str(e)
@@ -235,12 +1018,15 @@ def save_evaluation_result(topic: str, student_name: str, evaluation_data: dict,
                 }
                 if student_roll and "student_roll" not in err_str:
                     basic_record["student_roll"] = student_roll
-                result = supabase.table("evaluations").insert(basic_record).execute()
+                result = get_supabase().table("evaluations").insert(basic_record).execute()
             else:
                 raise e
         
+        # Keep the row id with the result so later corrections update this row
+        if result.data and result.data[0].get("id") is not None:
+            evaluation_data["evaluation_id"] = result.data[0]["id"]
         print(f"✅ Full Evaluation SAVED to Supabase: {student_name} | Topic: '{topic}'")
-        clear_analytics_cache()
+        clear_analytics_cache(full=False)
         return True
     except Exception as e:
         print(f"[ERROR] Error saving evaluation: {e}")
@@ -249,14 +1035,76 @@ def save_evaluation_result(topic: str, student_name: str, evaluation_data: dict,
         return False
 
 
+def update_evaluation_scores(evaluation_id, evaluation_data: dict):
+    """Write a re-scored evaluation (e.g. after teacher rubric adjustments) back to its row."""
+    try:
+        import json
+
+        record = {
+            "score": evaluation_data.get("score"),
+            "grade": evaluation_data.get("grade"),
+            "rubric_breakdown": json.dumps(evaluation_data.get("rubric_breakdown", [])),
+            "evaluation_metadata": json.dumps({
+                **(evaluation_data.get("metadata") or {}),
+                **({"score_check": evaluation_data["score_check"]} if evaluation_data.get("score_check") else {})
+            })
+        }
+        try:
+            get_supabase().table("evaluations").update(record).eq("id", evaluation_id).execute()
+        except Exception as e:
+            err_str = str(e)
+            if any(col in err_str for col in ["rubric_breakdown", "evaluation_metadata"]):
+                print("[DEBUG] Extra columns missing in DB, updating score and grade only")
+                basic_record = {"score": record["score"], "grade": record["grade"]}
+                get_supabase().table("evaluations").update(basic_record).eq("id", evaluation_id).execute()
+            else:
+                raise e
+
+        print(f"✅ Evaluation {evaluation_id} UPDATED: score {record['score']} | grade {record['grade']}")
+        _patch_evaluation_analytics(evaluation_id, {"score": record["score"], "grade": record["grade"]})
+        return True
+    except Exception as e:
+        print(f"[ERROR] Error updating evaluation {evaluation_id}: {e}")
+        return False
+
+
 # ===============================
 # Cache & Refresh Utilities
 # ===============================
-def clear_analytics_cache():
-    """Clear Streamlit cache for analytics - called after new evaluation."""
-    import streamlit as st
-    if hasattr(st, 'cache_data'):
-        st.cache_data.clear()
+def clear_analytics_cache(full=True):
+    """Invalidate analytics after evaluations were written.
+
+    Bumps the "evaluations" data version instead of calling
+    st.cache_data.clear(): only cache entries keyed by that version (e.g.
+    ``cached_get_all_evaluations`` in the frontend) are recomputed.
+    ``full=False`` (rows were only added) keeps the analytics snapshot and just
+    makes the next read fold in the new rows; deletes need ``full=True``.
+    """
+    bump_data_version("evaluations")
+    _reset_analytics_snapshot(full)
+    _reset_columnar_cache(full)
+
+
+def _patch_evaluation_analytics(evaluation_id, changes: dict):
+    """Apply an in-place edit of one evaluation to the local analytics.
+
+    Incremental refreshes only pick up new created_at values, so an edited row
+    has to be patched here. Only that row changes: the snapshot is refolded in
+    memory and only the Parquet part file holding the row is rewritten, with
+    no refetch. Other processes see the edit after their next full reload.
+    """
+    global _analytics_snapshot
+    with _analytics_lock:
+        if _analytics_snapshot is not None:
+            _analytics_snapshot = _analytics_snapshot.replaced(evaluation_id, changes)
+    with _columnar_cache_lock:
+        if _columnar_cache is not None:
+            try:
+                _columnar_cache.update_row(evaluation_id, changes)
+            except Exception as e:
+                print(f"[COLUMNAR_CACHE] Could not patch evaluation {evaluation_id}, rebuilding on next sync: {e}")
+                _columnar_cache.reset()
+    bump_data_version("evaluations")
 
 
 # ===============================
@@ -266,7 +1114,7 @@ def delete_all_evaluations():
     """Wipes all records from the evaluations table."""
     try:
         # Using a filter that matches all (id > 0)
-        supabase.table("evaluations").delete().gt("id", 0).execute()
+        get_supabase().table("evaluations").delete().gt("id", 0).execute()
         clear_analytics_cache()
         return True
     except Exception as e:
@@ -277,7 +1125,7 @@ def delete_mock_data():
     """Deletes the automatically inserted mock data (from Feb 4th)."""
     try:
         # Sample data was inserted with '2026-02-04'
-        supabase.table("evaluations").delete().lt("created_at", "2026-02-10").execute()
+        get_supabase().table("evaluations").delete().lt("created_at", "2026-02-10").execute()
         clear_analytics_cache()
         return True
     except Exception as e:
@@ -288,56 +1136,277 @@ def delete_mock_data():
 # ===============================
 # Analytics Functions
 # ===============================
-def get_all_evaluations():
-    """Retrieve all evaluation records from database."""
-    try:
-        # Fetch everything (*) to ensure new columns are available in the result
-        resp = supabase.table("evaluations").select("*").order("created_at", desc=True).execute()
+# All dashboard views read from one AnalyticsSnapshot (backend/analytics.py),
+# built from a single fetch and memoized briefly so one render of the Analytics
+# tab hits Supabase once. After the TTL only rows newer than the snapshot's
+# created_at watermark are fetched and folded in. The refresh re-reads a short
+# window behind the watermark (ids are de-duplicated), because created_at is set
+# by the app before the insert and concurrent workers can commit slightly out
+# of order. Deletes drop the snapshot (clear_analytics_cache()).
+ANALYTICS_SNAPSHOT_TTL_SECONDS = float(os.getenv("ANALYTICS_SNAPSHOT_TTL_SECONDS", "10"))
+ANALYTICS_WATERMARK_LAG_SECONDS = float(os.getenv("ANALYTICS_WATERMARK_LAG_SECONDS", "30"))
+
+_analytics_snapshot = None
+_analytics_snapshot_at = 0.0
+_analytics_lock = threading.Lock()
+
+
+# Columns the dashboard reads (the EvaluationRow fields in backend/analytics.py).
+# student_answer, rubric_breakdown and the other JSON columns are the bulk of each
+# row and are only needed by the per-evaluation report.
+ANALYTICS_COLUMNS = ("id", "student_name", "student_roll", "topic", "score", "grade", "created_at")
+
+# Rows per request when streaming evaluations. Kept below PostgREST's max-rows
+# cap (1000 on Supabase by default) so no page is silently cut short.
+EVALUATION_PAGE_SIZE = int(os.getenv("EVALUATION_PAGE_SIZE", "500"))
+
+_missing_columns_warned = False
+
+
+def _keyset_filter(last, newest_first=True):
+    """PostgREST or= filter for the rows after ``last``.
+
+    Newest first is (created_at DESC NULLS FIRST, id DESC); oldest first is the
+    exact reverse, (created_at ASC NULLS LAST, id ASC).
+    """
+    created_at, row_id = last.get("created_at"), last.get("id")
+    if newest_first:
+        if created_at is None:
+            return f"and(created_at.is.null,id.lt.{row_id}),created_at.not.is.null"
+        return f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id})'
+    if created_at is None:
+        return f"and(created_at.is.null,id.gt.{row_id})"
+    return f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{row_id}),created_at.is.null'
+
+
+def iter_evaluations(columns=ANALYTICS_COLUMNS, page_size=None, since=None, newest_first=True):
+    """Yield evaluation records with only the given columns.
+
+    Rows are fetched in keyset-paginated pages ordered by (created_at, id), so
+    any number of rows can be read without hitting the PostgREST row cap, and
+    each page is a cheap index range scan instead of a growing OFFSET.
+    ``columns="*"`` selects every column. If the table predates one of the
+    requested columns, all columns are fetched instead. ``since`` keeps only
+    rows with ``created_at >= since`` (rows without a timestamp are excluded).
+    """
+    global _missing_columns_warned
+    page_size = page_size or EVALUATION_PAGE_SIZE
+    if isinstance(columns, str):
+        select = columns
+    else:
+        # The cursor needs created_at and id even if the caller did not ask for them
+        select = ",".join(dict.fromkeys([*columns, "created_at", "id"]))
+    last = None
+    while True:
+        query = get_supabase().table("evaluations").select(select)
+        if since is not None:
+            query = query.gte("created_at", since)
+        if last is not None:
+            query = query.or_(_keyset_filter(last, newest_first))
+        query = query.order("created_at", desc=newest_first, nullsfirst=newest_first)
+        query = query.order("id", desc=newest_first).limit(page_size)
+        try:
+            resp = query.execute()
+        except Exception as e:
+            if last is None and select != "*" and "column" in str(e) and "does not exist" in str(e):
+                if not _missing_columns_warned:
+                    _missing_columns_warned = True
+                    print(f"[ANALYTICS] evaluations is missing a projected column, selecting all: {e}")
+                yield from iter_evaluations("*", page_size, since, newest_first)
+                return
+            raise
 
         rows = getattr(resp, "data", None)
         if rows is None:
             # Try dictionary access if it's not an object
             rows = resp.get("data") if isinstance(resp, dict) else []
-        
         # Ensure it's a list
         if rows is not None and not isinstance(rows, list):
             rows = [rows]
+        if not rows:
+            return
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last = rows[-1]
+
+
+def fetch_evaluations(columns=ANALYTICS_COLUMNS, limit=None):
+    """Retrieve evaluation records (newest first) as a list; see iter_evaluations."""
+    import itertools
+    page_size = min(limit, EVALUATION_PAGE_SIZE) if limit else None
+    return list(itertools.islice(iter_evaluations(columns, page_size), limit))
+
 
-        actual_rows = rows if rows else []
-        print(f"[DEBUG] get_all_evaluations: Retrieved {len(actual_rows)} records")
-        return actual_rows
+def write_evaluations_csv(out, columns="*", page_size=None) -> int:
+    """Stream evaluations (newest first) as CSV into a text file object.
+
+    Only one page is held in memory at a time. JSON columns are written as
+    JSON text. Returns the number of rows written.
+    """
+    import csv
+    import json
+    writer = None
+    count = 0
+    for row in iter_evaluations(columns, page_size):
+        if writer is None:
+            fields = list(row) if isinstance(columns, str) else list(columns)
+            writer = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+        writer.writerow({k: json.dumps(v) if isinstance(v, (dict, list)) else v for k, v in row.items()})
+        count += 1
+    return count
+
+
+def _fetch_evaluation_rows(since=None):
+    """Yield evaluations (oldest first) as EvaluationRow tuples, page by page."""
+    from backend.analytics import EvaluationRow
+    for row in iter_evaluations(ANALYTICS_COLUMNS, since=since, newest_first=False):
+        yield EvaluationRow.from_record(row)
+
+
+def _refresh_since(watermark):
+    """The created_at to re-read from: the watermark minus the lag window."""
+    from datetime import datetime, timedelta
+    try:
+        return (datetime.fromisoformat(watermark) - timedelta(seconds=ANALYTICS_WATERMARK_LAG_SECONDS)).isoformat()
+    except (TypeError, ValueError):
+        return watermark
+
+
+def get_analytics_snapshot():
+    """Return the shared AnalyticsSnapshot, folding in new rows when older than the TTL."""
+    import time
+    from backend.analytics import AnalyticsSnapshot
+    global _analytics_snapshot, _analytics_snapshot_at
+    with _analytics_lock:
+        if _analytics_snapshot is None:
+            snapshot = AnalyticsSnapshot()
+            try:
+                snapshot.add_rows(_fetch_evaluation_rows())
+                print(f"[DEBUG] get_all_evaluations: Retrieved {snapshot.total} records")
+            except Exception as e:
+                print(f"[ERROR] Error retrieving evaluations: {e}")
+                import traceback
+                traceback.print_exc()
+                snapshot = AnalyticsSnapshot()
+            _analytics_snapshot = snapshot
+            _analytics_snapshot_at = time.monotonic()
+        elif time.monotonic() - _analytics_snapshot_at > ANALYTICS_SNAPSHOT_TTL_SECONDS:
+            snapshot = _analytics_snapshot
+            try:
+                since = _refresh_since(snapshot.watermark) if snapshot.watermark else None
+                added = snapshot.add_rows(_fetch_evaluation_rows(since))
+                if added:
+                    print(f"[ANALYTICS] Folded {added} new evaluations into the snapshot ({snapshot.total} total)")
+            except Exception as e:
+                # Rows folded before the error are kept; the overlap window re-reads the rest
+                print(f"[ERROR] Analytics refresh failed, serving the previous snapshot: {e}")
+            _analytics_snapshot_at = time.monotonic()
+        return _analytics_snapshot
+
+
+def _reset_analytics_snapshot(full=True):
+    global _analytics_snapshot, _analytics_snapshot_at
+    with _analytics_lock:
+        if full:
+            _analytics_snapshot = None
+        _analytics_snapshot_at = 0.0
+
+
+# Server-side aggregates (backend/migrations/001_analytics_aggregates.sql) keep
+# dashboard cost independent of table size. "auto" uses them when installed and
+# falls back to the snapshot otherwise; "client" always uses the snapshot.
+ANALYTICS_SOURCE = os.getenv("ANALYTICS_SOURCE", "auto").strip().lower()
+
+_aggregate_results = {}      # rpc name -> (evaluations data version, fetched_at, rows)
+_missing_aggregates = set()
+
+
+def _server_aggregate(name: str):
+    """Rows of an aggregate RPC (memoized like the snapshot), or None if it is unavailable."""
+    import time
+    if ANALYTICS_SOURCE == "client" or name in _missing_aggregates:
+        return None
+    version = data_version("evaluations")
+    cached = _aggregate_results.get(name)
+    if cached and cached[0] == version and time.monotonic() - cached[1] <= ANALYTICS_SNAPSHOT_TTL_SECONDS:
+        return cached[2]
+    try:
+        resp = get_supabase().rpc(name, {}).execute()
+        rows = getattr(resp, "data", None) or []
     except Exception as e:
-        print(f"[ERROR] Error retrieving evaluations: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
+        message = str(e)
+        if "PGRST202" in message or "Could not find the function" in message or "does not exist" in message:
+            # Not installed: stop asking until the process restarts
+            _missing_aggregates.add(name)
+            print(f"[ANALYTICS] {name}() is not installed; computing client-side")
+        else:
+            print(f"[ANALYTICS] {name}() failed, computing client-side: {e}")
+        return None
+    _aggregate_results[name] = (version, time.monotonic(), rows)
+    return rows
+
+
+# How views are computed client-side: "snapshot" (running per-row accumulators,
+# backend/analytics.py) or "pandas" (vectorized groupbys over a typed DataFrame,
+# backend/frame_analytics.py). pandas reads the Parquet mirror when COLUMNAR_CACHE
+# is on. See scripts/bench_analytics_engines.py.
+ANALYTICS_ENGINE = os.getenv("ANALYTICS_ENGINE", "snapshot").strip().lower()
+
+_frame_analytics = (None, None)   # (source key, FrameAnalytics)
+
+
+def _local_analytics():
+    """The client-side analytics engine selected by ANALYTICS_ENGINE."""
+    global _frame_analytics
+    if ANALYTICS_ENGINE != "pandas":
+        return get_analytics_snapshot()
+    from backend.frame_analytics import FrameAnalytics
+    cache = get_columnar_cache()
+    # The data version changes when a row is edited in place (same count and watermark)
+    if cache is not None:
+        key = ("columnar", cache.row_count, cache.watermark, data_version("evaluations"))
+    else:
+        snapshot = get_analytics_snapshot()
+        key = ("snapshot", id(snapshot), snapshot.total, data_version("evaluations"))
+    if _frame_analytics[0] != key:
+        source = cache.frame() if cache is not None else snapshot.rows
+        _frame_analytics = (key, FrameAnalytics(source))
+    return _frame_analytics[1]
+
+
+def _analytics_view(view: str, *args):
+    """Compute a dashboard view from server aggregates, falling back to the client-side engine."""
+    from backend.analytics import AggregateUnavailable, ServerAggregateViews
+    server_view = getattr(ServerAggregateViews(_server_aggregate), view, None)
+    if server_view is not None:
+        try:
+            return server_view(*args)
+        except AggregateUnavailable:
+            pass
+    return getattr(_local_analytics(), view)(*args)
+
+
+def get_all_evaluations():
+    """Retrieve all evaluation records (newest first) from the shared snapshot.
+
+    Records are plain dicts of the ANALYTICS_COLUMNS; use fetch_evaluations("*")
+    for the full rows.
+    """
+    return [row._asdict() for row in get_analytics_snapshot().newest()]
 
 
 def get_total_evaluations():
     """Get count of total evaluations."""
-    evaluations = get_all_evaluations()
-    return len(evaluations)
+    return _analytics_view("summary")["total"]
 
 
 def get_average_score():
     """Calculate average score across all evaluations."""
     try:
-        evaluations = get_all_evaluations()
-        if not evaluations:
-            return 0
-        
-        total_score = 0
-        count = 0
-        for eval_record in evaluations:
-            try:
-                score = float(eval_record.get("score", 0))
-                total_score += score
-                count += 1
-            except (ValueError, TypeError):
-                pass
-        
-        result = round(total_score / count, 2) if count > 0 else 0
-        print(f"[DEBUG] get_average_score: {result} ({count} scores)")
+        result = _analytics_view("average_score")
+        print(f"[DEBUG] get_average_score: {result}")
         return result
     except Exception as e:
         print(f"[ERROR] get_average_score failed: {e}")
@@ -346,115 +1415,38 @@ def get_average_score():
 
 def get_grade_distribution():
     """Get distribution of grades (A, B, C, D, F)."""
-    evaluations = get_all_evaluations()
-    grade_counts = {"A": 0, "B": 0, "C": 0, "D": 0, "F": 0}
-    
-    for eval_record in evaluations:
-        grade = eval_record.get("grade", "").strip().upper()
-        if grade in grade_counts:
-            grade_counts[grade] += 1
-    
-    return grade_counts
+    return _analytics_view("grade_distribution")
 
 
 def get_topic_performance():
     """Get average score by topic."""
-    evaluations = get_all_evaluations()
-    topic_data = {}
-    
-    for eval_record in evaluations:
-        topic = eval_record.get("topic", "Unknown")
-        try:
-            score = float(eval_record.get("score", 0))
-        except (ValueError, TypeError):
-            score = 0
-        
-        if topic not in topic_data:
-            topic_data[topic] = {"scores": [], "count": 0}
-        
-        topic_data[topic]["scores"].append(score)
-        topic_data[topic]["count"] += 1
-    
-    # Calculate averages
-    topic_avg = {}
-    for topic, data in topic_data.items():
-        avg = sum(data["scores"]) / len(data["scores"]) if data["scores"] else 0
-        topic_avg[topic] = round(avg, 2)
-    
-    return topic_avg
+    return _analytics_view("topic_performance")
 
 
 def get_student_performance():
     """Get best (max) score by student."""
-    evaluations = get_all_evaluations()
-    student_data = {}
-    
-    for eval_record in evaluations:
-        student = eval_record.get("student_name", "Unknown")
-        try:
-            score = float(eval_record.get("score", 0))
-        except (ValueError, TypeError):
-            score = 0
-        
-        if student not in student_data:
-            student_data[student] = []
-        
-        student_data[student].append(score)
-    
-    # Calculate Best Score (Max)
-    student_best = {}
-    for student, scores in student_data.items():
-        student_best[student] = max(scores) if scores else 0
-    
-    # Sort by score descending (Top Rank = Best Score)
-    return dict(sorted(student_best.items(), key=lambda x: x[1], reverse=True))
+    return _analytics_view("student_performance")
 
 
 def get_evaluations_by_topic():
     """Get count of evaluations per topic."""
-    evaluations = get_all_evaluations()
-    topic_counts = {}
-    
-    for eval_record in evaluations:
-        topic = eval_record.get("topic", "Unknown")
-        topic_counts[topic] = topic_counts.get(topic, 0) + 1
-    
-    # Sort by count descending
-    return dict(sorted(topic_counts.items(), key=lambda x: x[1], reverse=True))
+    return _analytics_view("evaluations_by_topic")
 
 
 def get_evaluations_over_time():
     """Get evaluations count per day for trend analysis."""
-    evaluations = get_all_evaluations()
-    daily_counts = {}
-    
-    for eval_record in evaluations:
-        created_at = eval_record.get("created_at", "")
-        if created_at:
-            # Extract date part (YYYY-MM-DD)
-            date = created_at.split("T")[0] if "T" in created_at else created_at
-            daily_counts[date] = daily_counts.get(date, 0) + 1
-    
-    # Sort by date
-    return dict(sorted(daily_counts.items()))
+    return _analytics_view("evaluations_over_time")
 
 
 def get_top_students(limit=10):
     """Get top performing students."""
-    student_perf = get_student_performance()
-    return dict(list(student_perf.items())[:limit])
+    return _analytics_view("top_students", limit)
 
 
 def get_evaluations_summary():
     """Get summary statistics."""
     try:
-        evaluations = get_all_evaluations()
-        summary = {
-            "total": len(evaluations),
-            "avg_score": get_average_score(),
-            "unique_students": len(set(e.get("student_name", "") for e in evaluations)) if evaluations else 0,
-            "unique_topics": len(set(e.get("topic", "") for e in evaluations)) if evaluations else 0
-        }
+        summary = _analytics_view("summary")
         print(f"[DEBUG] get_evaluations_summary: {summary}")
         return summary
     except Exception as e:
@@ -469,193 +1461,190 @@ def get_evaluations_summary():
 # ===============================
 def get_score_distribution():
     """Get distribution of scores in ranges."""
-    evaluations = get_all_evaluations()
-    ranges = {"0-2": 0, "2-4": 0, "4-6": 0, "6-8": 0, "8-10": 0}
-    
-    for eval_record in evaluations:
-        try:
-            score = float(eval_record.get("score", 0))
-            if score < 2:
-                ranges["0-2"] += 1
-            elif score < 4:
-                ranges["2-4"] += 1
-            elif score < 6:
-                ranges["4-6"] += 1
-            elif score < 8:
-                ranges["6-8"] += 1
-            else:
-                ranges["8-10"] += 1
-        except (ValueError, TypeError):
-            pass
-    
-    return ranges
+    return _analytics_view("score_distribution")
 
 
 def get_topic_evaluation_count():
     """Get total number of evaluations per topic with count."""
-    evaluations = get_all_evaluations()
-    topic_info = {}
-    
-    for eval_record in evaluations:
-        topic = eval_record.get("topic", "Unknown")
-        if topic not in topic_info:
-            topic_info[topic] = {"count": 0, "scores": []}
-        
-        topic_info[topic]["count"] += 1
-        try:
-            score = float(eval_record.get("score", 0))
-            topic_info[topic]["scores"].append(score)
-        except (ValueError, TypeError):
-            pass
-    
-    # Add average to each topic
-    for topic in topic_info:
-        scores = topic_info[topic]["scores"]
-        avg = sum(scores) / len(scores) if scores else 0
-        topic_info[topic]["avg_score"] = round(avg, 2)
-    
-    return topic_info
+    return _local_analytics().topic_evaluation_count()
 
 
 def get_student_evaluation_count():
     """Get evaluation counts per student."""
-    evaluations = get_all_evaluations()
-    student_counts = {}
-    
-    for eval_record in evaluations:
-        student = eval_record.get("student_name", "Unknown")
-        student_counts[student] = student_counts.get(student, 0) + 1
-    
-    # Sort by count descending
-    return dict(sorted(student_counts.items(), key=lambda x: x[1], reverse=True))
+    return _analytics_view("student_evaluation_count")
 
 
 def get_weak_students(threshold=5):
     """Get students with average score below threshold."""
-    student_perf = get_student_performance()
-    weak_students = {k: v for k, v in student_perf.items() if v < threshold}
-    return dict(sorted(weak_students.items(), key=lambda x: x[1]))
+    return _analytics_view("weak_students", threshold)
 
 
 def get_strong_students(threshold=7):
     """Get students with average score above threshold."""
-    student_perf = get_student_performance()
-    strong_students = {k: v for k, v in student_perf.items() if v >= threshold}
-    return dict(sorted(strong_students.items(), key=lambda x: x[1], reverse=True))
+    return _analytics_view("strong_students", threshold)
 
 
 def get_class_stats():
     """Get comprehensive class statistics."""
-    evaluations = get_all_evaluations()
-    if not evaluations:
-        return None
-    
-    scores = []
-    for eval_record in evaluations:
-        try:
-            score = float(eval_record.get("score", 0))
-            scores.append(score)
-        except (ValueError, TypeError):
-            pass
-    
-    if not scores:
-        return None
-    
-    scores.sort()
-    n = len(scores)
-    
-    return {
-        "min_score": min(scores),
-        "max_score": max(scores),
-        "mean": round(sum(scores) / n, 2),
-        "median": scores[n // 2] if n % 2 == 1 else round((scores[n // 2 - 1] + scores[n // 2]) / 2, 2),
-        "std_dev": round((sum((x - (sum(scores) / n)) ** 2 for x in scores) / n) ** 0.5, 2),
-        "total_scores": n
-    }
+    return _analytics_view("class_stats")
 
 
 def get_performance_by_grade():
     """Get comprehensive stats grouped by grade."""
-    evaluations = get_all_evaluations()
-    grade_stats = {}
-    
-    for eval_record in evaluations:
-        grade = eval_record.get("grade", "N/A").strip().upper()
-        if grade not in grade_stats:
-            grade_stats[grade] = {"count": 0, "scores": []}
-        
-        grade_stats[grade]["count"] += 1
-        try:
-            score = float(eval_record.get("score", 0))
-            grade_stats[grade]["scores"].append(score)
-        except (ValueError, TypeError):
-            pass
-    
-    # Calculate averages and counts for each grade
-    result = {}
-    for grade, data in grade_stats.items():
-        scores = data["scores"]
-        result[grade] = {
-            "count": data["count"],
-            "avg_score": round(sum(scores) / len(scores), 2) if scores else 0
-        }
-    
-    return result
+    return _analytics_view("performance_by_grade")
 
 
 def get_topic_difficulty():
     """Rank topics by difficulty (lower avg score = harder)."""
-    topic_perf = get_topic_performance()
-    return dict(sorted(topic_perf.items(), key=lambda x: x[1]))
+    return _analytics_view("topic_difficulty")
 
 
 def get_assignments_per_student():
     """Get evaluation frequency per student."""
-    evaluations = get_all_evaluations()
-    student_eval_count = {}
-    
-    for eval_record in evaluations:
-        student = eval_record.get("student_name", "Unknown")
-        student_eval_count[student] = student_eval_count.get(student, 0) + 1
-    
-    return dict(sorted(student_eval_count.items(), key=lambda x: x[1], reverse=True))
+    return _analytics_view("student_evaluation_count")
 
 
 def get_recent_evaluations(limit=50):
     """Get most recent evaluations."""
-    evaluations = get_all_evaluations()
-    return evaluations[:limit]
+    return [row._asdict() for row in get_analytics_snapshot().recent(limit)]
 
 
 def get_evaluation_stats_by_date():
     """Get evaluation count and average score per date."""
-    evaluations = get_all_evaluations()
-    date_stats = {}
-    
-    for eval_record in evaluations:
-        created_at = eval_record.get("created_at", "")
-        if created_at:
-            date = created_at.split("T")[0] if "T" in created_at else created_at
-            if date not in date_stats:
-                date_stats[date] = {"count": 0, "scores": []}
-            
-            date_stats[date]["count"] += 1
+    return _analytics_view("evaluation_stats_by_date")
+
+
+def get_score_percentiles():
+    """Class-wide count, mean, std_dev, min, max and p10/p25/p50/p75/p90 of valid scores."""
+    return _analytics_view("score_percentiles")
+
+
+def get_topic_score_stats():
+    """Score count, mean, std_dev, min, max and p10-p90 per topic."""
+    return _analytics_view("score_stats_by_topic")
+
+
+def get_student_score_stats():
+    """Score count, mean, std_dev, min, max and p10-p90 per student."""
+    return _analytics_view("score_stats_by_student")
+
+
+def get_date_score_stats():
+    """Score count, mean, std_dev, min, max and p10-p90 per date."""
+    return _analytics_view("score_stats_by_date")
+
+
+# ===============================
+# Leaderboards
+# ===============================
+# Ranked with bounded heaps (backend/ranking.py) over the snapshot rows, newest
+# first so equal scores list the latest evaluation first. Results are memoized
+# per arguments and snapshot state, so the backend and every UI rerun share one
+# computation until new evaluations arrive.
+_leaderboards = {}
+_leaderboards_lock = threading.Lock()
+_LEADERBOARD_MEMO_SIZE = 64
+
+
+def _memo_leaderboard(name, args, compute):
+    snapshot = get_analytics_snapshot()
+    key = (name, args, data_version("evaluations"), id(snapshot), snapshot.total)
+    with _leaderboards_lock:
+        if key in _leaderboards:
+            return _leaderboards[key]
+    result = compute(reversed(snapshot.rows))
+    with _leaderboards_lock:
+        if len(_leaderboards) >= _LEADERBOARD_MEMO_SIZE:
+            _leaderboards.clear()
+        _leaderboards[key] = result
+    return result
+
+
+def get_leaderboard(limit=100, topic=None, start_date=None, end_date=None, method="competition"):
+    """Top evaluations by score, best first, each with a ``rank`` (competition, dense or ordinal).
+
+    Optionally restricted to one topic and/or an inclusive ``YYYY-MM-DD`` date range.
+    """
+    from backend.ranking import leaderboard
+    args = (limit, topic, start_date, end_date, method)
+    return _memo_leaderboard("leaderboard", args, lambda rows: leaderboard(rows, *args))
+
+
+def get_topic_leaderboards(limit=10, start_date=None, end_date=None, method="competition"):
+    """{topic: leaderboard} for every topic, computed in one pass."""
+    from backend.ranking import leaderboards_by_topic
+    args = (limit, start_date, end_date, method)
+    return _memo_leaderboard("by_topic", args, lambda rows: leaderboards_by_topic(rows, *args))
+
+
+# ===============================
+# Local Columnar Cache (Optional)
+# ===============================
+# A month-partitioned Parquet mirror of evaluations (backend/columnar_cache.py)
+# for vectorized pandas analytics that keep working offline. Synced by
+# created_at/id through the keyset-paginated iter_evaluations().
+COLUMNAR_CACHE = os.getenv("COLUMNAR_CACHE", "0").strip().lower() in ("1", "true", "yes")
+COLUMNAR_CACHE_DIR = os.getenv("COLUMNAR_CACHE_DIR", os.path.join(project_root, "backend", "data", "evaluations_parquet"))
+COLUMNAR_CACHE_SYNC_SECONDS = float(os.getenv("COLUMNAR_CACHE_SYNC_SECONDS", "60"))
+
+_columnar_cache = None
+_columnar_cache_stale = True
+_columnar_cache_lock = threading.Lock()
+
+
+def _reset_columnar_cache(full=True):
+    """Mark the mirror stale; ``full`` also deletes it (rows were deleted upstream)."""
+    global _columnar_cache_stale
+    with _columnar_cache_lock:
+        _columnar_cache_stale = True
+        if full and _columnar_cache is not None:
+            _columnar_cache.reset()
+
+
+def get_columnar_cache():
+    """Return the Parquet mirror of evaluations, synced if stale, or None when disabled/unavailable."""
+    import time
+    global _columnar_cache, _columnar_cache_stale
+    if not COLUMNAR_CACHE:
+        return None
+    with _columnar_cache_lock:
+        if _columnar_cache is None:
             try:
-                score = float(eval_record.get("score", 0))
-                date_stats[date]["scores"].append(score)
-            except (ValueError, TypeError):
-                pass
-    
-    # Calculate averages
-    result = {}
-    for date, data in date_stats.items():
-        scores = data["scores"]
-        result[date] = {
-            "count": data["count"],
-            "avg_score": round(sum(scores) / len(scores), 2) if scores else 0
-        }
-    
-    return dict(sorted(result.items()))
+                from backend.columnar_cache import EvaluationColumnarCache
+                _columnar_cache = EvaluationColumnarCache(COLUMNAR_CACHE_DIR, lag_seconds=ANALYTICS_WATERMARK_LAG_SECONDS)
+            except Exception as e:
+                print(f"[COLUMNAR_CACHE] Columnar cache unavailable: {e}")
+                return None
+        if _columnar_cache_stale or time.time() - _columnar_cache.last_sync > COLUMNAR_CACHE_SYNC_SECONDS:
+            try:
+                _columnar_cache.sync(
+                    lambda since: iter_evaluations(ANALYTICS_COLUMNS, since=since, newest_first=False))
+                _columnar_cache_stale = False
+            except Exception as e:
+                # Offline or Supabase down: keep serving the local files
+                print(f"[COLUMNAR_CACHE] Sync failed, serving local data: {e}")
+                _columnar_cache.last_sync = time.time()
+    return _columnar_cache
+
+
+def get_evaluations_frame(columns=None, months=None):
+    """All evaluations as a pandas DataFrame (oldest first) for vectorized analytics.
+
+    Reads the local Parquet mirror when COLUMNAR_CACHE is enabled, otherwise
+    builds the frame from the analytics snapshot. Columns are the
+    ANALYTICS_COLUMNS plus ``score_value`` (the parsed score, NaN if invalid).
+    """
+    import pandas as pd
+    cache = get_columnar_cache()
+    if cache is not None:
+        return cache.frame(columns, months)
+    from backend.analytics import parse_row_score
+    rows = get_analytics_snapshot().rows
+    frame = pd.DataFrame.from_records(rows, columns=list(ANALYTICS_COLUMNS))
+    frame["score_value"] = pd.Series([parse_row_score(r) for r in rows], dtype="float64")
+    if months is not None:
+        frame = frame[frame["created_at"].fillna("unknown").str[:7].isin(months)]
+    return frame[list(columns)] if columns is not None else frame
 
 
 # ===============================
@@ -696,7 +1685,7 @@ def insert_test_data():
     current_time = datetime.utcnow().isoformat()
     for data in test_data:
         try:
-            supabase.table("evaluations").insert({
+            get_supabase().table("evaluations").insert({
                 "topic": data["topic"],
                 "student_name": data["student_name"],
                 "score": data["score"],
@@ -0,0 +1,72 @@
+"""
+Compact storage formats for L2-normalized embedding matrices.
+
+- ``float32``: exact (4 bytes per dimension)
+- ``float16``: half precision (2 bytes per dimension)
+- ``int8``:    symmetric per-vector quantization, ``code = round(v / scale)``
+               with ``scale = max|v| / 127`` (1 byte per dimension + 4 bytes per vector)
+
+Cosine scores are computed directly on the stored codes, so a compact matrix
+never has to be expanded back to float32 in full. See
+``scripts/bench_embedding_compression.py`` for size and recall measurements.
+"""
+import numpy as np
+
+DTYPES = ("float32", "float16", "int8")
+_INT8_MAX = 127.0
+
+
+def check_dtype(dtype: str) -> str:
+    dtype = (dtype or "float32").strip().lower()
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported embedding storage dtype '{dtype}' (expected one of {', '.join(DTYPES)})")
+    return dtype
+
+
+def encode(matrix, dtype: str = "float32"):
+    """Encode a (n, dim) float matrix. Returns ``(codes, scales)``; scales is None unless int8."""
+    dtype = check_dtype(dtype)
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if dtype == "float32":
+        return matrix, None
+    if dtype == "float16":
+        return matrix.astype(np.float16), None
+    peaks = np.abs(matrix).max(axis=1) if matrix.size else np.zeros(len(matrix), dtype=np.float32)
+    scales = np.where(peaks > 0, peaks / _INT8_MAX, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(matrix / scales[:, None]), -_INT8_MAX, _INT8_MAX).astype(np.int8)
+    return codes, scales
+
+
+def decode(codes, scales=None):
+    """Expand codes back to a float32 matrix."""
+    matrix = np.asarray(codes, dtype=np.float32)
+    if scales is not None:
+        matrix = matrix * np.asarray(scales, dtype=np.float32)[:, None]
+    return matrix
+
+
+def dtype_of(codes) -> str:
+    return {np.dtype(np.float16): "float16", np.dtype(np.int8): "int8"}.get(np.asarray(codes).dtype, "float32")
+
+
+def scores(codes, scales, query, block_rows: int = 4096):
+    """Dot product of every stored vector with a normalized float32 query.
+
+    Compact codes are upcast to float32 one block of rows at a time, so the
+    temporary memory stays bounded however large the matrix is.
+    """
+    query = np.asarray(query, dtype=np.float32)
+    codes = np.asarray(codes)
+    if codes.dtype == np.float32:
+        result = codes @ query
+    else:
+        result = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), block_rows):
+            result[start:start + block_rows] = codes[start:start + block_rows].astype(np.float32) @ query
+    if scales is not None:
+        result *= scales
+    return result
+
+
+def nbytes(codes, scales=None) -> int:
+    return int(np.asarray(codes).nbytes + (np.asarray(scales).nbytes if scales is not None else 0))
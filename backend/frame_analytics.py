@@ -0,0 +1,219 @@
+"""
+Vectorized analytics over an ``evaluations`` DataFrame.
+
+``FrameAnalytics`` takes the rows as one typed DataFrame (score parsed to
+float64 once, date and normalized grade derived as columns, names and topics
+as categoricals) and computes every dashboard aggregate with a handful of
+groupbys. It exposes the same views, with the same shapes and ordering, as
+``AnalyticsSnapshot`` in ``backend/analytics.py``; ``ANALYTICS_ENGINE=pandas``
+in ``backend/database.py`` selects it. See ``scripts/bench_analytics_engines.py``.
+
+Rows are expected oldest first. Groups are listed most recently evaluated
+first, like the snapshot does.
+"""
+import numpy as np
+import pandas as pd
+
+from backend.analytics import GRADES, SCORE_RANGES, _avg
+from backend.ranking import top_k_items
+from backend.stats import PERCENTILES, summarize
+
+FRAME_COLUMNS = ("id", "student_name", "student_roll", "topic", "score", "grade", "created_at")
+
+
+def _key(value):
+    """Group keys come back as NaN for NULL; the dict views use None like the row-based code."""
+    return None if value is None or (isinstance(value, float) and np.isnan(value)) else value
+
+
+def to_frame(rows) -> pd.DataFrame:
+    """Build the typed analytics frame from evaluation records or EvaluationRow tuples."""
+    if isinstance(rows, pd.DataFrame):
+        if "grade_key" in rows:
+            return rows    # already typed
+        frame = rows.reset_index(drop=True)
+    else:
+        frame = pd.DataFrame.from_records(list(rows), columns=list(FRAME_COLUMNS))
+    if "score_value" not in frame:
+        score = frame["score"].astype("string").str.strip()
+        score_value = pd.to_numeric(score, errors="coerce").astype("float64")
+        # "inf" parses; treat it as unparseable like parse_row_score() ("nan" already is)
+        frame["score_value"] = score_value.where(np.isfinite(score_value))
+    created_at = frame["created_at"].astype("string").fillna("")
+    separator = created_at.str.find("T")
+    if ((separator == 10) | (separator == -1)).all():
+        # ISO timestamps: a fixed-width slice instead of a per-row split
+        date = created_at.str.slice(0, 10).where(separator == 10, created_at)
+    else:
+        date = created_at.str.split("T").str[0]
+    frame["date"] = date.where(created_at != "")
+    grade = frame["grade"].astype("string")
+    # grade_distribution ignores anything but A-F; performance_by_grade maps NULL to "N/A"
+    frame["grade_key"] = grade.str.strip().str.upper().fillna("N/A")
+    for column in ("student_name", "topic"):
+        frame[column] = frame[column].astype("category")
+    return frame
+
+
+class FrameAnalytics:
+    """The AnalyticsSnapshot views, computed with vectorized groupbys."""
+
+    def __init__(self, frame: pd.DataFrame):
+        frame = to_frame(frame)
+        self.frame = frame
+        self.total = len(frame)
+        score = frame["score_value"]
+        valid = score.notna()
+        self.scores = np.sort(score[valid].to_numpy())
+        self.score_sum = float(self.scores.sum())
+        self.unique_students = frame["student_name"].nunique(dropna=False)
+        self.unique_topics = frame["topic"].nunique(dropna=False)
+
+        grades = frame.loc[frame["grade_key"].isin(GRADES), "grade_key"].value_counts()
+        self.grade_counts = {g: int(grades.get(g, 0)) for g in GRADES}
+        buckets = pd.cut(self.scores, [-np.inf, 2, 4, 6, 8, np.inf], right=False, labels=SCORE_RANGES)
+        self.score_ranges = {r: int(n) for r, n in pd.Series(buckets).value_counts().reindex(SCORE_RANGES, fill_value=0).items()}
+
+        position = pd.Series(np.arange(self.total), index=frame.index)
+        work = pd.DataFrame({
+            "score": score,
+            "score_or_zero": score.fillna(0.0),
+            "valid": valid.astype("int64"),
+            "position": position,
+        })
+        self.topics = self._groups(work, frame["topic"], n=("score", "size"),
+                                   sum_or_zero=("score_or_zero", "sum"))
+        self.students = self._groups(work, frame["student_name"], n=("score", "size"),
+                                     best=("score_or_zero", "max"))
+        self.by_grade = self._groups(work, frame["grade_key"], n=("score", "size"),
+                                     score_sum=("score", "sum"), valid=("valid", "sum"))
+        dated = frame["date"].notna()
+        self.dates = (work[dated].groupby(frame.loc[dated, "date"], sort=True)
+                      .agg(n=("score", "size"), score_sum=("score", "sum"), valid=("valid", "sum")))
+        self._topic_scores = None
+
+    @staticmethod
+    def _groups(work, keys, **aggregations):
+        """Aggregate per key, ordered by each group's newest row (newest first)."""
+        grouped = work.groupby(keys, dropna=False, sort=False, observed=True)
+        result = grouped.agg(last=("position", "max"), **aggregations)
+        return result.sort_values("last", ascending=False)
+
+    @staticmethod
+    def _items(groups, *columns):
+        """(key, column values...) per group, with NULL keys as None."""
+        return zip(map(_key, groups.index), *(groups[c].tolist() for c in columns))
+
+    # ----- views (same shapes as AnalyticsSnapshot) -----
+    def average_score(self):
+        return _avg(self.score_sum, len(self.scores))
+
+    def summary(self):
+        return {
+            "total": self.total,
+            "avg_score": self.average_score(),
+            "unique_students": self.unique_students,
+            "unique_topics": self.unique_topics,
+        }
+
+    def grade_distribution(self):
+        return dict(self.grade_counts)
+
+    def topic_performance(self):
+        return {topic: _avg(total, n) for topic, n, total in self._items(self.topics, "n", "sum_or_zero")}
+
+    def student_performance(self):
+        best = dict(self._items(self.students, "best"))
+        return dict(sorted(best.items(), key=lambda x: x[1], reverse=True))
+
+    def top_students(self, limit=10):
+        return top_k_items(dict(self._items(self.students, "best")), limit)
+
+    def evaluations_by_topic(self):
+        counts = dict(self._items(self.topics, "n"))
+        return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
+
+    def evaluations_over_time(self):
+        return dict(self._items(self.dates, "n"))
+
+    def score_distribution(self):
+        return dict(self.score_ranges)
+
+    def topic_evaluation_count(self):
+        if self._topic_scores is None:
+            # Valid scores per topic, newest first
+            scored = self.frame.loc[self.frame["score_value"].notna(), ["topic", "score_value"]].iloc[::-1]
+            lists = scored["score_value"].groupby(scored["topic"], dropna=False, sort=False, observed=True).agg(list)
+            self._topic_scores = dict(self._items(lists.to_frame("scores"), "scores"))
+        result = {}
+        for topic, n in self._items(self.topics, "n"):
+            scores = list(self._topic_scores.get(topic, []))
+            result[topic] = {"count": n, "scores": scores, "avg_score": _avg(sum(scores), len(scores))}
+        return result
+
+    def student_evaluation_count(self):
+        counts = dict(self._items(self.students, "n"))
+        return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
+
+    def weak_students(self, threshold=5):
+        weak = {k: v for k, v in self.student_performance().items() if v < threshold}
+        return dict(sorted(weak.items(), key=lambda x: x[1]))
+
+    def strong_students(self, threshold=7):
+        strong = {k: v for k, v in self.student_performance().items() if v >= threshold}
+        return dict(sorted(strong.items(), key=lambda x: x[1], reverse=True))
+
+    def class_stats(self):
+        if not self.total or not len(self.scores):
+            return None
+        scores = self.scores
+        n = len(scores)
+        mean = self.score_sum / n
+        return {
+            "min_score": float(scores[0]),
+            "max_score": float(scores[-1]),
+            "mean": round(mean, 2),
+            "median": float(scores[n // 2]) if n % 2 == 1 else round(float(scores[n // 2 - 1] + scores[n // 2]) / 2, 2),
+            # numpy's two-pass population std, not sum-of-squares minus mean squared (cancellation)
+            "std_dev": round(float(scores.std()), 2),
+            "total_scores": n,
+        }
+
+    def performance_by_grade(self):
+        return {grade: {"count": n, "avg_score": _avg(total, valid)}
+                for grade, n, total, valid in self._items(self.by_grade, "n", "score_sum", "valid")}
+
+    def topic_difficulty(self):
+        return dict(sorted(self.topic_performance().items(), key=lambda x: x[1]))
+
+    def score_percentiles(self):
+        """Class-wide count, mean, std_dev, min, max and p10..p90."""
+        scores = self.scores
+        if not len(scores):
+            return {"count": 0}
+        return summarize(len(scores), float(scores.mean()), float(scores.std()), float(scores[0]), float(scores[-1]),
+                         np.percentile(scores, PERCENTILES).tolist())
+
+    def _stats_by(self, column, order):
+        """Per-group score summaries for the rows with a valid score, in the given key order."""
+        scored = self.frame[self.frame["score_value"].notna()]
+        grouped = scored["score_value"].groupby(scored[column], dropna=False, sort=False, observed=True)
+        table = grouped.agg(["count", "mean", "min", "max"])
+        table["std"] = grouped.std(ddof=0)
+        quantiles = grouped.quantile([p / 100 for p in PERCENTILES]).unstack()
+        columns = [table[c].tolist() for c in ("count", "mean", "std", "min", "max")] + [quantiles.loc[table.index].values.tolist()]
+        by_key = {_key(key): summarize(*values) for key, *values in zip(table.index, *columns)}
+        return {key: by_key[key] for key in order if key in by_key}
+
+    def score_stats_by_topic(self):
+        return self._stats_by("topic", [_key(k) for k in self.topics.index])
+
+    def score_stats_by_student(self):
+        return self._stats_by("student_name", [_key(k) for k in self.students.index])
+
+    def score_stats_by_date(self):
+        return self._stats_by("date", self.dates.index.tolist())
+
+    def evaluation_stats_by_date(self):
+        return {date: {"count": n, "avg_score": _avg(total, valid)}
+                for date, n, total, valid in self._items(self.dates, "n", "score_sum", "valid")}
@@ -0,0 +1,463 @@
+"""
+Durable local job queue for PDF evaluations.
+
+Jobs live in a SQLite file, so queued and in-flight work survives browser
+disconnects and app restarts. A pool of worker processes claims jobs with a
+lease; a job whose lease expires (its worker crashed or was killed) is put back
+in the queue and picked up again.
+
+Run a worker pool on its own:
+    python -m backend.job_queue --workers 4
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import socket
+import argparse
+import threading
+import subprocess
+import multiprocessing
+
+# ===============================
+# Configuration
+# ===============================
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+QUEUE_DB_PATH = os.getenv("EVAL_QUEUE_DB", os.path.join(project_root, "backend", "data", "eval_jobs.db"))
+QUEUE_WORKERS = int(os.getenv("EVAL_QUEUE_WORKERS", "2"))
+QUEUE_MAX_ATTEMPTS = int(os.getenv("EVAL_QUEUE_MAX_ATTEMPTS", "3"))
+# A running job must heartbeat within this many seconds or it is considered abandoned
+QUEUE_LEASE_SECONDS = int(os.getenv("EVAL_QUEUE_LEASE_SECONDS", "120"))
+QUEUE_RETRY_BACKOFF_SECONDS = float(os.getenv("EVAL_QUEUE_RETRY_BACKOFF_SECONDS", "10"))
+QUEUE_POLL_SECONDS = float(os.getenv("EVAL_QUEUE_POLL_SECONDS", "1.0"))
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL DEFAULT 'evaluate_pdf',
+    status TEXT NOT NULL DEFAULT 'queued',
+    question TEXT NOT NULL,
+    rubric TEXT,
+    student_name TEXT,
+    student_roll TEXT,
+    save_to_db INTEGER NOT NULL DEFAULT 1,
+    pdf BLOB NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    progress_message TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    result TEXT,
+    error TEXT,
+    worker_id TEXT,
+    lease_expires_at REAL,
+    available_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, available_at, id);
+CREATE TABLE IF NOT EXISTS worker_heartbeats (
+    worker_id TEXT PRIMARY KEY,
+    pid INTEGER,
+    last_seen REAL NOT NULL
+);
+"""
+
+# Columns returned by get_job()/list_jobs(); the PDF blob is never sent back to the UI.
+# Finished and failed jobs drop their PDF (set to an empty blob; the column is NOT NULL).
+_JOB_COLUMNS = (
+    "id, kind, status, question, student_name, student_roll, progress, progress_message, "
+    "attempts, max_attempts, result, error, created_at, updated_at, started_at, finished_at"
+)
+
+
+# ===============================
+# Connection Helpers
+# ===============================
+def _connect(db_path=None):
+    db_path = db_path or QUEUE_DB_PATH
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    # WAL lets the UI read job status while workers write
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+def init_queue(db_path=None):
+    """Create the queue tables if they don't exist yet."""
+    conn = _connect(db_path)
+    try:
+        conn.executescript(_SCHEMA)
+    finally:
+        conn.close()
+
+
+def _row_to_job(row):
+    job = dict(row)
+    if job.get("result"):
+        try:
+            job["result"] = json.loads(job["result"])
+        except ValueError:
+            pass
+    return job
+
+
+# ===============================
+# Producer API
+# ===============================
+def enqueue_evaluation(question: str, student_pdf_bytes: bytes, rubric: str, student_name: str = None,
+                       student_roll: str = None, save_to_db: bool = True, max_attempts: int = None, db_path=None):
+    """Queue an evaluate_pdf job and return its id."""
+    init_queue(db_path)
+    now = time.time()
+    conn = _connect(db_path)
+    try:
+        cur = conn.execute(
+            "INSERT INTO jobs (question, rubric, student_name, student_roll, save_to_db, pdf, max_attempts, "
+            "progress_message, available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (question, rubric, student_name, student_roll, 1 if save_to_db else 0, sqlite3.Binary(student_pdf_bytes),
+             max_attempts or QUEUE_MAX_ATTEMPTS, "Waiting for a worker", now, now, now)
+        )
+        job_id = cur.lastrowid
+    finally:
+        conn.close()
+    print(f"[JOB_QUEUE] Enqueued job {job_id} for student: {student_name} | Topic: '{question}'")
+    return job_id
+
+
+def get_job(job_id: int, db_path=None):
+    """Return a job's status, progress and (when finished) result, or None."""
+    init_queue(db_path)
+    conn = _connect(db_path)
+    try:
+        row = conn.execute(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    return _row_to_job(row) if row else None
+
+
+def list_jobs(job_ids=None, status=None, limit=50, db_path=None):
+    """List jobs, newest first, optionally filtered by id list or status."""
+    init_queue(db_path)
+    clauses, params = [], []
+    if job_ids:
+        clauses.append(f"id IN ({','.join('?' for _ in job_ids)})")
+        params.extend(job_ids)
+    if status:
+        clauses.append("status = ?")
+        params.append(status)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute(f"SELECT {_JOB_COLUMNS} FROM jobs {where} ORDER BY id DESC LIMIT ?", (*params, limit)).fetchall()
+    finally:
+        conn.close()
+    return [_row_to_job(r) for r in rows]
+
+
+def get_queue_stats(db_path=None):
+    """Count jobs per status."""
+    init_queue(db_path)
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+    finally:
+        conn.close()
+    stats = {STATUS_QUEUED: 0, STATUS_RUNNING: 0, STATUS_DONE: 0, STATUS_FAILED: 0}
+    stats.update({r["status"]: r["n"] for r in rows})
+    return stats
+
+
+# ===============================
+# Worker-Side Queue Operations
+# ===============================
+def requeue_expired_jobs(conn):
+    """Put running jobs whose lease expired back in the queue (resume after crash)."""
+    now = time.time()
+    cur = conn.execute(
+        "UPDATE jobs SET status = ?, worker_id = NULL, lease_expires_at = NULL, available_at = ?, updated_at = ?, "
+        "progress = 0, progress_message = 'Requeued after worker stopped responding' "
+        "WHERE status = ? AND lease_expires_at < ? AND attempts < max_attempts",
+        (STATUS_QUEUED, now, now, STATUS_RUNNING, now)
+    )
+    failed = conn.execute(
+        "UPDATE jobs SET status = ?, worker_id = NULL, lease_expires_at = NULL, finished_at = ?, updated_at = ?, "
+        "pdf = zeroblob(0), error = COALESCE(error, 'Worker stopped responding on the last attempt') "
+        "WHERE status = ? AND lease_expires_at < ? AND attempts >= max_attempts",
+        (STATUS_FAILED, now, now, STATUS_RUNNING, now)
+    )
+    if cur.rowcount or failed.rowcount:
+        print(f"[JOB_QUEUE] Recovered abandoned jobs: {cur.rowcount} requeued, {failed.rowcount} failed")
+
+
+def claim_next_job(conn, worker_id: str):
+    """Atomically claim the oldest available job. Returns the full job row or None."""
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        requeue_expired_jobs(conn)
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE status = ? AND available_at <= ? ORDER BY id LIMIT 1",
+            (STATUS_QUEUED, now)
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = ?, worker_id = ?, attempts = attempts + 1, lease_expires_at = ?, "
+            "started_at = ?, updated_at = ?, progress = 0.05, progress_message = 'Claimed by worker' WHERE id = ?",
+            (STATUS_RUNNING, worker_id, now + QUEUE_LEASE_SECONDS, now, now, row["id"])
+        )
+        job = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+        conn.execute("COMMIT")
+        return dict(job)
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def update_progress(conn, job_id: int, worker_id: str, progress: float, message: str = None):
+    """Record progress and extend the job's lease."""
+    now = time.time()
+    conn.execute(
+        "UPDATE jobs SET progress = ?, progress_message = COALESCE(?, progress_message), lease_expires_at = ?, "
+        "updated_at = ? WHERE id = ? AND worker_id = ? AND status = ?",
+        (progress, message, now + QUEUE_LEASE_SECONDS, now, job_id, worker_id, STATUS_RUNNING)
+    )
+
+
+def complete_job(conn, job_id: int, worker_id: str, result: dict):
+    now = time.time()
+    conn.execute(
+        "UPDATE jobs SET status = ?, result = ?, error = NULL, progress = 1, progress_message = 'Done', "
+        "pdf = zeroblob(0), lease_expires_at = NULL, finished_at = ?, updated_at = ? WHERE id = ? AND worker_id = ?",
+        (STATUS_DONE, json.dumps(result), now, now, job_id, worker_id)
+    )
+
+
+def fail_job(conn, job: dict, worker_id: str, error: str, result: dict = None):
+    """Schedule a retry with exponential backoff, or mark the job failed after its last attempt."""
+    now = time.time()
+    if job["attempts"] < job["max_attempts"]:
+        delay = QUEUE_RETRY_BACKOFF_SECONDS * (2 ** (job["attempts"] - 1))
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, worker_id = NULL, lease_expires_at = NULL, available_at = ?, "
+            "progress = 0, progress_message = ?, updated_at = ? WHERE id = ? AND worker_id = ?",
+            (STATUS_QUEUED, error, now + delay, f"Retrying in {delay:.0f}s (attempt {job['attempts']} failed)",
+             now, job["id"], worker_id)
+        )
+        print(f"[JOB_QUEUE] Job {job['id']} attempt {job['attempts']} failed, retrying in {delay:.0f}s: {error}")
+    else:
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, result = ?, progress = 1, progress_message = 'Failed', "
+            "pdf = zeroblob(0), lease_expires_at = NULL, finished_at = ?, updated_at = ? WHERE id = ? AND worker_id = ?",
+            (STATUS_FAILED, error, json.dumps(result) if result else None, now, now, job["id"], worker_id)
+        )
+        print(f"[JOB_QUEUE] Job {job['id']} failed after {job['attempts']} attempts: {error}")
+
+
+def _is_error_result(result) -> bool:
+    """evaluate_pdf reports failures as a score-0 dict instead of raising."""
+    if not isinstance(result, dict):
+        return True
+    feedback = str(result.get("feedback") or "")
+    return feedback.startswith("Evaluation error") or feedback.startswith("PDF Evaluation error")
+
+
+# ===============================
+# Worker Processes
+# ===============================
+def _heartbeat(db_path, worker_id, job_id, stop_event, state):
+    """Keep the lease alive while the (long) LLM call runs."""
+    conn = _connect(db_path)
+    try:
+        while not stop_event.wait(max(1.0, QUEUE_LEASE_SECONDS / 4)):
+            update_progress(conn, job_id, worker_id, state["progress"])
+            conn.execute("INSERT OR REPLACE INTO worker_heartbeats (worker_id, pid, last_seen) VALUES (?, ?, ?)",
+                         (worker_id, os.getpid(), time.time()))
+    finally:
+        conn.close()
+
+
+def run_job(conn, job: dict, worker_id: str, db_path=None):
+    """Run one claimed evaluate_pdf job to completion (or failure)."""
+    # Imported here so the queue can be used (enqueue/status) without loading the LLM stack
+    from backend.main import evaluate_pdf
+
+    state = {"progress": 0.05}
+
+    def report(progress, message=None):
+        state["progress"] = progress
+        update_progress(conn, job["id"], worker_id, progress, message)
+
+    stop_event = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(db_path, worker_id, job["id"], stop_event, state), daemon=True)
+    beat.start()
+    try:
+        result = evaluate_pdf(
+            job["question"], bytes(job["pdf"]), job["rubric"] or "",
+            student_name=job["student_name"], student_roll=job["student_roll"],
+            save_to_db=bool(job["save_to_db"]), progress_callback=report
+        )
+        if _is_error_result(result):
+            fail_job(conn, job, worker_id, str(result.get("feedback") if isinstance(result, dict) else result), result=result)
+        else:
+            complete_job(conn, job["id"], worker_id, result)
+            print(f"[JOB_QUEUE] Job {job['id']} done by {worker_id}")
+    except Exception as e:
+        fail_job(conn, job, worker_id, str(e))
+    finally:
+        stop_event.set()
+        beat.join(timeout=5)
+
+
+def worker_loop(worker_index: int = 0, db_path=None, stop_after_idle: float = None):
+    """Claim and run jobs forever (or until idle for ``stop_after_idle`` seconds)."""
+    db_path = db_path or QUEUE_DB_PATH
+    init_queue(db_path)
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{worker_index}"
+    conn = _connect(db_path)
+    idle_since = time.time()
+    print(f"[JOB_QUEUE] Worker {worker_id} started (db: {db_path})")
+    # Real heartbeats take over from the placeholder ensure_worker_pool() wrote for this pool
+    conn.execute("DELETE FROM worker_heartbeats WHERE worker_id = ?", (f"pool-{os.getppid()}",))
+    try:
+        while True:
+            conn.execute("INSERT OR REPLACE INTO worker_heartbeats (worker_id, pid, last_seen) VALUES (?, ?, ?)",
+                         (worker_id, os.getpid(), time.time()))
+            job = claim_next_job(conn, worker_id)
+            if job is None:
+                if stop_after_idle is not None and time.time() - idle_since >= stop_after_idle:
+                    return
+                time.sleep(QUEUE_POLL_SECONDS)
+                continue
+            print(f"[JOB_QUEUE] Worker {worker_id} claimed job {job['id']} (attempt {job['attempts']}/{job['max_attempts']})")
+            run_job(conn, job, worker_id, db_path)
+            idle_since = time.time()
+    finally:
+        conn.execute("DELETE FROM worker_heartbeats WHERE worker_id = ?", (worker_id,))
+        conn.close()
+
+
+def run_worker_pool(num_workers: int = None, db_path=None):
+    """Start ``num_workers`` worker processes and supervise them (blocking).
+
+    Workers that exit unexpectedly are restarted; their in-flight job is picked up
+    again once its lease expires.
+    """
+    num_workers = num_workers or QUEUE_WORKERS
+    db_path = db_path or QUEUE_DB_PATH
+    init_queue(db_path)
+    # spawn: never fork a process that may already hold torch / HTTP client state
+    ctx = multiprocessing.get_context("spawn")
+    processes = {}
+    print(f"[JOB_QUEUE] Starting worker pool with {num_workers} processes")
+    try:
+        while True:
+            for index in range(num_workers):
+                proc = processes.get(index)
+                if proc is None or not proc.is_alive():
+                    if proc is not None:
+                        print(f"[JOB_QUEUE] Worker {index} exited with code {proc.exitcode}, restarting")
+                    proc = ctx.Process(target=worker_loop, args=(index, db_path), daemon=True)
+                    proc.start()
+                    processes[index] = proc
+            time.sleep(5)
+    except KeyboardInterrupt:
+        print("[JOB_QUEUE] Stopping worker pool")
+    finally:
+        for proc in processes.values():
+            proc.terminate()
+        for proc in processes.values():
+            proc.join(timeout=10)
+
+
+def workers_alive(db_path=None, within_seconds: float = None) -> bool:
+    """True if any worker has sent a heartbeat recently."""
+    init_queue(db_path)
+    cutoff = time.time() - (within_seconds or QUEUE_LEASE_SECONDS)
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT COUNT(*) AS n FROM worker_heartbeats WHERE last_seen >= ?", (cutoff,)).fetchone()
+    finally:
+        conn.close()
+    return bool(row["n"])
+
+
+_pool_processes = {}    # pid -> Popen for pools started by this process
+
+
+def _pool_exited(pid: int) -> bool:
+    proc = _pool_processes.get(pid)
+    if proc is not None:
+        # Our own child: poll() also reaps it, so a dead pool is not mistaken for a live zombie
+        return proc.poll() is not None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass
+    return False
+
+
+def _clear_dead_pool_placeholders(db_path=None):
+    """Drop placeholder heartbeats of pools that exited before their workers started."""
+    init_queue(db_path)
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute("SELECT worker_id, pid FROM worker_heartbeats WHERE worker_id LIKE 'pool-%'").fetchall()
+        for row in rows:
+            if row["pid"] and _pool_exited(row["pid"]):
+                print(f"[JOB_QUEUE] Worker pool {row['pid']} exited before its workers started")
+                conn.execute("DELETE FROM worker_heartbeats WHERE worker_id = ?", (row["worker_id"],))
+                _pool_processes.pop(row["pid"], None)
+    finally:
+        conn.close()
+
+
+def ensure_worker_pool(num_workers: int = None, db_path=None):
+    """Start a detached worker pool if no worker is alive.
+
+    The pool runs as its own process group, so it keeps grading when the UI
+    process restarts. Returns the Popen handle, or None if workers were already running.
+    """
+    _clear_dead_pool_placeholders(db_path)
+    if workers_alive(db_path):
+        return None
+    cmd = [sys.executable, "-m", "backend.job_queue", "--workers", str(num_workers or QUEUE_WORKERS)]
+    if db_path:
+        cmd += ["--db", db_path]
+    print(f"[JOB_QUEUE] No live workers found, starting pool: {' '.join(cmd)}")
+    proc = subprocess.Popen(cmd, cwd=project_root, start_new_session=True)
+    _pool_processes[proc.pid] = proc
+    # Count the pool as alive right away so concurrent callers don't start a second one
+    conn = _connect(db_path)
+    try:
+        conn.execute("INSERT OR REPLACE INTO worker_heartbeats (worker_id, pid, last_seen) VALUES (?, ?, ?)",
+                     (f"pool-{proc.pid}", proc.pid, time.time()))
+    finally:
+        conn.close()
+    return proc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run evaluation queue workers.")
+    parser.add_argument("--workers", type=int, default=QUEUE_WORKERS, help="number of worker processes")
+    parser.add_argument("--db", default=QUEUE_DB_PATH, help="path to the SQLite queue file")
+    args = parser.parse_args()
+    run_worker_pool(args.workers, args.db)
+
+
+if __name__ == "__main__":
+    main()
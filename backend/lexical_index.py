@@ -0,0 +1,167 @@
+"""
+In-process BM25 index over guideline titles and solutions.
+
+Used as the lexical fallback when vector search is unavailable: instead of
+returning whichever guideline a ``select("*").limit(10)`` happens to list first,
+the fallback returns the guideline whose text best matches the topic's words.
+
+The index is built once from ``id,content,metadata`` (no embeddings) and then
+kept current by adding rows as they are inserted and by fetching rows with an
+``id`` above the highest one synced. Deleted guidelines are only dropped by
+``rebuild()``.
+"""
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter
+
+SYNC_PAGE_SIZE = 500
+_SYNC_COLUMNS = "id,content,metadata"
+
+_TOKEN_RE = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or that the this to was what when where which who why with".split()
+)
+
+
+def tokenize(text: str):
+    """Lowercase word tokens without stopwords or single characters."""
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def _metadata(row):
+    metadata = row.get("metadata")
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except ValueError:
+            return {}
+    return metadata if isinstance(metadata, dict) else {}
+
+
+class BM25Index:
+    """Okapi BM25 over guideline documents (title + solution).
+
+    If ``hash_fn(content, solution)`` is given, the index also maps each
+    guideline's content hash to its id for exact-duplicate checks.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, hash_fn=None):
+        self.k1 = k1
+        self.b = b
+        self.hash_fn = hash_fn
+        self._lock = threading.RLock()
+        self._postings = {}      # term -> {doc_index: term frequency}
+        self._doc_lengths = []
+        self._docs = []          # [{"id", "solution", "content_hash"}], aligned with _doc_lengths
+        self._positions = {}     # id -> doc_index
+        self._hashes = {}        # content hash -> id
+        self._total_length = 0
+        self.max_synced_id = None
+        self.last_sync = 0.0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _unindex(self, doc_index):
+        for term in [t for t, postings in self._postings.items() if doc_index in postings]:
+            del self._postings[term][doc_index]
+            if not self._postings[term]:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths[doc_index]
+        self._hashes.pop(self._docs[doc_index].get("content_hash"), None)
+
+    def add(self, row: dict, replace: bool = False) -> bool:
+        """Index one assignments row.
+
+        Returns False for rows without a solution and for already-indexed ids,
+        unless ``replace`` is set (used when a guideline is updated in place).
+        """
+        metadata = _metadata(row)
+        solution = metadata.get("solution")
+        if not solution:
+            return False
+        with self._lock:
+            doc_index = self._positions.get(row.get("id"))
+            if doc_index is not None:
+                if not replace:
+                    return False
+                self._unindex(doc_index)
+            else:
+                doc_index = len(self._docs)
+                self._docs.append(None)
+                self._doc_lengths.append(0)
+                self._positions[row.get("id")] = doc_index
+            # Title-like fields first; skip parts that repeat the solution (PDF guidelines store it twice)
+            parts = [row.get("content"), metadata.get("question"), solution]
+            text = " ".join(dict.fromkeys(p for p in parts if p))
+            terms = Counter(tokenize(text))
+            for term, freq in terms.items():
+                self._postings.setdefault(term, {})[doc_index] = freq
+            length = sum(terms.values())
+            self._doc_lengths[doc_index] = length
+            self._total_length += length
+            content_hash = metadata.get("content_hash")
+            if content_hash is None and self.hash_fn is not None:
+                content_hash = self.hash_fn(row.get("content"), solution)
+            self._docs[doc_index] = {"id": row.get("id"), "solution": solution, "content_hash": content_hash}
+            if content_hash is not None:
+                self._hashes[content_hash] = row.get("id")
+        return True
+
+    def find_hash(self, content_hash: str):
+        """Return the id of the guideline with this content hash, or None."""
+        with self._lock:
+            return self._hashes.get(content_hash)
+
+    def add_rows(self, rows, replace: bool = False) -> int:
+        return sum(1 for row in rows if self.add(row, replace=replace))
+
+    def sync(self, client, page_size: int = SYNC_PAGE_SIZE) -> int:
+        """Fetch rows with an id above the last synced one. Returns rows added."""
+        added = 0
+        with self._lock:
+            while True:
+                query = client.table("assignments").select(_SYNC_COLUMNS)
+                if self.max_synced_id is not None:
+                    query = query.gt("id", self.max_synced_id)
+                resp = query.order("id").limit(page_size).execute()
+                rows = getattr(resp, "data", None) or []
+                if not rows:
+                    break
+                added += self.add_rows(rows)
+                self.max_synced_id = rows[-1].get("id")
+                if len(rows) < page_size:
+                    break
+            self.last_sync = time.time()
+        if added:
+            print(f"[LEXICAL_INDEX] Indexed {added} guidelines ({len(self._docs)} total)")
+        return added
+
+    def rebuild(self, client) -> int:
+        with self._lock:
+            self._postings, self._doc_lengths, self._docs = {}, [], []
+            self._positions, self._hashes = {}, {}
+            self._total_length, self.max_synced_id = 0, None
+            return self.sync(client)
+
+    def search(self, query: str, k: int = 1):
+        """Return up to k dicts with ``id``, ``solution`` and ``score``, best first."""
+        with self._lock:
+            n = len(self._docs)
+            if not n:
+                return []
+            avg_length = self._total_length / n or 1.0
+            scores = Counter()
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_index, freq in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_index] / avg_length)
+                    scores[doc_index] += idf * freq * (self.k1 + 1) / (freq + norm)
+            return [{"id": self._docs[i]["id"], "solution": self._docs[i]["solution"], "score": score}
+                    for i, score in scores.most_common(k)]
@@ -1,20 +1,13 @@
 import os
+import json
+import threading
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field
-from typing import List, Dict
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
+from pydantic import BaseModel, Field, ValidationError, create_model
+from typing import List
 
 # Load environment variables from root .env file BEFORE processing
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 env_path = os.path.join(project_root, ".env")
-print(f"\n{'='*60}")
-print(f"[MAIN.PY INIT] Loading environment variables")
-print(f"{'='*60}")
-print(f"Project root: {project_root}")
-print(f"Env file path: {env_path}")
-print(f"Env file exists: {os.path.exists(env_path)}")
 
 # Load env file with override to ensure fresh load
 load_dotenv(env_path, override=True)
@@ -23,33 +16,48 @@ load_dotenv(env_path, override=True)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "mixtral-8x7b-32768")
 
-# Verify all environment variables are loaded
-print(f"\n[MAIN.PY INIT] Checking loaded environment variables:")
-for key in ["GROQ_API_KEY", "GROQ_MODEL", "SUPABASE_URL", "SUPABASE_KEY"]:
-    value = os.getenv(key)
-    if value:
-        if len(value) > 20:
-            print(f"  LOADED {key}: {value[:20]}...({len(value)} chars)")
-        else:
-            print(f"  LOADED {key}: {value}")
-    else:
-        print(f"  MISSING {key}")
+# Import your custom database and output utilities (both are cheap to import;
+# the DB client, embedding model and PDF/OCR stack are loaded on first use)
+from backend.database import retrieve_relevant_passages, save_evaluation_result
+from backend.database import store_guideline as _store_guideline
+from backend.database import store_guidelines_bulk as _store_guidelines_bulk
+from backend.output_repair import parse_json_with_repair, coerce_to_schema, record_repair_path
+from backend.scoring import reconcile_evaluation
 
-if not GROQ_API_KEY:
-    print(f"\n[WARNING] GROQ_API_KEY is not set!")
-    print(f"[WARNING] Checking if it exists in environment after explicit load:")
-    print(f"  Value: {os.getenv('GROQ_API_KEY')}")
-else:
-    print(f"\n[SUCCESS] GROQ_API_KEY successfully loaded: {GROQ_API_KEY[:20]}...")
+_llm_client = None
+_llm_lock = threading.Lock()
 
-print(f"{'='*60}\n")
 
-# Import your custom database and PDF utilities
-from backend.database import retrieve_relevant_guideline, save_evaluation_result
-from backend.database import store_guideline as _store_guideline
-from backend.pdf_utils import extract_text_from_pdf_bytes, extract_and_parse_pdf, _HAS_PYTESSERACT
+def _log_environment_diagnostics():
+    """Print the environment diagnostics that used to run at import time."""
+    print(f"\n{'='*60}")
+    print(f"[MAIN.PY INIT] Loading environment variables")
+    print(f"{'='*60}")
+    print(f"Project root: {project_root}")
+    print(f"Env file path: {env_path}")
+    print(f"Env file exists: {os.path.exists(env_path)}")
+
+    # Verify all environment variables are loaded
+    print(f"\n[MAIN.PY INIT] Checking loaded environment variables:")
+    for key in ["GROQ_API_KEY", "GROQ_MODEL", "SUPABASE_URL", "SUPABASE_KEY"]:
+        value = os.getenv(key)
+        if value:
+            if len(value) > 20:
+                print(f"  LOADED {key}: {value[:20]}...({len(value)} chars)")
+            else:
+                print(f"  LOADED {key}: {value}")
+        else:
+            print(f"  MISSING {key}")
+
+    if not GROQ_API_KEY:
+        print(f"\n[WARNING] GROQ_API_KEY is not set!")
+        print(f"[WARNING] Checking if it exists in environment after explicit load:")
+        print(f"  Value: {os.getenv('GROQ_API_KEY')}")
+    else:
+        print(f"\n[SUCCESS] GROQ_API_KEY successfully loaded: {GROQ_API_KEY[:20]}...")
+
+    print(f"{'='*60}\n")
 
-print(f"[MAIN.PY] OCR Enabled: {_HAS_PYTESSERACT}")
 
 # --- SCHEMA DEFINITIONS ---
 class RubricCriterion(BaseModel):
@@ -84,14 +92,173 @@ class EvaluationSchema(BaseModel):
     suggested_resources: List[SuggestedResource] = Field(description="Resources and next steps for improvement")
     metadata: EvaluationMetadata = Field(description="Complexity level, AI confidence, plagiarism check")
 
+class PackedEvaluation(EvaluationSchema):
+    student_index: int = Field(description="Index of the STUDENT ANSWER block this evaluation belongs to")
+
+class PackedEvaluationSchema(BaseModel):
+    evaluations: List[PackedEvaluation] = Field(description="One evaluation per student answer, in the same order as the answers")
+
+# --- PACKED MODE SETTINGS ---
+# Number of short answers graded together in one LLM call, and the longest answer
+# (in characters) that is still considered "short" enough to be packed.
+EVAL_PACK_SIZE = int(os.getenv("EVAL_PACK_SIZE", "5"))
+EVAL_PACK_MAX_ANSWER_CHARS = int(os.getenv("EVAL_PACK_MAX_ANSWER_CHARS", "1500"))
+
+NO_GUIDELINE_TEXT = "No specific guideline found. Evaluate based on general academic standards and expert knowledge of the topic."
+
+GRADING_INSTRUCTIONS = """
+        1. Compare the student answer against the reference guideline.
+        2. Strictly follow the provided rubric criteria for scoring.
+        3. Provide a score from 0 to 10 (as a string).
+        4. Assign a letter grade (A, B, C, D, or F).
+        5. If the student's answer is completely off-topic or addresses the wrong question, provide a diagnostic note in 'topic_diagnostic' and give a low score.
+        6. Identify specific missing concepts or inaccuracies.
+        7. Provide 'bridge guidance' that explains exactly how the student can transition from their current answer to the ideal answer.
+        8. Suggest actionable resources or next steps for improvement.
+        9. Ensure the response is in valid JSON format matching the schema."""
+
+
+def _build_llm():
+    """Return the Groq chat model used for grading, creating it on first use."""
+    global _llm_client
+    if _llm_client is None:
+        with _llm_lock:
+            if _llm_client is None:
+                _log_environment_diagnostics()
+                from langchain_groq import ChatGroq
+                _llm_client = ChatGroq(
+                    groq_api_key=GROQ_API_KEY,
+                    model_name=GROQ_MODEL,
+                    temperature=0.1
+                )
+    return _llm_client
+
+
+def _error_result(feedback_prefix, error_msg, guidance_prefix="An error occurred during evaluation"):
+    """Build the score-0 result dict returned when an evaluation cannot be completed."""
+    return {
+        "score": "0",
+        "grade": "F",
+        "feedback": f"{feedback_prefix}: {error_msg}",
+        "topic_diagnostic": "",
+        "rubric_breakdown": [],
+        "missing_concepts": [],
+        "bridge_guidance": f"{guidance_prefix}: {error_msg}",
+        "suggested_resources": [],
+        "metadata": {
+            "complexity_level": "Unknown",
+            "ai_confidence": "0",
+            "plagiarism_similarity": "0"
+        }
+    }
+
+
+# --- OUTPUT PARSING & REPAIR ---
+def _complete_missing_fields(missing_fields, partial_result, question, rubric, student_answer):
+    """Ask the model for only the evaluation fields that could not be recovered locally."""
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+    field_defs = {
+        name: (EvaluationSchema.model_fields[name].annotation, EvaluationSchema.model_fields[name])
+        for name in missing_fields
+        if name in EvaluationSchema.model_fields
+    }
+    MissingFieldsSchema = create_model("MissingEvaluationFields", **field_defs)
+    parser = JsonOutputParser(pydantic_object=MissingFieldsSchema)
+
+    template = """
+        You are an expert academic evaluator completing a partially written evaluation of a student's answer.
+
+        QUESTION/TOPIC: {question}
+
+        RUBRIC CRITERIA:
+        {rubric}
+
+        STUDENT ANSWER:
+        {student_answer}
+
+        PARTIAL EVALUATION (already final, keep it consistent with these values):
+        {partial_evaluation}
+
+        Return ONLY these missing fields as a JSON object: {missing_fields}
+
+        {format_instructions}
+        """
+    prompt = ChatPromptTemplate.from_template(template)
+    chain = prompt | _build_llm() | StrOutputParser()
+
+    print(f"[PROCESS_EVAL] Requesting missing fields only: {', '.join(field_defs)}")
+    raw_output = chain.invoke({
+        "question": question,
+        "rubric": rubric,
+        "student_answer": student_answer,
+        "partial_evaluation": json.dumps(partial_result, indent=2),
+        "missing_fields": ", ".join(field_defs),
+        "format_instructions": parser.get_format_instructions()
+    })
+    completion, _ = parse_json_with_repair(raw_output)
+    if not isinstance(completion, dict):
+        raise ValueError("Missing-field completion did not return a JSON object")
+    return {k: v for k, v in completion.items() if k in field_defs}
+
+
+def _parse_evaluation_output(raw_output, question, rubric, student_answer):
+    """Turn raw LLM text into an EvaluationSchema dict without re-running the full evaluation.
+
+    Tries, in order: direct parsing, local repair (JSON text fixes plus type
+    coercion), and a short follow-up call asking only for the missing fields.
+    """
+    try:
+        data, repaired = parse_json_with_repair(raw_output)
+    except ValueError as e:
+        record_repair_path("failed")
+        raise ValueError(f"LLM output is not repairable JSON: {e}")
+    if isinstance(data, list) and len(data) == 1 and isinstance(data[0], dict):
+        # One evaluation wrapped in [ ]
+        data, repaired = data[0], True
+    if not isinstance(data, dict):
+        record_repair_path("failed")
+        raise ValueError(f"LLM output is not a JSON object (got {type(data).__name__})")
+
+    if not repaired:
+        try:
+            result = EvaluationSchema.model_validate(data).model_dump()
+            record_repair_path("direct")
+            return result
+        except ValidationError:
+            pass
+
+    result, missing = coerce_to_schema(data, EvaluationSchema)
+    if not missing:
+        record_repair_path("local_repair")
+        return result
+
+    try:
+        result.update(_complete_missing_fields(missing, result, question, rubric, student_answer))
+        result, still_missing = coerce_to_schema(result, EvaluationSchema)
+    except Exception as e:
+        record_repair_path("failed")
+        raise ValueError(f"Could not complete missing fields {missing}: {e}")
+    if still_missing:
+        record_repair_path("failed")
+        raise ValueError(f"Evaluation is missing required fields: {', '.join(still_missing)}")
+    record_repair_path("field_completion")
+    return result
+
+
 # --- CORE LOGIC FUNCTIONS ---
-def process_assignment_evaluation(question, student_answer, rubric, student_name=None, student_roll=None, save_to_db=True):
+def process_assignment_evaluation(question, student_answer, rubric, student_name=None, student_roll=None, save_to_db=True, reference_guideline=None):
     """
     Core evaluation function - orchestrates LLM grading with detailed feedback
     """
     try:
-        # 1. Retrieve the reference guideline from Database
-        reference_guideline = retrieve_relevant_guideline(question)
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+
+        # 1. Retrieve the reference guideline from Database (unless the caller already resolved it);
+        #    long answer keys are trimmed to the passages closest to this student's answer
+        if reference_guideline is None:
+            reference_guideline = retrieve_relevant_passages(question, student_answer)
         print(f"[PROCESS_EVAL] Guideline found for '{question}': {reference_guideline is not None}")
 
         # 2. System Instructions for Grading
@@ -109,16 +276,7 @@ def process_assignment_evaluation(question, student_answer, rubric, student_name
         STUDENT ANSWER TO EVALUATE:
         {student_answer}
 
-        Instructions:
-        1. Compare the student answer against the reference guideline.
-        2. Strictly follow the provided rubric criteria for scoring.
-        3. Provide a score from 0 to 10 (as a string).
-        4. Assign a letter grade (A, B, C, D, or F).
-        5. If the student's answer is completely off-topic or addresses the wrong question, provide a diagnostic note in 'topic_diagnostic' and give a low score.
-        6. Identify specific missing concepts or inaccuracies.
-        7. Provide 'bridge guidance' that explains exactly how the student can transition from their current answer to the ideal answer.
-        8. Suggest actionable resources or next steps for improvement.
-        9. Ensure the response is in valid JSON format matching the schema.
+        Instructions:{grading_instructions}
 
         {format_instructions}
         """
@@ -126,25 +284,23 @@ def process_assignment_evaluation(question, student_answer, rubric, student_name
         # 3. Setup LLM and Parser
         parser = JsonOutputParser(pydantic_object=EvaluationSchema)
         prompt = ChatPromptTemplate.from_template(template)
-        
-        # Use the configured model
-        llm = ChatGroq(
-            groq_api_key=GROQ_API_KEY,
-            model_name=GROQ_MODEL,
-            temperature=0.1
-        )
+        llm = _build_llm()
 
-        # 4. Create and run Chain
-        chain = prompt | llm | parser
+        # 4. Create and run Chain (raw text, so malformed JSON can be repaired locally)
+        chain = prompt | llm | StrOutputParser()
         
         print(f"[PROCESS_EVAL] Invoking Groq LLM ({GROQ_MODEL}) for student: {student_name}")
-        result_dict = chain.invoke({
+        raw_output = chain.invoke({
             "question": question,
-            "reference_guideline": reference_guideline or "No specific guideline found. Evaluate based on general academic standards and expert knowledge of the topic.",
+            "reference_guideline": reference_guideline or NO_GUIDELINE_TEXT,
             "rubric": rubric,
             "student_answer": student_answer,
+            "grading_instructions": GRADING_INSTRUCTIONS,
             "format_instructions": parser.get_format_instructions()
         })
+        result_dict = _parse_evaluation_output(raw_output, question, rubric, student_answer)
+        # Overall score/grade are derived from the rubric breakdown locally
+        result_dict = reconcile_evaluation(result_dict)
 
         if save_to_db and student_name:
             save_evaluation_result(question, student_name, result_dict, student_roll=student_roll, student_answer=student_answer)
@@ -155,55 +311,186 @@ def process_assignment_evaluation(question, student_answer, rubric, student_name
         print(f"[EVAL_ERROR] {error_msg}")
         import traceback
         traceback.print_exc()
-        return {
-            "score": "0",
-            "grade": "F",
-            "feedback": f"Evaluation error: {error_msg}",
-            "topic_diagnostic": "",
-            "rubric_breakdown": [],
-            "missing_concepts": [],
-            "bridge_guidance": f"An error occurred during evaluation: {error_msg}",
-            "suggested_resources": [],
-            "metadata": {
-                "complexity_level": "Unknown",
-                "ai_confidence": "0",
-                "plagiarism_similarity": "0"
-            }
-        }
+        return _error_result("Evaluation error", error_msg)
+
 
+def _invoke_packed_chain(question, reference_guideline, rubric, submissions):
+    """Grade several submissions in one LLM call.
+
+    Returns a dict mapping the submission's position in ``submissions`` to a
+    validated evaluation dict. Positions whose output is missing or fails schema
+    validation are left out so the caller can grade them individually; if the
+    returned student_index values are not exactly 0..n-1, nothing is returned.
+    """
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+    template = """
+        You are an expert academic evaluator. Your task is to evaluate SEVERAL students' answers to the same question, using one set of rubric criteria and one reference guideline. Grade every answer independently; never let one student's answer influence another student's score.
+
+        QUESTION/TOPIC: {question}
+
+        REFERENCE GUIDELINE (Use this as the standard for accuracy):
+        {reference_guideline}
+
+        RUBRIC CRITERIA:
+        {rubric}
+
+        STUDENT ANSWERS TO EVALUATE ({answer_count} in total):
+        {student_answers}
+
+        Instructions (apply to each answer separately):{grading_instructions}
+        10. Return exactly one entry in 'evaluations' per STUDENT ANSWER block, with 'student_index' set to that block's number.
+
+        {format_instructions}
+        """
+
+    parser = JsonOutputParser(pydantic_object=PackedEvaluationSchema)
+    prompt = ChatPromptTemplate.from_template(template)
+    chain = prompt | _build_llm() | StrOutputParser()
+
+    answer_blocks = "\n\n".join(
+        f"--- STUDENT ANSWER [{index}] ---\n{submission.get('student_answer', '')}"
+        for index, submission in enumerate(submissions)
+    )
+
+    print(f"[PACKED_EVAL] Invoking Groq LLM ({GROQ_MODEL}) for {len(submissions)} packed answers")
+    raw_output = chain.invoke({
+        "question": question,
+        "reference_guideline": reference_guideline or NO_GUIDELINE_TEXT,
+        "rubric": rubric,
+        "answer_count": len(submissions),
+        "student_answers": answer_blocks,
+        "grading_instructions": GRADING_INSTRUCTIONS,
+        "format_instructions": parser.get_format_instructions()
+    })
+
+    packed, repaired = parse_json_with_repair(raw_output)
+    items = packed.get("evaluations", []) if isinstance(packed, dict) else packed
+    if not isinstance(items, list):
+        return {}
+
+    # Results are mapped back to students by student_index, so it must be exactly
+    # 0..n-1; a 1-based or shifted numbering would hand one student's grade to another
+    indexes = []
+    for item in items:
+        try:
+            indexes.append(int(item.get("student_index")) if isinstance(item, dict) else None)
+        except (ValueError, TypeError):
+            indexes.append(None)
+    if None in indexes or sorted(indexes) != list(range(len(submissions))):
+        print(f"[PACKED_EVAL] student_index values {indexes} are not 0..{len(submissions) - 1}; grading individually")
+        return {}
+
+    validated = {}
+    for index, item in zip(indexes, items):
+        # Local repair only; items that still miss fields are graded individually
+        try:
+            evaluation, missing = coerce_to_schema(item, EvaluationSchema)
+        except ValueError as e:
+            missing = [str(e)]
+        if missing:
+            print(f"[PACKED_EVAL] Answer [{index}] failed schema validation: {', '.join(missing)}")
+            continue
+        record_repair_path("local_repair" if repaired else "direct")
+        validated[index] = reconcile_evaluation(evaluation)
+    return validated
+
+
+def process_packed_evaluation(question, submissions, rubric, save_to_db=True, pack_size=None):
+    """
+    Packed evaluation for short-answer quizzes - grades several submissions to the
+    same question in one LLM call so the guideline/rubric/format prefix is sent once.
+
+    ``submissions`` is a list of dicts with ``student_answer`` and optionally
+    ``student_name`` and ``student_roll``. Returns a list of evaluation dicts in the
+    same order. Any answer that is too long to pack, or whose packed result is
+    missing or invalid, is graded with an individual call instead.
+    """
+    pack_size = max(1, pack_size or EVAL_PACK_SIZE)
+    results = [None] * len(submissions)
+
+    packable, fallback = [], []
+    for index, submission in enumerate(submissions):
+        if len(submission.get("student_answer") or "") <= EVAL_PACK_MAX_ANSWER_CHARS:
+            packable.append(index)
+        else:
+            fallback.append(index)
+
+    for start in range(0, len(packable), pack_size):
+        pack = packable[start:start + pack_size]
+        if len(pack) == 1:
+            fallback.extend(pack)
+            continue
+        try:
+            # Same retrieval as the single path: long guidelines are trimmed to the
+            # passages closest to this pack's answers
+            answers = "\n\n".join(submissions[i].get("student_answer") or "" for i in pack)
+            reference_guideline = retrieve_relevant_passages(question, answers)
+            print(f"[PACKED_EVAL] Guideline found for '{question}': {reference_guideline is not None}")
+            validated = _invoke_packed_chain(question, reference_guideline, rubric, [submissions[i] for i in pack])
+        except Exception as e:
+            print(f"[PACKED_EVAL_ERROR] Packed call failed, grading {len(pack)} answers individually: {e}")
+            validated = {}
+
+        for position, submission_index in enumerate(pack):
+            evaluation = validated.get(position)
+            if evaluation is None:
+                fallback.append(submission_index)
+                continue
+            submission = submissions[submission_index]
+            if save_to_db and submission.get("student_name"):
+                save_evaluation_result(question, submission["student_name"], evaluation, student_roll=submission.get("student_roll"), student_answer=submission.get("student_answer"))
+            results[submission_index] = evaluation
+
+    if fallback:
+        print(f"[PACKED_EVAL] Falling back to individual calls for {len(fallback)} answers")
+    for submission_index in sorted(fallback):
+        submission = submissions[submission_index]
+        results[submission_index] = process_assignment_evaluation(
+            question,
+            submission.get("student_answer", ""),
+            rubric,
+            student_name=submission.get("student_name"),
+            student_roll=submission.get("student_roll"),
+            save_to_db=save_to_db
+        )
+
+    return results
+
+
+def evaluate_pdf(question: str, student_pdf_bytes: bytes, rubric: str, student_name: str = None, student_roll: str = None, save_to_db: bool = True, progress_callback=None):
+    """Extract student answer text from PDF bytes and run evaluation pipeline.
+
+    ``progress_callback(fraction, message)`` is called between stages when given
+    (used by the background job queue to report progress).
+    """
+    def report(fraction, message):
+        if progress_callback:
+            progress_callback(fraction, message)
 
-def evaluate_pdf(question: str, student_pdf_bytes: bytes, rubric: str, student_name: str = None, student_roll: str = None, save_to_db: bool = True):
-    """Extract student answer text from PDF bytes and run evaluation pipeline."""
     try:
+        from backend.pdf_utils import extract_text_from_pdf_bytes, _HAS_PYTESSERACT
+        print(f"[EVALUATE_PDF] OCR Enabled: {_HAS_PYTESSERACT}")
+        report(0.1, "Extracting text from PDF")
         student_text = extract_text_from_pdf_bytes(student_pdf_bytes)
         print(f"[EVALUATE_PDF] Extracted {len(student_text)} characters from PDF.")
         if not student_text:
             raise RuntimeError("Failed to extract student text from PDF or PDF is empty. For handwritten assignments, ensure the PDF is clear and Tesseract OCR is configured correctly.")
-        return process_assignment_evaluation(question, student_text, rubric, student_name=student_name, student_roll=student_roll, save_to_db=save_to_db)
+        report(0.3, "Grading with LLM")
+        result = process_assignment_evaluation(question, student_text, rubric, student_name=student_name, student_roll=student_roll, save_to_db=save_to_db)
+        report(0.95, "Evaluation finished")
+        return result
     except Exception as e:
         error_msg = str(e)
         print(f"[EVALUATE_PDF_ERROR] {error_msg}")
         import traceback
         traceback.print_exc()
-        return {
-            "score": "0",
-            "grade": "F",
-            "feedback": f"PDF Evaluation error: {error_msg}",
-            "topic_diagnostic": "",
-            "rubric_breakdown": [],
-            "missing_concepts": [],
-            "bridge_guidance": f"An error occurred: {error_msg}",
-            "suggested_resources": [],
-            "metadata": {
-                "complexity_level": "Unknown",
-                "ai_confidence": "0",
-                "plagiarism_similarity": "0"
-            }
-        }
+        return _error_result("PDF Evaluation error", error_msg, guidance_prefix="An error occurred")
 
 
 def store_guideline_from_pdf(pdf_bytes: bytes):
     """Extract text from guideline PDF using backend parser and store it."""
+    from backend.pdf_utils import extract_and_parse_pdf
     parsed = extract_and_parse_pdf(pdf_bytes)
     title = parsed.get("title") or "Uploaded Guideline"
     solution = parsed.get("solution") or parsed.get("full_text") or ""
@@ -212,3 +499,16 @@ def store_guideline_from_pdf(pdf_bytes: bytes):
     if log_path:
         return f"{status} (extracted_text_log: {log_path})"
     return status
+
+
+def store_guidelines_from_pdfs(pdf_bytes_list):
+    """Extract and store many guideline PDFs with one bulk ingestion pass."""
+    from backend.pdf_utils import extract_and_parse_pdf
+    guidelines = []
+    for pdf_bytes in pdf_bytes_list:
+        parsed = extract_and_parse_pdf(pdf_bytes)
+        title = parsed.get("title") or "Uploaded Guideline"
+        solution = parsed.get("solution") or parsed.get("full_text") or ""
+        guidelines.append((title, solution))
+    report = _store_guidelines_bulk(guidelines)
+    return f"✅ Indexed {report['rows']} guidelines ({report['failed']} failed, {report['skipped']} duplicates skipped, {report['rows_per_sec']} rows/sec)"
@@ -0,0 +1,110 @@
+-- Server-side analytics aggregates for the dashboard.
+--
+-- backend/database.py calls these through supabase.rpc() and falls back to
+-- computing the same numbers client-side when a function is missing, so this
+-- migration is optional. Run it in the Supabase SQL Editor.
+--
+-- Grouped results are ordered the way the client-side code first meets each
+-- group when reading rows ORDER BY created_at DESC (NULLs first, as Postgres does).
+--
+-- evaluations.score is VARCHAR; values that Python's float() would reject are
+-- treated the same way the client-side code treats them (skipped in averages,
+-- counted as 0 in topic/student performance).
+
+CREATE OR REPLACE FUNCTION analytics_parse_score(value TEXT)
+RETURNS DOUBLE PRECISION
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE
+        WHEN value ~ '^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$' THEN btrim(value)::DOUBLE PRECISION
+    END;
+$$;
+
+-- Totals, distinct counts and class statistics (one row)
+CREATE OR REPLACE FUNCTION analytics_summary()
+RETURNS TABLE (
+    total BIGINT,
+    scored BIGINT,
+    score_sum DOUBLE PRECISION,
+    min_score DOUBLE PRECISION,
+    max_score DOUBLE PRECISION,
+    median DOUBLE PRECISION,
+    std_dev DOUBLE PRECISION,
+    unique_students BIGINT,
+    unique_topics BIGINT
+)
+LANGUAGE sql STABLE AS $$
+    WITH e AS (
+        SELECT student_name, topic, analytics_parse_score(score) AS s FROM evaluations
+    )
+    SELECT
+        COUNT(*),
+        COUNT(s),
+        SUM(s),
+        MIN(s),
+        MAX(s),
+        percentile_cont(0.5) WITHIN GROUP (ORDER BY s),
+        stddev_pop(s),
+        -- NULL counts as its own value, as it does in a Python set
+        COUNT(DISTINCT student_name) + COALESCE(MAX(CASE WHEN student_name IS NULL THEN 1 ELSE 0 END), 0),
+        COUNT(DISTINCT topic) + COALESCE(MAX(CASE WHEN topic IS NULL THEN 1 ELSE 0 END), 0)
+    FROM e;
+$$;
+
+-- Count and score totals per normalized grade ('N/A' for NULL), most recent first
+CREATE OR REPLACE FUNCTION analytics_grade_distribution()
+RETURNS TABLE (grade TEXT, count BIGINT, score_sum DOUBLE PRECISION, scored BIGINT)
+LANGUAGE sql STABLE AS $$
+    SELECT COALESCE(upper(btrim(e.grade, E' \t\r\n')), 'N/A'), COUNT(*), SUM(analytics_parse_score(e.score)), COUNT(analytics_parse_score(e.score))
+    FROM evaluations e
+    GROUP BY 1
+    ORDER BY bool_or(e.created_at IS NULL) DESC, MAX(e.created_at) DESC, 1;
+$$;
+
+-- Scores bucketed into the dashboard's 0-2 / 2-4 / 4-6 / 6-8 / 8-10 ranges
+CREATE OR REPLACE FUNCTION analytics_score_histogram()
+RETURNS TABLE (bucket TEXT, count BIGINT)
+LANGUAGE sql STABLE AS $$
+    SELECT
+        CASE
+            WHEN s < 2 THEN '0-2'
+            WHEN s < 4 THEN '2-4'
+            WHEN s < 6 THEN '4-6'
+            WHEN s < 8 THEN '6-8'
+            ELSE '8-10'
+        END,
+        COUNT(*)
+    FROM (SELECT analytics_parse_score(score) AS s FROM evaluations) e
+    WHERE s IS NOT NULL
+    GROUP BY 1;
+$$;
+
+-- Per-topic counts and score totals, most recently evaluated topic first
+CREATE OR REPLACE FUNCTION analytics_topic_performance()
+RETURNS TABLE (topic TEXT, count BIGINT, sum_or_zero DOUBLE PRECISION, score_sum DOUBLE PRECISION, scored BIGINT)
+LANGUAGE sql STABLE AS $$
+    SELECT e.topic, COUNT(*), SUM(COALESCE(s, 0)), SUM(s), COUNT(s)
+    FROM (SELECT topic, created_at, analytics_parse_score(score) AS s FROM evaluations) e
+    GROUP BY e.topic
+    ORDER BY bool_or(e.created_at IS NULL) DESC, MAX(e.created_at) DESC, e.topic;
+$$;
+
+-- Per-student counts and best score (unparseable scores count as 0), most recent first
+CREATE OR REPLACE FUNCTION analytics_student_performance()
+RETURNS TABLE (student_name TEXT, count BIGINT, best_score DOUBLE PRECISION)
+LANGUAGE sql STABLE AS $$
+    SELECT e.student_name, COUNT(*), MAX(COALESCE(s, 0))
+    FROM (SELECT student_name, created_at, analytics_parse_score(score) AS s FROM evaluations) e
+    GROUP BY e.student_name
+    ORDER BY bool_or(e.created_at IS NULL) DESC, MAX(e.created_at) DESC, e.student_name;
+$$;
+
+-- Per-day counts and score totals
+CREATE OR REPLACE FUNCTION analytics_daily_stats()
+RETURNS TABLE (day TEXT, count BIGINT, score_sum DOUBLE PRECISION, scored BIGINT)
+LANGUAGE sql STABLE AS $$
+    SELECT to_char(created_at, 'YYYY-MM-DD'), COUNT(*), SUM(analytics_parse_score(score)), COUNT(analytics_parse_score(score))
+    FROM evaluations
+    WHERE created_at IS NOT NULL
+    GROUP BY 1
+    ORDER BY 1;
+$$;
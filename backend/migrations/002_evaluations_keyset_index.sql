@@ -0,0 +1,7 @@
+-- Index for the keyset-paginated evaluation fetch (iter_evaluations in
+-- backend/database.py), which reads pages ordered by created_at DESC, id DESC.
+-- Each page becomes an index range scan instead of a sort of the whole table.
+-- Optional; run it in the Supabase SQL Editor.
+
+CREATE INDEX IF NOT EXISTS evaluations_created_at_id_idx
+    ON evaluations (created_at DESC NULLS FIRST, id DESC);
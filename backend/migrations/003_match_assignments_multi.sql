@@ -0,0 +1,18 @@
+-- Best guideline for many topics in one call (retrieve_guidelines_batch in
+-- backend/database.py). Without it, batch lookups use the local vector index
+-- or fall back to one match_assignments call per topic. Run it in the
+-- Supabase SQL Editor.
+
+CREATE OR REPLACE FUNCTION match_assignments_multi(query_embeddings JSONB, match_count INT, similarity_threshold FLOAT)
+RETURNS TABLE (query_index INT, id BIGINT, content TEXT, metadata JSONB, similarity FLOAT)
+LANGUAGE sql STABLE AS $$
+    SELECT (q.idx - 1)::INT AS query_index, m.id, m.content, m.metadata, m.similarity
+    FROM jsonb_array_elements_text(query_embeddings) WITH ORDINALITY AS q(embedding, idx)
+    CROSS JOIN LATERAL (
+        SELECT a.id, a.content, a.metadata, 1 - (a.embedding <=> q.embedding::VECTOR(384)) AS similarity
+        FROM assignments a
+        WHERE 1 - (a.embedding <=> q.embedding::VECTOR(384)) >= similarity_threshold
+        ORDER BY a.embedding <=> q.embedding::VECTOR(384)
+        LIMIT match_count
+    ) m;
+$$;
@@ -0,0 +1,25 @@
+-- Guideline passages: a chunk-level index of long solutions, linked to their
+-- assignments row (see "Guideline Passages" in the README). Without the table,
+-- evaluations send the whole solution. Existing guidelines can be indexed
+-- afterwards with backfill_guideline_chunks() in backend/database.py.
+-- Run it in the Supabase SQL Editor.
+
+CREATE TABLE IF NOT EXISTS guideline_chunks (
+    id BIGSERIAL PRIMARY KEY,
+    guideline_id BIGINT NOT NULL REFERENCES assignments(id) ON DELETE CASCADE,
+    chunk_index INT NOT NULL,
+    content TEXT NOT NULL,
+    embedding VECTOR(384),
+    created_at TIMESTAMP DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_guideline_chunks_parent ON guideline_chunks(guideline_id);
+
+CREATE OR REPLACE FUNCTION match_guideline_chunks(query_embedding VECTOR(384), parent_id BIGINT, match_count INT)
+RETURNS TABLE (id BIGINT, chunk_index INT, content TEXT, similarity FLOAT)
+LANGUAGE sql STABLE AS $$
+    SELECT c.id, c.chunk_index, c.content, 1 - (c.embedding <=> query_embedding) AS similarity
+    FROM guideline_chunks c
+    WHERE c.guideline_id = parent_id
+    ORDER BY c.embedding <=> query_embedding
+    LIMIT match_count;
+$$;
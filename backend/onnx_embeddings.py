@@ -0,0 +1,82 @@
+"""
+ONNX Runtime embedding backend for CPU-only deployments.
+
+Runs an int8-quantized ONNX export of all-MiniLM-L6-v2 (see
+``scripts/export_onnx_embeddings.py``) without importing torch. The pipeline
+mirrors the sentence-transformers one: tokenize (max 256 word pieces), run the
+transformer, mean-pool over the attention mask and L2-normalize, so vectors are
+directly comparable with the ones already stored in Supabase.
+
+Exposes the same ``embed_query`` / ``embed_documents`` interface as
+``HuggingFaceEmbeddings`` so it can be swapped in by ``get_embeddings()``.
+"""
+import os
+
+try:
+    import numpy as np
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+    _HAS_ONNX = True
+except Exception:
+    np = ort = Tokenizer = None
+    _HAS_ONNX = False
+
+MODEL_FILENAME = "model_int8.onnx"
+TOKENIZER_FILENAME = "tokenizer.json"
+MAX_SEQ_LENGTH = 256  # all-MiniLM-L6-v2's sentence-transformers max_seq_length
+
+
+class OnnxMiniLMEmbeddings:
+    """Sentence embeddings from an ONNX MiniLM export using onnxruntime on CPU."""
+
+    def __init__(self, model_dir: str, model_file: str = MODEL_FILENAME, max_length: int = MAX_SEQ_LENGTH,
+                 batch_size: int = 32, num_threads: int = None):
+        if not _HAS_ONNX:
+            raise RuntimeError("onnxruntime, tokenizers and numpy are required for the ONNX embedding backend")
+        model_path = os.path.join(model_dir, model_file)
+        tokenizer_path = os.path.join(model_dir, TOKENIZER_FILENAME)
+        for path in (model_path, tokenizer_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"{path} not found; run scripts/export_onnx_embeddings.py first")
+
+        self.model_path = model_path
+        self.batch_size = max(1, batch_size)
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id("[PAD]") or 0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(list(texts))
+        input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.asarray([e.type_ids for e in encodings], dtype=np.int64)
+        feeds = {name: value for name, value in feeds.items() if name in self._input_names}
+
+        token_embeddings = self.session.run(None, feeds)[0]  # (batch, seq, hidden)
+        # Mean pooling over real tokens, then L2 normalize (sentence-transformers' Pooling + Normalize)
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts):
+        """Embed a list of texts. Returns a list of float lists."""
+        texts = [t.replace("\n", " ") for t in texts]
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._encode_batch(texts[start:start + self.batch_size]).tolist())
+        return vectors
+
+    def embed_query(self, text: str):
+        """Embed a single text."""
+        return self.embed_documents([text])[0]
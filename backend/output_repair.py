@@ -0,0 +1,244 @@
+import json
+import re
+import typing
+from collections import Counter
+
+from pydantic import BaseModel, ValidationError
+
+# ===============================
+# Repair Path Counters
+# ===============================
+# How each LLM output was turned into a result:
+#   direct           - output was valid JSON and matched the schema
+#   local_repair     - output needed local text/type fixes only
+#   field_completion - the model was asked again for the missing fields only
+#   failed           - nothing worked, the caller returned an error result
+REPAIR_STATS = Counter()
+
+
+def record_repair_path(path: str):
+    """Count one use of a repair path (see REPAIR_STATS)."""
+    REPAIR_STATS[path] += 1
+    print(f"[OUTPUT_REPAIR] path={path} totals={dict(REPAIR_STATS)}")
+
+
+def get_repair_stats() -> dict:
+    """Return a copy of the repair path counters."""
+    return dict(REPAIR_STATS)
+
+
+# ===============================
+# Text-Level JSON Repair
+# ===============================
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+
+
+def _extract_json_span(text: str) -> str:
+    """Strip markdown fences and any prose before the first '{' or '['."""
+    text = _FENCE_RE.sub("", text.strip()).strip()
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return text
+    return text[min(starts):]
+
+
+def _next_significant_char(text: str, start: int) -> str:
+    for ch in text[start:]:
+        if not ch.isspace():
+            return ch
+    return ""
+
+
+def _fix_quotes_and_commas(text: str) -> str:
+    """Escape quotes that cannot close a string and drop trailing commas.
+
+    A quote inside a string is treated as the closing quote only when the next
+    significant character is one a JSON string can be followed by; otherwise it
+    is an unescaped quote from the model's prose and gets escaped.
+    """
+    out = []
+    in_str = False
+    escape = False
+    for i, ch in enumerate(text):
+        if in_str:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == "\n":
+                out.append("\\n")
+                continue
+            elif ch == '"':
+                if _next_significant_char(text, i + 1) in (",", "}", "]", ":", ""):
+                    in_str = False
+                else:
+                    out.append('\\"')
+                    continue
+            out.append(ch)
+            continue
+
+        if ch == '"':
+            in_str = True
+        elif ch in "}]":
+            # Trailing comma: remove the last ',' if only whitespace follows it
+            j = len(out) - 1
+            while j >= 0 and out[j].isspace():
+                j -= 1
+            if j >= 0 and out[j] == ",":
+                del out[j]
+        out.append(ch)
+    return "".join(out)
+
+
+def _closers(stack) -> str:
+    return "".join("}" if c == "{" else "]" for c in reversed(stack))
+
+
+def _close_truncated(text: str) -> str:
+    """Close strings, arrays and objects left open by a truncated response."""
+    stack = []
+    in_str = False
+    escape = False
+    last_comma = None
+    for i, ch in enumerate(text):
+        if in_str:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_str = False
+            continue
+        if ch == '"':
+            in_str = True
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+        elif ch == ",":
+            last_comma = (i, list(stack))
+
+    if not stack and not in_str:
+        return text
+
+    candidate = text + ('"' if in_str else "")
+    attempt = candidate.rstrip().rstrip(",") + _closers(stack)
+    try:
+        json.loads(attempt)
+        return attempt
+    except ValueError:
+        pass
+
+    # The tail is a half-written element (e.g. a key without a value): cut back
+    # to the last complete element and close from there.
+    if last_comma:
+        index, comma_stack = last_comma
+        return text[:index] + _closers(comma_stack)
+    return attempt
+
+
+def repair_json_text(text: str) -> str:
+    """Apply local text fixes to slightly malformed JSON from the LLM.
+
+    Raises ``ValueError`` when the fixes would drop content from a response that
+    was not truncated (e.g. an unescaped quote followed by a comma inside a
+    string), instead of returning a silently shortened value.
+    """
+    text = _extract_json_span(text or "")
+    text = _fix_quotes_and_commas(text)
+    repaired = _close_truncated(text)
+    kept = text.rstrip().rstrip(",")
+    if not repaired.startswith(kept) and kept.endswith(("}", "]")):
+        raise ValueError("repair would drop content from a complete response")
+    return repaired
+
+
+def parse_json_with_repair(text: str):
+    """Parse LLM output as JSON, repairing it locally if needed.
+
+    Returns ``(data, repaired)``. Raises ``ValueError`` if the text cannot be
+    parsed even after repair.
+    """
+    try:
+        return json.loads(_extract_json_span(text or "")), False
+    except ValueError:
+        pass
+    return json.loads(repair_json_text(text)), True
+
+
+# ===============================
+# Type Coercion & Schema Validation
+# ===============================
+def _coerce(value, annotation):
+    """Nudge a parsed JSON value towards the type the schema expects."""
+    origin = typing.get_origin(annotation)
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        if isinstance(value, list) and len(value) == 1 and isinstance(value[0], dict):
+            value = value[0]
+        return coerce_fields(value, annotation) if isinstance(value, dict) else value
+
+    if origin in (list, typing.List):
+        (item_type,) = typing.get_args(annotation) or (typing.Any,)
+        if value is None or value == "":
+            return []
+        if not isinstance(value, list):
+            value = [value]
+        return [_coerce(item, item_type) for item in value]
+
+    if annotation is str:
+        if isinstance(value, bool):
+            return str(value).lower()
+        if isinstance(value, (int, float)):
+            return f"{value:g}" if isinstance(value, float) else str(value)
+        if isinstance(value, list) and all(isinstance(v, (str, int, float)) for v in value):
+            return "\n".join(str(v) for v in value)
+        if isinstance(value, dict) and len(value) == 1:
+            return _coerce(next(iter(value.values())), str)
+    if annotation is int and isinstance(value, str):
+        try:
+            return int(float(value.strip()))
+        except ValueError:
+            return value
+    return value
+
+
+def coerce_fields(data: dict, schema: typing.Type[BaseModel]) -> dict:
+    """Coerce the known fields of ``data`` to the types declared on ``schema``."""
+    coerced = dict(data)
+    for name, field in schema.model_fields.items():
+        if name in coerced and coerced[name] is not None:
+            coerced[name] = _coerce(coerced[name], field.annotation)
+        elif name in coerced:
+            # null is as good as missing; let validation report it
+            del coerced[name]
+    return coerced
+
+
+def missing_top_level_fields(error: ValidationError) -> list:
+    """Top-level field names that a validation error reports as missing or invalid."""
+    fields = []
+    for err in error.errors():
+        loc = err.get("loc") or ()
+        if loc and isinstance(loc[0], str) and loc[0] not in fields:
+            fields.append(loc[0])
+    return fields
+
+
+def coerce_to_schema(data, schema: typing.Type[BaseModel]):
+    """Coerce parsed output into ``schema``.
+
+    Returns ``(result_dict, missing_fields)``. ``result_dict`` is the validated
+    model dump when validation succeeds (``missing_fields`` is then empty), or the
+    coerced partial data when some top-level fields still need to be filled in.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+    coerced = coerce_fields(data, schema)
+    try:
+        return schema.model_validate(coerced).model_dump(), []
+    except ValidationError as e:
+        missing = missing_top_level_fields(e)
+        partial = {k: v for k, v in coerced.items() if k in schema.model_fields and k not in missing}
+        return partial, missing
@@ -0,0 +1,136 @@
+"""
+Top-k selection and ranking for leaderboards.
+
+``TopK`` keeps the k best items of a stream in a bounded min-heap: O(n log k)
+time and O(k) memory instead of sorting everything. Ties keep arrival order
+(the first item seen ranks higher), so the result is exactly
+``sorted(items, key=score, reverse=True)[:k]``. Heaps from different
+partitions merge.
+
+``leaderboard`` / ``leaderboards_by_topic`` rank evaluation rows by score, with
+optional topic and date-range filters, in one pass.
+"""
+import heapq
+
+from backend.analytics import parse_row_score, row_date
+
+RANK_METHODS = ("competition", "dense", "ordinal")
+
+
+class TopK:
+    """The k highest-scoring items seen so far."""
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap = []          # (score, -sequence, item); the root is the current k-th best
+        self._sequence = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add(self, score, item):
+        if self.k <= 0:
+            return
+        entry = (score, -self._sequence, item)
+        self._sequence += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def merge(self, other: "TopK") -> "TopK":
+        """Fold in another partition's top items (which rank after this one's on ties)."""
+        offset = self._sequence
+        for score, neg_sequence, item in other._heap:
+            entry = (score, neg_sequence - offset, item)
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, entry)
+            elif entry[:2] > self._heap[0][:2]:
+                heapq.heapreplace(self._heap, entry)
+        self._sequence += other._sequence
+        return self
+
+    def items(self):
+        """[(score, item)] best first."""
+        return [(score, item) for score, _, item in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+
+def top_k(items, k: int, key):
+    """The k items with the highest key, ties in input order (``sorted(...)[:k]`` without the full sort)."""
+    return heapq.nlargest(k, items, key=key)
+
+
+def top_k_items(mapping: dict, k: int) -> dict:
+    """The k entries of a {name: score} dict with the highest scores, best first."""
+    return dict(top_k(mapping.items(), k, key=lambda x: x[1]))
+
+
+def assign_ranks(scores, method: str = "competition"):
+    """Ranks for scores already sorted best first.
+
+    competition: 1, 2, 2, 4 (ties share a rank, the next rank skips)
+    dense:       1, 2, 2, 3
+    ordinal:     1, 2, 3, 4
+    """
+    if method not in RANK_METHODS:
+        raise ValueError(f"Unknown rank method '{method}' (expected one of {', '.join(RANK_METHODS)})")
+    ranks, previous, rank = [], object(), 0
+    for position, score in enumerate(scores, start=1):
+        if method == "ordinal":
+            rank = position
+        elif score != previous:
+            rank = position if method == "competition" else rank + 1
+        ranks.append(rank)
+        previous = score
+    return ranks
+
+
+def _ranked(top: TopK, method: str):
+    entries = top.items()
+    return [{"rank": rank, "score_value": score, **_as_dict(row)}
+            for rank, (score, row) in zip(assign_ranks([score for score, _ in entries], method), entries)]
+
+
+def _as_dict(row):
+    return row._asdict() if hasattr(row, "_asdict") else dict(row)
+
+
+def _in_range(row, start_date, end_date):
+    if start_date is None and end_date is None:
+        return True
+    date = row_date(row)
+    if date is None:
+        return False
+    return (start_date is None or date >= start_date) and (end_date is None or date <= end_date)
+
+
+def leaderboard(rows, k: int = 100, topic=None, start_date=None, end_date=None, method: str = "competition"):
+    """Top k evaluations by score (unparseable scores count as 0), best first.
+
+    ``rows`` should be newest first so equal scores list the most recent
+    evaluation first. Dates are ``YYYY-MM-DD`` strings, inclusive. Each entry
+    is the row as a dict plus ``rank`` and ``score_value``.
+    """
+    top = TopK(k)
+    for row in rows:
+        if topic is not None and row.get("topic") != topic:
+            continue
+        if not _in_range(row, start_date, end_date):
+            continue
+        score = parse_row_score(row)
+        top.add(score if score is not None else 0.0, row)
+    return _ranked(top, method)
+
+
+def leaderboards_by_topic(rows, k: int = 10, start_date=None, end_date=None, method: str = "competition"):
+    """{topic: leaderboard} for every topic, in one pass over the rows."""
+    tops = {}
+    for row in rows:
+        if not _in_range(row, start_date, end_date):
+            continue
+        score = parse_row_score(row)
+        top = tops.get(row.get("topic"))
+        if top is None:
+            top = tops[row.get("topic")] = TopK(k)
+        top.add(score if score is not None else 0.0, row)
+    return {topic: _ranked(top, method) for topic, top in tops.items()}
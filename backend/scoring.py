@@ -0,0 +1,168 @@
+import os
+import re
+import copy
+
+# ===============================
+# Grade Boundaries
+# ===============================
+# Minimum score (on a 0-10 scale) for each grade, highest grade first.
+# Override with e.g. GRADE_BOUNDARIES="A:8,B:7,C:5.5,D:4,F:0"
+DEFAULT_GRADE_BOUNDARIES = [("A", 8.0), ("B", 7.0), ("C", 5.5), ("D", 4.0), ("F", 0.0)]
+
+# Difference (in points out of 10) between the LLM's score and the rubric sum
+# that is still treated as consistent
+SCORE_TOLERANCE = float(os.getenv("SCORE_TOLERANCE", "0.5"))
+
+# "rubric": overall score is recomputed from rubric_breakdown (default)
+# "llm":    keep the model's score, only fix the grade and flag mismatches
+SCORE_SOURCE = os.getenv("SCORE_SOURCE", "rubric").strip().lower()
+
+
+def parse_grade_boundaries(spec: str):
+    """Parse "A:8,B:7,..." into [("A", 8.0), ("B", 7.0), ...] sorted high to low."""
+    boundaries = []
+    for part in (spec or "").split(","):
+        if ":" not in part:
+            continue
+        grade, minimum = part.split(":", 1)
+        try:
+            boundaries.append((grade.strip().upper(), float(minimum)))
+        except ValueError:
+            print(f"[SCORING] Ignoring invalid grade boundary: '{part}'")
+    return sorted(boundaries, key=lambda b: b[1], reverse=True)
+
+
+GRADE_BOUNDARIES = parse_grade_boundaries(os.getenv("GRADE_BOUNDARIES", "")) or DEFAULT_GRADE_BOUNDARIES
+
+
+# ===============================
+# Score Parsing & Grading
+# ===============================
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def parse_score(value):
+    """Parse LLM score strings such as "7", "7.5", "7/10" or "70%" into a float.
+
+    Fractions and percentages are returned as-is relative to their own scale:
+    "7/10" -> 7.0 and "70%" -> 70.0. Returns None when nothing numeric is found.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER_RE.search(str(value))
+    return float(match.group()) if match else None
+
+
+def format_score(score: float) -> str:
+    """Format a score the way the LLM does (a plain number string, 1 decimal max)."""
+    return f"{round(score, 1):g}"
+
+
+def grade_for_score(score: float, out_of: float = 10, boundaries=None) -> str:
+    """Map a score to a letter grade using the boundary table."""
+    boundaries = boundaries or GRADE_BOUNDARIES
+    normalized = score * 10.0 / out_of if out_of else 0.0
+    for grade, minimum in boundaries:
+        if normalized >= minimum:
+            return grade
+    return boundaries[-1][0]
+
+
+def aggregate_rubric_score(rubric_breakdown, out_of: float = 10):
+    """Compute the overall score from rubric_breakdown[].score / max_score.
+
+    Returns ``(score, issues)``. ``score`` is None when no criterion has a usable
+    score and max_score; ``issues`` lists criteria that had to be skipped or clamped.
+    """
+    earned, possible, issues = 0.0, 0.0, []
+    for item in rubric_breakdown or []:
+        if not isinstance(item, dict):
+            continue
+        name = item.get("criteria") or "Unnamed criterion"
+        score = parse_score(item.get("score"))
+        max_score = parse_score(item.get("max_score"))
+        if score is None or not max_score or max_score <= 0:
+            issues.append(f"'{name}' has no usable score/max_score")
+            continue
+        if score < 0 or score > max_score:
+            issues.append(f"'{name}' score {format_score(score)} is outside 0-{format_score(max_score)}")
+            score = min(max(score, 0.0), max_score)
+        earned += score
+        possible += max_score
+    if possible <= 0:
+        return None, issues
+    return earned / possible * out_of, issues
+
+
+# ===============================
+# Reconciliation
+# ===============================
+def reconcile_evaluation(result: dict, out_of: float = 10, boundaries=None, tolerance: float = None, score_source: str = None):
+    """Make score and grade consistent with the rubric breakdown, locally.
+
+    Returns a copy of ``result`` with ``score``/``grade`` recomputed and a
+    ``score_check`` dict describing what the LLM said, what was computed and
+    whether the two disagreed.
+    """
+    tolerance = SCORE_TOLERANCE if tolerance is None else tolerance
+    score_source = score_source or SCORE_SOURCE
+    reconciled = copy.deepcopy(result)
+
+    llm_score = parse_score(result.get("score"))
+    llm_grade = str(result.get("grade") or "").strip().upper()
+    computed_score, issues = aggregate_rubric_score(result.get("rubric_breakdown"), out_of)
+
+    if computed_score is not None and llm_score is not None and abs(computed_score - llm_score) > tolerance:
+        issues.append(f"LLM score {format_score(llm_score)} does not match rubric total {format_score(computed_score)}")
+
+    if score_source == "rubric" and computed_score is not None:
+        final_score = computed_score
+    elif llm_score is not None:
+        final_score = min(max(llm_score, 0.0), float(out_of))
+    else:
+        final_score = computed_score
+
+    if final_score is not None:
+        final_grade = grade_for_score(final_score, out_of, boundaries)
+        reconciled["score"] = format_score(final_score)
+        reconciled["grade"] = final_grade
+        if llm_grade and llm_grade != final_grade:
+            issues.append(f"LLM grade {llm_grade} does not match {final_grade} for score {format_score(final_score)}")
+    else:
+        issues.append("No usable score in the response")
+
+    reconciled["score_check"] = {
+        "consistent": not issues,
+        "llm_score": result.get("score"),
+        "llm_grade": result.get("grade"),
+        "computed_score": format_score(computed_score) if computed_score is not None else None,
+        "score_source": score_source if computed_score is not None else "llm",
+        "issues": issues,
+    }
+    if issues:
+        print(f"[SCORING] Inconsistent evaluation corrected locally: {'; '.join(issues)}")
+    return reconciled
+
+
+def apply_criterion_overrides(result: dict, overrides: dict, out_of: float = 10, boundaries=None):
+    """Re-score an evaluation after a teacher adjusts criterion scores.
+
+    ``overrides`` maps criterion name -> new score. This is a local recomputation;
+    no LLM call is made.
+    """
+    previous = result.get("score_check") or {}
+    corrected = copy.deepcopy(result)
+    for item in corrected.get("rubric_breakdown") or []:
+        if isinstance(item, dict) and item.get("criteria") in overrides:
+            item["score"] = format_score(float(overrides[item["criteria"]]))
+    # The old overall score is stale by definition; don't report it as a mismatch
+    corrected["score"], corrected["grade"] = None, None
+    corrected = reconcile_evaluation(corrected, out_of, boundaries, score_source="rubric")
+    corrected["score_check"].update({
+        "llm_score": previous.get("llm_score", result.get("score")),
+        "llm_grade": previous.get("llm_grade", result.get("grade")),
+        "teacher_adjusted": True,
+    })
+    return corrected
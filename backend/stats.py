@@ -0,0 +1,182 @@
+"""
+Streaming, mergeable score statistics.
+
+- ``RunningStats``: count, min, max and Welford's running mean/variance.
+  Adding a value is O(1), and two partitions combine exactly with Chan's
+  parallel update (``merge``).
+- ``QuantileSketch``: counts per score rounded to ``resolution`` (0.01 by
+  default). Scores on this app's 0-10 scale with up to two decimals are
+  therefore stored exactly and quantiles match a full sort. Memory is bounded
+  by the number of distinct rounded values (about 1,000 for 0-10), not by the
+  number of rows. Sketches merge by adding counts. ``exact`` stays True while
+  every value lies on the resolution grid.
+- ``GroupedStats``: one RunningStats + QuantileSketch per key (topic, student,
+  date, ...), filled in the same single pass and mergeable per key.
+"""
+import math
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+class RunningStats:
+    """Count, min, max, mean and population variance over a stream of values."""
+
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None or value < self.min else self.min
+        self.max = value if self.max is None or value > self.max else self.max
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Fold another partition's stats into this one."""
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self._m2, self.min, self.max = other.count, other.mean, other._m2, other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std_dev(self) -> float:
+        return math.sqrt(max(self.variance, 0.0))
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch: value counts at a fixed resolution."""
+
+    __slots__ = ("resolution", "_scale", "_counts", "count", "exact")
+
+    def __init__(self, resolution: float = 0.01):
+        self.resolution = resolution
+        self._scale = 1.0 / resolution
+        self._counts = {}        # round(value / resolution) -> count
+        self.count = 0
+        self.exact = True        # no value has been rounded yet
+
+    def add(self, value: float, times: int = 1):
+        key = round(value * self._scale)
+        if self.exact and abs(key - value * self._scale) > 1e-6:
+            self.exact = False
+        self._counts[key] = self._counts.get(key, 0) + times
+        self.count += times
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.resolution != self.resolution:
+            raise ValueError("cannot merge quantile sketches with different resolutions")
+        for key, n in other._counts.items():
+            self._counts[key] = self._counts.get(key, 0) + n
+        self.count += other.count
+        self.exact = self.exact and other.exact
+        return self
+
+    def _order_stats(self, ranks):
+        """Values at the given 0-based ranks (ascending ranks), by walking the sorted counts."""
+        values, ranks = [], iter(ranks)
+        rank = next(ranks, None)
+        seen = 0
+        for key in sorted(self._counts):
+            seen += self._counts[key]
+            while rank is not None and rank < seen:
+                values.append(round(key * self.resolution, 10))
+                rank = next(ranks, None)
+            if rank is None:
+                break
+        return values
+
+    def quantiles(self, qs):
+        """Quantiles for q in [0, 1], linearly interpolated between ranks (like numpy's default)."""
+        if not self.count:
+            return [None for _ in qs]
+        positions = [q * (self.count - 1) for q in qs]
+        ranks = sorted({r for p in positions for r in (math.floor(p), math.ceil(p))})
+        at = dict(zip(ranks, self._order_stats(ranks)))
+        result = []
+        for p in positions:
+            low, high = at[math.floor(p)], at[math.ceil(p)]
+            result.append(low + (high - low) * (p - math.floor(p)))
+        return result
+
+    def quantile(self, q: float):
+        return self.quantiles([q])[0]
+
+    def median(self):
+        """Median as the middle value, or the mean of the two middle values."""
+        if not self.count:
+            return None
+        low, high = self._order_stats([(self.count - 1) // 2, self.count // 2])
+        return low if self.count % 2 == 1 else (low + high) / 2
+
+
+def summarize(count, mean, std_dev, minimum, maximum, percentile_values, percentiles=PERCENTILES, digits: int = 2):
+    """The summary dict shared by every stats view, rounded like the other analytics."""
+    if not count:
+        return {"count": 0}
+    result = {
+        "count": count,
+        "mean": round(mean, digits),
+        "std_dev": round(std_dev, digits),
+        "min": minimum,
+        "max": maximum,
+    }
+    for p, value in zip(percentiles, percentile_values):
+        result[f"p{p}"] = round(value, digits)
+    return result
+
+
+def describe(stats: RunningStats, sketch: QuantileSketch, percentiles=PERCENTILES, digits: int = 2):
+    """Summary dict: count, mean, std_dev, min, max and p10..p90."""
+    if not stats.count:
+        return {"count": 0}
+    return summarize(stats.count, stats.mean, stats.std_dev, stats.min, stats.max,
+                     sketch.quantiles([p / 100 for p in percentiles]), percentiles, digits)
+
+
+class GroupedStats:
+    """Per-key RunningStats and QuantileSketch, updated in one pass."""
+
+    def __init__(self, resolution: float = 0.01):
+        self.resolution = resolution
+        self.groups = {}         # key -> (RunningStats, QuantileSketch)
+
+    def add(self, key, value: float):
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = (RunningStats(), QuantileSketch(self.resolution))
+        group[0].add(value)
+        group[1].add(value)
+
+    def merge(self, other: "GroupedStats") -> "GroupedStats":
+        for key, (stats, sketch) in other.groups.items():
+            group = self.groups.get(key)
+            if group is None:
+                group = self.groups[key] = (RunningStats(), QuantileSketch(self.resolution))
+            group[0].merge(stats)
+            group[1].merge(sketch)
+        return self
+
+    def describe(self, keys=None, percentiles=PERCENTILES):
+        """{key: describe(...)} for the given keys (default: all, in insertion order)."""
+        keys = self.groups if keys is None else keys
+        return {key: describe(*self.groups[key], percentiles=percentiles) for key in keys if key in self.groups}
@@ -0,0 +1,258 @@
+"""
+In-process vector index over the ``assignments`` table.
+
+Guideline embeddings are kept as an L2-normalized matrix saved to a snapshot
+directory and memory-mapped on load, so top-k cosine queries are a single
+matrix-vector product instead of a ``match_assignments`` RPC round-trip. The
+matrix can be stored as float32, float16 or int8 (see embedding_codec.py).
+The index is synced incrementally: rows are paged by the (``created_at``, ``id``)
+keyset, and only rows after the last synced one are fetched.
+
+Rows updated in place (e.g. a re-uploaded guideline) are picked up because the
+update moves their ``created_at`` forward. Rows deleted from Supabase are not
+detected by incremental sync; call ``rebuild()`` after deleting guidelines.
+"""
+import os
+import json
+import time
+import threading
+
+try:
+    import numpy as np
+    from backend import embedding_codec
+    _HAS_NUMPY = True
+except Exception:
+    np = embedding_codec = None
+    _HAS_NUMPY = False
+
+SYNC_PAGE_SIZE = 500
+_SYNC_COLUMNS = "id,content,metadata,embedding,created_at"
+
+
+def _parse_embedding(value):
+    """pgvector columns come back from PostgREST as a string like "[0.1,0.2,...]"."""
+    if isinstance(value, str):
+        value = json.loads(value)
+    return value
+
+
+def _solution_from_metadata(metadata):
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except ValueError:
+            return None
+    if isinstance(metadata, dict):
+        return metadata.get("solution") or None
+    return None
+
+
+def _keyset_after(created_at, row_id, undated=False):
+    """PostgREST or= filter for the rows after (created_at, id), ordered (created_at ASC NULLS LAST, id ASC).
+
+    Rows without a created_at sort last; ``undated`` keeps them (full syncs only).
+    """
+    if created_at is None:
+        return f"and(created_at.is.null,id.gt.{row_id})"
+    if row_id is None:
+        # Snapshot saved before the id was tracked: refetch the rows at the watermark once
+        after = f'created_at.gte."{created_at}"'
+    else:
+        after = f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{row_id})'
+    return after + (",created_at.is.null" if undated else "")
+
+
+def _normalize(vectors):
+    block = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(block, axis=1, keepdims=True)
+    return block / np.where(norms == 0, 1.0, norms)
+
+
+class LocalVectorIndex:
+    """Top-k cosine search over guideline embeddings, backed by a snapshot directory."""
+
+    def __init__(self, snapshot_dir: str, storage_dtype: str = "float32"):
+        if not _HAS_NUMPY:
+            raise RuntimeError("numpy is required for the local vector index")
+        self.snapshot_dir = snapshot_dir
+        self.storage_dtype = embedding_codec.check_dtype(storage_dtype)
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((0, 0), dtype=np.float32)  # codes in storage_dtype
+        self._scales = None                                # per-row scales (int8 only)
+        self._rows = []          # [{"id", "content", "solution", "created_at"}], aligned with matrix rows
+        self._positions = {}     # id -> matrix row
+        self.watermark = None    # created_at of the newest synced row
+        self.watermark_id = None  # its id: rows sharing one created_at are paged past by id
+        self.last_sync = 0.0
+        self._load()
+
+    # ----- snapshot files -----
+    @property
+    def _matrix_path(self):
+        return os.path.join(self.snapshot_dir, "embeddings.npy")
+
+    @property
+    def _scales_path(self):
+        return os.path.join(self.snapshot_dir, "scales.npy")
+
+    @property
+    def _rows_path(self):
+        return os.path.join(self.snapshot_dir, "rows.json")
+
+    def _load(self):
+        if not (os.path.exists(self._matrix_path) and os.path.exists(self._rows_path)):
+            return
+        try:
+            with open(self._rows_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            matrix = np.load(self._matrix_path, mmap_mode="r")
+            scales = np.load(self._scales_path) if state.get("dtype") == "int8" else None
+            if matrix.shape[0] != len(state["rows"]) or (scales is not None and len(scales) != matrix.shape[0]):
+                raise ValueError("snapshot matrix and rows are out of step")
+            reencode = state.get("dtype", "float32") != self.storage_dtype
+            if reencode:
+                print(f"[VECTOR_INDEX] Re-encoding snapshot from {state.get('dtype', 'float32')} to {self.storage_dtype}")
+                matrix, scales = embedding_codec.encode(embedding_codec.decode(matrix, scales), self.storage_dtype)
+            self._matrix, self._scales = matrix, scales
+            self._rows = state["rows"]
+            self._positions = {r["id"]: i for i, r in enumerate(self._rows)}
+            self.watermark = state.get("watermark")
+            self.watermark_id = state.get("watermark_id")
+            if reencode:
+                self._save()
+            print(f"[VECTOR_INDEX] Loaded snapshot with {len(self._rows)} guidelines (watermark: {self.watermark})")
+        except Exception as e:
+            print(f"[VECTOR_INDEX] Ignoring unreadable snapshot: {e}")
+
+    def _save(self):
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        tmp_matrix = self._matrix_path + ".tmp.npy"
+        tmp_rows = self._rows_path + ".tmp"
+        np.save(tmp_matrix, np.ascontiguousarray(self._matrix))
+        if self._scales is not None:
+            np.save(self._scales_path + ".tmp.npy", self._scales)
+        with open(tmp_rows, "w", encoding="utf-8") as f:
+            json.dump({"watermark": self.watermark, "watermark_id": self.watermark_id,
+                       "dtype": self.storage_dtype, "rows": self._rows}, f)
+        # Replace atomically so readers never see a half-written snapshot
+        os.replace(tmp_matrix, self._matrix_path)
+        if self._scales is not None:
+            os.replace(self._scales_path + ".tmp.npy", self._scales_path)
+        os.replace(tmp_rows, self._rows_path)
+        self._matrix = np.load(self._matrix_path, mmap_mode="r")
+
+    # ----- sync -----
+    def _append(self, rows):
+        vectors, metas, replaced = [], [], []
+        for row in rows:
+            embedding = _parse_embedding(row.get("embedding"))
+            if not embedding:
+                continue
+            meta = {
+                "id": row.get("id"),
+                "content": row.get("content"),
+                "solution": _solution_from_metadata(row.get("metadata")),
+                "created_at": row.get("created_at"),
+            }
+            position = self._positions.get(meta["id"])
+            if position is not None:
+                # A known id with a newer created_at is an update (rows refetched at a legacy watermark are not)
+                if self._rows[position].get("created_at") != meta["created_at"]:
+                    replaced.append((position, embedding, meta))
+                continue
+            vectors.append(embedding)
+            metas.append(meta)
+        if replaced:
+            matrix = np.array(self._matrix)  # copy out of the read-only memory map
+            scales = np.array(self._scales) if self._scales is not None else None
+            for position, embedding, meta in replaced:
+                codes, row_scales = embedding_codec.encode(_normalize([embedding]), self.storage_dtype)
+                matrix[position] = codes[0]
+                if scales is not None:
+                    scales[position] = row_scales[0]
+                self._rows[position] = meta
+            self._matrix, self._scales = matrix, scales
+        if not vectors:
+            return len(replaced)
+        codes, scales = embedding_codec.encode(_normalize(vectors), self.storage_dtype)
+        if self._matrix.size == 0:
+            self._matrix, self._scales = codes, scales
+        else:
+            self._matrix = np.vstack([np.asarray(self._matrix), codes])
+            if scales is not None:
+                self._scales = np.concatenate([self._scales, scales])
+        for meta in metas:
+            self._positions[meta["id"]] = len(self._rows)
+            self._rows.append(meta)
+        return len(metas) + len(replaced)
+
+    def sync(self, client, page_size: int = SYNC_PAGE_SIZE) -> int:
+        """Fetch rows newer than the watermark from Supabase and add them. Returns rows added or updated."""
+        added = 0
+        with self._lock:
+            # Keyset on (created_at, id): any number of rows may share one created_at
+            cursor = (self.watermark, self.watermark_id) if self.watermark else None
+            full = cursor is None
+            while True:
+                query = client.table("assignments").select(_SYNC_COLUMNS)
+                if cursor:
+                    query = query.or_(_keyset_after(*cursor, undated=full))
+                resp = query.order("created_at", nullsfirst=False).order("id").limit(page_size).execute()
+                rows = getattr(resp, "data", None) or []
+                if not rows:
+                    break
+                added += self._append(rows)
+                last = rows[-1]
+                cursor = (last.get("created_at"), last.get("id"))
+                dated = [r for r in rows if r.get("created_at")]
+                if dated:
+                    self.watermark, self.watermark_id = dated[-1].get("created_at"), dated[-1].get("id")
+                if len(rows) < page_size:
+                    break
+            self.last_sync = time.time()
+            if added:
+                self._save()
+                print(f"[VECTOR_INDEX] Synced {added} new or updated guidelines ({len(self._rows)} total)")
+        return added
+
+    def rebuild(self, client) -> int:
+        """Drop the local snapshot and re-sync everything."""
+        with self._lock:
+            self._matrix, self._scales = np.zeros((0, 0), dtype=np.float32), None
+            self._rows, self._positions = [], {}
+            self.watermark = self.watermark_id = None
+            return self.sync(client)
+
+    # ----- query -----
+    def __len__(self):
+        return len(self._rows)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"rows": len(self._rows), "dtype": self.storage_dtype,
+                    "matrix_bytes": embedding_codec.nbytes(self._matrix, self._scales)}
+
+    def search(self, query_embedding, k: int = 1, threshold: float = None):
+        """Return up to k rows as dicts with ``similarity`` added, best first."""
+        with self._lock:
+            matrix, scales, rows = self._matrix, self._scales, self._rows
+        if not rows:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        scores = embedding_codec.scores(matrix, scales, query / norm)
+        k = min(k, len(rows))
+        if k < len(rows):
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+        else:
+            top = np.argsort(-scores)
+        results = []
+        for i in top:
+            similarity = float(scores[i])
+            if threshold is not None and similarity < threshold:
+                break
+            results.append({**rows[i], "similarity": similarity})
+        return results
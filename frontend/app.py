@@ -271,8 +271,10 @@ try:
     get_assignments_per_student = db_service.get_assignments_per_student
     get_recent_evaluations = db_service.get_recent_evaluations
     get_evaluation_stats_by_date = db_service.get_evaluation_stats_by_date
+    get_leaderboard = db_service.get_leaderboard
     insert_test_data = db_service.insert_test_data
     save_evaluation_result = db_service.save_evaluation_result
+    update_evaluation_scores = db_service.update_evaluation_scores
     store_guideline = db_service.store_guideline
     
     # Optional Data Management functions (handled gracefully)
@@ -284,9 +286,18 @@ try:
     try:
         from backend.main import store_guideline_from_pdf as _store_guideline_from_pdf
     except Exception: _store_guideline_from_pdf = None
+    try:
+        from backend.main import store_guidelines_from_pdfs as _store_guidelines_from_pdfs
+    except Exception: _store_guidelines_from_pdfs = None
     try:
         from backend.main import evaluate_pdf as _evaluate_pdf
     except Exception: _evaluate_pdf = None
+    try:
+        import backend.job_queue as job_queue
+    except Exception: job_queue = None
+    try:
+        from backend.scoring import apply_criterion_overrides
+    except Exception: apply_criterion_overrides = None
 except ImportError as e:
     BACKEND_OK = False
     st.error(f"Import Error: {e}. Ensure '__init__.py' exists.")
@@ -298,10 +309,35 @@ def cached_get_summary():
     # Caching removed for automatic reloading
     return get_evaluations_summary()
 
-@st.cache_data(ttl=600)
-def cached_get_all_evaluations():
+@st.cache_data(ttl=600, max_entries=4)
+def cached_get_all_evaluations(evaluations_version=None):
+    # Keyed by evaluations_version(): new rows make the next call miss,
+    # without clearing anything else in st.cache_data
     return get_all_evaluations()
 
+
+def evaluations_version():
+    """Cache key for evaluation reads that also changes when other processes save rows.
+
+    The in-process data version covers local saves and deletes; the snapshot's
+    watermark and row count pick up rows saved by the queue workers (the
+    snapshot folds in new rows at most ANALYTICS_SNAPSHOT_TTL_SECONDS late).
+    """
+    if not BACKEND_OK:
+        return 0
+    snapshot = db_service.get_analytics_snapshot()
+    return (db_service.data_version("evaluations"), snapshot.watermark, snapshot.total)
+
+def start_evaluation_workers():
+    """Start the background evaluation worker pool if no worker is alive.
+
+    Not cached: it runs on every enqueue so a pool that died is restarted.
+    The liveness check is a single heartbeat query.
+    """
+    if job_queue is None:
+        return None
+    return job_queue.ensure_worker_pool()
+
 # ===============================
 # 3. Hardcoded Authentication
 # ===============================
@@ -345,6 +381,8 @@ if "last_evaluation_roll" not in st.session_state:
     st.session_state.last_evaluation_roll = None
 if "last_evaluation_topic" not in st.session_state:
     st.session_state.last_evaluation_topic = None
+if "queued_job_ids" not in st.session_state:
+    st.session_state.queued_job_ids = []
 
 # ===== RENDER LOGIN OR DASHBOARD =====
 is_authenticated, username = check_authentication()
@@ -414,13 +452,22 @@ if is_authenticated and username:
             
             st.markdown("<div style='margin-top: 0.5rem; color: #666; font-size: 0.9rem;'>📄 Upload Answer</div>", unsafe_allow_html=True)
             student_pdf = st.file_uploader("PDF", type=["pdf"], key="pdf_upload")
+            run_in_background = st.checkbox("⏳ Run in background queue", value=False, key="bg_queue", help="Queue the evaluation so it keeps running if you close the page. Results appear under 'Background Jobs'.", disabled=job_queue is None)
             
             submit_eval = st.form_submit_button("🚀 Evaluate", use_container_width=True)
 
         st.markdown("</div>", unsafe_allow_html=True)
 
         if submit_eval:
-            if student_pdf and input_q and student_roll:
+            if student_pdf and input_q and student_roll and run_in_background and job_queue is not None:
+                try:
+                    job_id = job_queue.enqueue_evaluation(input_q, student_pdf.read(), grading_rubric, student_name=student_name, student_roll=student_roll, save_to_db=True)
+                    start_evaluation_workers()
+                    st.session_state.queued_job_ids.append(job_id)
+                    st.success(f"⏳ Queued as job #{job_id}. Track it under 'Background Jobs' below.")
+                except Exception as e:
+                    st.error(f"❌ Could not queue evaluation: {e}")
+            elif student_pdf and input_q and student_roll:
                 with st.spinner("🔍 Analyzing submission..."):
                     pdf_bytes = student_pdf.read()
                     eval_result = None
@@ -476,6 +523,11 @@ if is_authenticated and username:
                 res_col2.metric("Grade", eval_result.get('grade', 'N/A'))
                 res_col3.metric("Roll No.", st.session_state.last_evaluation_roll or "N/A")
                 
+                # Score consistency check (overall score recomputed locally from the rubric)
+                score_check = eval_result.get('score_check') or {}
+                if score_check and not score_check.get('consistent', True):
+                    st.warning("⚖️ The AI's overall score/grade did not match its rubric breakdown and was recomputed: " + "; ".join(score_check.get('issues', [])))
+                
                 # Main feedback
                 st.subheader("📋 Feedback")
                 st.info(eval_result.get('feedback', 'No feedback available'))
@@ -502,6 +554,31 @@ if is_authenticated and username:
                             with col2:
                                 st.metric("", f"{score}/{max_score}")
                 
+                    # Teacher corrections: local recomputation, no new LLM call
+                    if apply_criterion_overrides:
+                        with st.expander("✏️ Adjust Rubric Scores"):
+                            with st.form("adjust_rubric_form"):
+                                overrides = {}
+                                for idx, item in enumerate(eval_result['rubric_breakdown']):
+                                    if isinstance(item, dict) and item.get('criteria'):
+                                        try:
+                                            current = float(item.get('score', 0))
+                                            max_value = float(item.get('max_score', 10))
+                                        except (ValueError, TypeError):
+                                            continue
+                                        overrides[item['criteria']] = st.number_input(
+                                            f"{item['criteria']} (max {item.get('max_score')})",
+                                            min_value=0.0, max_value=max(max_value, current), value=current, step=0.5, key=f"adjust_{idx}"
+                                        )
+                                if st.form_submit_button("🔁 Recompute Score", use_container_width=True):
+                                    corrected = apply_criterion_overrides(eval_result, overrides)
+                                    # Persist the correction so history and analytics see the reconciled score
+                                    if corrected.get('evaluation_id') is not None and not update_evaluation_scores(corrected['evaluation_id'], corrected):
+                                        st.error("❌ Could not save the adjusted score to the database.")
+                                    else:
+                                        st.session_state.last_evaluation_result = corrected
+                                        st.rerun()
+                
                 # Missing Concepts
                 if eval_result.get('missing_concepts') and len(eval_result['missing_concepts']) > 0:
                     st.subheader("🔍 Missing Concepts")
@@ -564,10 +641,31 @@ if is_authenticated and username:
                 st.session_state.evaluation_completed = False
                 st.rerun()
         
+        # --- BACKGROUND JOBS ---
+        if job_queue is not None and st.session_state.queued_job_ids:
+            with st.expander("⏳ Background Jobs", expanded=True):
+                if st.button("🔄 Refresh Status", key="refresh_jobs"):
+                    st.rerun()
+                for job in job_queue.list_jobs(job_ids=st.session_state.queued_job_ids):
+                    job_col1, job_col2 = st.columns([3, 1])
+                    with job_col1:
+                        st.write(f"**#{job['id']}** {job.get('student_name') or 'N/A'} ({job.get('student_roll') or 'N/A'}) · {job.get('question')}")
+                        st.progress(min(max(float(job.get('progress') or 0), 0.0), 1.0), text=f"{job['status']} · {job.get('progress_message') or ''}")
+                        if job['status'] == 'failed' and job.get('error'):
+                            st.caption(f"❌ {job['error']}")
+                    with job_col2:
+                        if job['status'] == 'done' and isinstance(job.get('result'), dict):
+                            if st.button("📄 Show Result", key=f"show_job_{job['id']}", use_container_width=True):
+                                st.session_state.last_evaluation_result = job['result']
+                                st.session_state.last_evaluation_roll = job.get('student_roll')
+                                st.session_state.last_evaluation_topic = job.get('question')
+                                st.session_state.evaluation_completed = True
+                                st.rerun()
+
         # --- NEW: PERSISTENT HISTORY VIEW ---
         st.markdown("---")
         with st.expander("📜 Your Evaluation History", expanded=False):
-            all_evals = get_all_evaluations()
+            all_evals = cached_get_all_evaluations(evaluations_version())
             if all_evals:
                 # Filter for non-mock data if possible, or just show all
                 history_data = []
@@ -602,16 +700,20 @@ if is_authenticated and username:
         
         with st.form("ingestion_form"):
             st.markdown("<div style='color: #1a2332; font-weight: 700; font-size: 0.95rem; margin-bottom: 0.6rem;'>📄 Upload Guideline</div>", unsafe_allow_html=True)
-            uploaded_guideline = st.file_uploader("Guideline PDF", type=["pdf"], key="guide_pdf")
+            uploaded_guidelines = st.file_uploader("Guideline PDF", type=["pdf"], key="guide_pdf", accept_multiple_files=True)
             submitted_ref = st.form_submit_button("💾 Save", use_container_width=True)
             
-            if submitted_ref and uploaded_guideline:
-                pdf_bytes = uploaded_guideline.read()
+            if submitted_ref and uploaded_guidelines:
                 with st.spinner("📌 Processing and storing guideline..."):
                     try:
-                        if _store_guideline_from_pdf:
-                            result = _store_guideline_from_pdf(pdf_bytes)
-                            st.success(f"✅ {result}")
+                        if len(uploaded_guidelines) > 1 and _store_guidelines_from_pdfs:
+                            # Many answer keys: batched embedding + chunked bulk insert
+                            result = _store_guidelines_from_pdfs([f.read() for f in uploaded_guidelines])
+                            st.success(result)
+                        elif _store_guideline_from_pdf:
+                            for uploaded_guideline in uploaded_guidelines:
+                                result = _store_guideline_from_pdf(uploaded_guideline.read())
+                                st.success(f"✅ {result}")
                         else:
                             st.error("❌ Knowledge ingestion service not available. Check backend imports.")
                     except Exception as e:
@@ -629,14 +731,13 @@ if is_authenticated and username:
             st.warning("⚠️ Analytics is unavailable because backend imports failed.")
         else:
             try:
+                # Server-side aggregate when available; no need to load every row just to check for data
                 summary = get_evaluations_summary()
-                all_evals_for_tab3 = get_all_evaluations()
             except Exception as e:
                 st.error(f"❌ Error loading analytics: {e}")
                 summary = {"total": 0}
-                all_evals_for_tab3 = []
             
-            if not all_evals_for_tab3:
+            if not summary.get("total"):
                 st.info("📊 No student evaluations found yet. Go to 'Student Evaluation' to process your first submission.")
             else:
                 # ===== TOP SUMMARY METRICS =====
@@ -946,30 +1047,20 @@ if is_authenticated and username:
                             st.dataframe(diff_df, use_container_width=True, hide_index=True)
                     
                     st.markdown("**Leaderboard: Top Ranked Students (Top Score)**")
-                    all_evals = get_all_evaluations()
-                    if all_evals:
+                    # Heap top-k in the backend; equal scores share a rank
+                    leaderboard_topics = ["All Topics"] + sorted(t for t in get_evaluations_by_topic() if t)
+                    leaderboard_topic = st.selectbox("Topic", leaderboard_topics, key="leaderboard_topic")
+                    leaders = get_leaderboard(100, topic=None if leaderboard_topic == "All Topics" else leaderboard_topic)
+                    if leaders:
                         eval_data = []
-                        # Convert scores to float for proper sorting
-                        for record in all_evals:
-                            record['_score_numeric'] = 0.0
-                            try:
-                                record['_score_numeric'] = float(record.get('score', 0))
-                            except: pass
-                        
-                        # Sort by score descending (Highest score @ #1)
-                        sorted_evals = sorted(all_evals, key=lambda x: x['_score_numeric'], reverse=True)
-                        
-                        for e in sorted_evals[:100]:
-                            feedback_text = str(e.get("feedback", "N/A"))[:60]
-                            if len(str(e.get("feedback", ""))) > 60:
-                                feedback_text += "..."
+                        for e in leaders:
                             eval_data.append({
-                                "Rank": sorted_evals.index(e) + 1,
-                                "Roll": e.get("student_roll", "N/A"),
-                                "Student": e.get("student_name", "N/A")[:25],
+                                "Rank": e["rank"],
+                                "Roll": e.get("student_roll") or "N/A",
+                                "Student": (e.get("student_name") or "N/A")[:25],
                                 "Score": f"{e.get('score', '0')}/10",
-                                "Grade": e.get("grade", "N/A"),
-                                "Topic": e.get("topic", "N/A")[:20],
+                                "Grade": e.get("grade") or "N/A",
+                                "Topic": (e.get("topic") or "N/A")[:20],
                                 "Date": e.get("created_at", "N/A")[:10] if e.get("created_at") else "N/A",
                             })
                         df_evals = pd.DataFrame(eval_data)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Benchmark of the client-side analytics engines on synthetic evaluations.
+
+For each table size, times every dashboard view computed four ways:
+  per-view   one pass over the rows per view (how the get_* functions used to work)
+  snapshot   AnalyticsSnapshot: one pass folding each row into running accumulators
+  pandas     FrameAnalytics: one typed DataFrame, vectorized groupbys
+  frame      FrameAnalytics on an existing DataFrame (the COLUMNAR_CACHE case,
+             where the frame is read straight from Parquet)
+
+Row building is not timed for the row-based engines; the pandas time includes
+building the DataFrame from the rows. Also checks that the engines agree.
+
+Usage:
+    python scripts/bench_analytics_engines.py [--sizes 10000,100000,1000000] [--per-view-max 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+import pandas as pd  # noqa: E402
+
+from backend.analytics import AnalyticsSnapshot, EvaluationRow  # noqa: E402
+from backend.frame_analytics import FRAME_COLUMNS, FrameAnalytics  # noqa: E402
+
+VIEWS = [
+    ("summary", ()), ("grade_distribution", ()), ("topic_performance", ()), ("student_performance", ()),
+    ("top_students", (10,)), ("evaluations_by_topic", ()), ("evaluations_over_time", ()),
+    ("score_distribution", ()), ("topic_evaluation_count", ()), ("student_evaluation_count", ()),
+    ("weak_students", (5,)), ("strong_students", (7,)), ("class_stats", ()), ("performance_by_grade", ()),
+    ("topic_difficulty", ()), ("evaluation_stats_by_date", ()),
+]
+
+
+def synthetic_rows(n, seed=0):
+    """Oldest-first rows with realistic cardinalities and a few unparseable scores."""
+    rng = random.Random(seed)
+    students = [f"Student {i}" for i in range(max(50, n // 20))]
+    topics = [f"Topic {i}" for i in range(60)]
+    rows = []
+    for i in range(n):
+        day, second = divmod(i * 86400 * 365 // max(n, 1), 86400)
+        score = round(rng.uniform(0, 10), 1)
+        rows.append(EvaluationRow(
+            id=i + 1,
+            student_name=rng.choice(students),
+            student_roll=f"R{i % 5000}",
+            topic=rng.choice(topics),
+            score=str(score) if rng.random() > 0.01 else "N/A",
+            grade="ABCDF"[min(int((10 - score) // 2), 4)],
+            created_at=f"{2024 + day // 365}-{1 + (day % 365) // 31:02d}-{1 + (day % 365) % 28:02d}T{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}",
+        ))
+    return rows
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def all_views(engine):
+    return {name: getattr(engine, name)(*args) for name, args in VIEWS}
+
+
+def per_view(rows):
+    # A fresh scan per view, like the original per-function loops
+    return {name: getattr(AnalyticsSnapshot(rows), name)(*args) for name, args in VIEWS}
+
+
+def same(a, b):
+    if isinstance(a, dict):
+        return list(a) == list(b) and all(same(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) or isinstance(b, float):
+        return abs(a - b) <= 0.01 + 1e-9    # summation order can move the last rounded digit
+    return a == b
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--per-view-max", type=int, default=100000, help="skip the per-view baseline above this size")
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'per-view (s)':>13} {'snapshot (s)':>13} {'pandas (s)':>11} {'frame (s)':>10} {'snap/frame':>10} {'agree':>6}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        rows = synthetic_rows(n)
+        baseline = timed(lambda: per_view(rows))[1] if n <= args.per_view_max else None
+        snapshot_views, snapshot_s = timed(lambda: all_views(AnalyticsSnapshot(rows)))
+        pandas_views, pandas_s = timed(lambda: all_views(FrameAnalytics(rows)))
+        frame = pd.DataFrame.from_records(rows, columns=list(FRAME_COLUMNS))
+        frame_s = timed(lambda: all_views(FrameAnalytics(frame)))[1]
+        agree = all(same(snapshot_views[name], pandas_views[name]) for name, _ in VIEWS)
+        baseline_text = f"{baseline:>13.3f}" if baseline is not None else f"{'-':>13}"
+        print(f"{n:>9} {baseline_text} {snapshot_s:>13.3f} {pandas_s:>11.3f} {frame_s:>10.3f} "
+              f"{snapshot_s / frame_s:>9.1f}x {str(agree):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Latency, memory and parity benchmark for the embedding backends.
+
+Each backend runs in a fresh interpreter (so peak RSS is that backend's alone)
+and embeds the same corpus. The parent then compares the vectors:
+
+- cosine similarity between the two backends' vectors for every text
+- top-1 agreement: for each query, does the nearest corpus text match?
+
+The ONNX backend must be exported first (scripts/export_onnx_embeddings.py).
+
+Usage:
+    python scripts/bench_embedding_backends.py [--backends huggingface,onnx] [--corpus texts.txt] [--runs 50]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Min per-text cosine and top-1 agreement the ONNX vectors must reach to be a drop-in replacement
+PARITY_MIN_COSINE = 0.99
+PARITY_MIN_TOP1 = 0.98
+
+SAMPLE_TEXTS = [
+    "Explain the water cycle", "Describe the process of photosynthesis",
+    "What is Newton's second law of motion?", "Causes of the French Revolution",
+    "Explain supply and demand", "Binary search algorithm and its complexity",
+    "Difference between mitosis and meiosis", "Pythagoras theorem with an example",
+    "What is an operating system?", "Explain the greenhouse effect",
+    "Structure of the human heart", "Define inflation and its causes",
+    "Explain object oriented programming", "What is a chemical bond?",
+    "Describe the structure of DNA", "Explain Ohm's law",
+    "Significance of the Industrial Revolution", "What is machine learning?",
+    "Explain the rock cycle", "Fundamental rights in the Indian constitution",
+    "Laws of thermodynamics", "Explain recursion with an example",
+    "What is a normalized database schema?", "Describe plate tectonics",
+    "Explain the TCP three-way handshake", "Causes of World War I",
+    "Explain the nitrogen cycle", "What is a stack data structure?",
+    "Describe the function of the kidneys", "Explain compound interest",
+]
+
+WORKER_SNIPPET = """
+import json, os, resource, sys, time
+os.environ["EMBEDDING_BACKEND"] = {backend!r}
+texts = json.load(open({texts_path!r}))
+t0 = time.perf_counter()
+import backend.database as db
+model = db.get_embeddings()
+model.embed_query("warm up")
+load_s = time.perf_counter() - t0
+
+latencies = []
+for i in range({runs}):
+    start = time.perf_counter()
+    model.embed_query(texts[i % len(texts)])
+    latencies.append(time.perf_counter() - start)
+latencies.sort()
+
+start = time.perf_counter()
+vectors = model.embed_documents(texts)
+batch_s = time.perf_counter() - start
+
+json.dump(vectors, open({vectors_path!r}, "w"))
+print(json.dumps({{
+    "load_s": load_s,
+    "p50_ms": latencies[len(latencies) // 2] * 1000,
+    "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    "docs_per_s": len(texts) / batch_s,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "torch_loaded": "torch" in sys.modules,
+}}))
+"""
+
+
+def _run_backend(backend, texts_path, runs, workdir):
+    vectors_path = os.path.join(workdir, f"{backend}.json")
+    snippet = WORKER_SNIPPET.format(backend=backend, texts_path=texts_path, vectors_path=vectors_path, runs=runs)
+    out = subprocess.run([sys.executable, "-c", snippet], cwd=ROOT_DIR, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"{backend}: " + (out.stderr.strip().splitlines()[-1] if out.stderr else "run failed"))
+    stats = json.loads(out.stdout.strip().splitlines()[-1])
+    with open(vectors_path) as f:
+        stats["vectors"] = f.read()
+    return stats
+
+
+def _parity(reference, candidate, n_queries):
+    import numpy as np
+    a = np.asarray(json.loads(reference), dtype=np.float32)
+    b = np.asarray(json.loads(candidate), dtype=np.float32)
+    a /= np.linalg.norm(a, axis=1, keepdims=True)
+    b /= np.linalg.norm(b, axis=1, keepdims=True)
+    cosine = (a * b).sum(axis=1)
+
+    # First n_queries texts act as queries against the rest, as in guideline retrieval
+    queries, corpus = slice(0, n_queries), slice(n_queries, None)
+    top_a = (a[queries] @ a[corpus].T).argmax(axis=1)
+    top_b = (b[queries] @ b[corpus].T).argmax(axis=1)
+    return {"min_cosine": float(cosine.min()), "mean_cosine": float(cosine.mean()),
+            "top1_agreement": float((top_a == top_b).mean())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backends", default="huggingface,onnx")
+    parser.add_argument("--corpus", help="file with one text per line (default: built-in sample topics)")
+    parser.add_argument("--runs", type=int, default=50, help="single-query calls for the latency percentiles")
+    args = parser.parse_args()
+
+    texts = SAMPLE_TEXTS
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        texts_path = os.path.join(workdir, "texts.json")
+        with open(texts_path, "w") as f:
+            json.dump(texts, f)
+        for backend in backends:
+            results[backend] = _run_backend(backend, texts_path, args.runs, workdir)
+
+    print(f"{'backend':<12} {'load (s)':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'docs/s':>8} {'peak RSS (MB)':>14}  torch")
+    for backend, r in results.items():
+        print(f"{backend:<12} {r['load_s']:>9.2f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+              f"{r['docs_per_s']:>8.1f} {r['peak_rss_mb']:>14.0f}  {'yes' if r['torch_loaded'] else 'no'}")
+
+    if len(backends) >= 2:
+        reference = backends[0]
+        for backend in backends[1:]:
+            p = _parity(results[reference]["vectors"], results[backend]["vectors"], n_queries=max(1, len(texts) // 3))
+            ok = p["min_cosine"] >= PARITY_MIN_COSINE and p["top1_agreement"] >= PARITY_MIN_TOP1
+            print(f"\nparity {backend} vs {reference}: min cosine {p['min_cosine']:.4f}, "
+                  f"mean cosine {p['mean_cosine']:.4f}, top-1 agreement {p['top1_agreement']:.0%} "
+                  f"-> {'PASS' if ok else 'FAIL'}")
+            if not ok:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Size and recall benchmark for the compact embedding storage formats.
+
+Compares float32 / float16 / int8 (per-vector scale) against exact float32
+search: bytes per vector, recall@1 and recall@10 of the top-k results,
+the largest cosine score error, and query latency. Also reports the size of the
+same vectors as JSON float lists (how PostgREST returns pgvector columns).
+
+Uses synthetic clustered 384-d vectors by default, or the vectors of an existing
+local vector index snapshot with --snapshot.
+
+Usage:
+    python scripts/bench_embedding_compression.py [--rows 20000] [--queries 500]
+    python scripts/bench_embedding_compression.py --snapshot backend/data/vector_index
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+from backend import embedding_codec  # noqa: E402
+
+
+def _normalize(matrix):
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def synthetic(rows, dim, clusters, seed=0):
+    """Clustered unit vectors, closer to real topic embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    matrix = centers[rng.integers(0, clusters, rows)] + 0.6 * rng.standard_normal((rows, dim)).astype(np.float32)
+    return _normalize(matrix).astype(np.float32)
+
+
+def load_snapshot(snapshot_dir):
+    with open(os.path.join(snapshot_dir, "rows.json"), encoding="utf-8") as f:
+        state = json.load(f)
+    codes = np.load(os.path.join(snapshot_dir, "embeddings.npy"))
+    scales = np.load(os.path.join(snapshot_dir, "scales.npy")) if state.get("dtype") == "int8" else None
+    return _normalize(embedding_codec.decode(codes, scales))
+
+
+def top_k(scores, k):
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--snapshot", help="use the vectors of a local vector index snapshot")
+    args = parser.parse_args()
+
+    matrix = load_snapshot(args.snapshot) if args.snapshot else synthetic(args.rows, args.dim, args.clusters)
+    rng = np.random.default_rng(1)
+    # Queries are perturbed copies of stored vectors, like a topic phrased slightly differently
+    picks = rng.integers(0, len(matrix), args.queries)
+    queries = _normalize(matrix[picks] + 0.3 * rng.standard_normal(matrix[picks].shape).astype(np.float32) / np.sqrt(matrix.shape[1]))
+    k = min(10, len(matrix))
+
+    exact = [embedding_codec.scores(matrix, None, q) for q in queries]
+    exact_top = [top_k(s, k) for s in exact]
+
+    sample = matrix[: min(200, len(matrix))].tolist()
+    json_bytes = len(json.dumps(sample).encode("utf-8")) / len(sample)
+    print(f"{len(matrix)} vectors x {matrix.shape[1]} dims, {len(queries)} queries")
+    print(f"{'format':<10} {'bytes/vec':>10} {'vs JSON':>8} {'recall@1':>9} {'recall@10':>10} {'max |Δcos|':>11} {'query (ms)':>11}")
+    print(f"{'json':<10} {json_bytes:>10.0f} {'1.0x':>8} {'-':>9} {'-':>10} {'-':>11} {'-':>11}")
+
+    for dtype in embedding_codec.DTYPES:
+        codes, scales = embedding_codec.encode(matrix, dtype)
+        per_vector = embedding_codec.nbytes(codes, scales) / len(matrix)
+        hits1 = hits_k = 0
+        max_error = 0.0
+        started = time.perf_counter()
+        for q, ref_scores, ref_top in zip(queries, exact, exact_top):
+            s = embedding_codec.scores(codes, scales, q)
+            got = top_k(s, k)
+            hits1 += got[0] == ref_top[0]
+            hits_k += len(set(got.tolist()) & set(ref_top.tolist()))
+            max_error = max(max_error, float(np.abs(s - ref_scores).max()))
+        elapsed_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        print(f"{dtype:<10} {per_vector:>10.0f} {json_bytes / per_vector:>7.1f}x {hits1 / len(queries):>9.3f} "
+              f"{hits_k / (len(queries) * k):>10.3f} {max_error:>11.5f} {elapsed_ms:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
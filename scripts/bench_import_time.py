@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Import-time benchmark for the backend modules.
+
+Each measurement runs in a fresh interpreter so nothing is cached between runs.
+"lazy" imports the module only (what every Streamlit worker pays on cold start);
+"eager" additionally forces the DB client, embedding model and LLM client to be
+created, which is what the old import-time initialization cost.
+
+Usage:
+    python scripts/bench_import_time.py [--runs 5] [--eager]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY_MODULES = ["langchain_groq", "langchain_huggingface", "sentence_transformers", "torch", "supabase", "pytesseract"]
+
+LAZY_SNIPPET = """
+import sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+loaded = [m for m in {heavy!r} if m in sys.modules]
+print(f"{{elapsed:.4f}}|{{','.join(loaded)}}")
+"""
+
+EAGER_SNIPPET = """
+import sys, time
+t0 = time.perf_counter()
+import backend.database as db
+import backend.main as main
+db.get_supabase()
+db.get_embeddings()
+main._build_llm()
+elapsed = time.perf_counter() - t0
+loaded = [m for m in {heavy!r} if m in sys.modules]
+print(f"{{elapsed:.4f}}|{{','.join(loaded)}}")
+"""
+
+
+def _measure(snippet, runs):
+    timings, loaded = [], ""
+    env = dict(os.environ)
+    # Creating the clients needs *some* credentials; no request is sent.
+    env.setdefault("SUPABASE_URL", "https://example.supabase.co")
+    env.setdefault("SUPABASE_KEY", "benchmark-key")
+    env.setdefault("GROQ_API_KEY", "benchmark-key")
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", snippet],
+            cwd=ROOT_DIR, env=env, capture_output=True, text=True
+        )
+        if out.returncode != 0:
+            raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr else "benchmark run failed")
+        line = out.stdout.strip().splitlines()[-1]
+        seconds, loaded = line.split("|")
+        timings.append(float(seconds))
+    return statistics.median(timings), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--eager", action="store_true", help="also time forced initialization of all clients")
+    args = parser.parse_args()
+
+    print(f"{'measurement':<28} {'median (s)':>10}  heavy modules loaded")
+    for module in ["backend.database", "backend.main"]:
+        median, loaded = _measure(LAZY_SNIPPET.format(module=module, heavy=HEAVY_MODULES), args.runs)
+        print(f"{'import ' + module:<28} {median:>10.3f}  {loaded or '-'}")
+
+    if args.eager:
+        median, loaded = _measure(EAGER_SNIPPET.format(heavy=HEAVY_MODULES), args.runs)
+        print(f"{'import + init all clients':<28} {median:>10.3f}  {loaded or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+"""
+Export the evaluations table to CSV.
+
+Rows are streamed from Supabase in keyset-paginated pages and written as they
+arrive, so tables of any size export completely with flat memory use.
+
+Usage:
+    python scripts/export_evaluations.py evaluations.csv
+    python scripts/export_evaluations.py scores.csv --columns student_name,student_roll,topic,score,grade,created_at
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+from backend.database import write_evaluations_csv  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("output", help="CSV file to write")
+    parser.add_argument("--columns", default="*", help="comma-separated columns (default: all)")
+    parser.add_argument("--page-size", type=int, default=None, help="rows per request (default: EVALUATION_PAGE_SIZE)")
+    args = parser.parse_args()
+
+    columns = "*" if args.columns == "*" else tuple(c.strip() for c in args.columns.split(",") if c.strip())
+    started = time.perf_counter()
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        count = write_evaluations_csv(f, columns, args.page_size)
+    print(f"Exported {count} evaluations to {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Export all-MiniLM-L6-v2 to ONNX and quantize it to int8 for the ONNX embedding backend.
+
+Writes ``model.onnx`` (fp32), ``model_int8.onnx`` (dynamic int8 weights) and
+``tokenizer.json`` to the output directory. This needs torch and transformers
+once, on any machine; the deployment itself only needs onnxruntime and tokenizers.
+
+Usage:
+    python scripts/export_onnx_embeddings.py [--output backend/data/onnx-minilm] [--opset 14]
+
+Then run the app with:
+    EMBEDDING_BACKEND=onnx ONNX_MODEL_DIR=backend/data/onnx-minilm
+"""
+import argparse
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_OUTPUT = os.path.join(ROOT_DIR, "backend", "data", "onnx-minilm")
+
+
+def export(output_dir, opset):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    model = AutoModel.from_pretrained(MODEL_NAME)
+    model.eval()
+
+    # Only tokenizer.json is needed at runtime (loaded with `tokenizers`, not transformers)
+    tokenizer.backend_tokenizer.save(os.path.join(output_dir, "tokenizer.json"))
+
+    sample = tokenizer(["Explain the water cycle.", "Photosynthesis"], padding=True, return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    print(f"[EXPORT] Wrote {fp32_path} ({os.path.getsize(fp32_path) / 1e6:.1f} MB)")
+    return fp32_path
+
+
+def quantize(fp32_path, output_dir):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = os.path.join(output_dir, "model_int8.onnx")
+    # Dynamic quantization: int8 weights, activations quantized per batch at runtime
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"[EXPORT] Wrote {int8_path} ({os.path.getsize(int8_path) / 1e6:.1f} MB)")
+    return int8_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args()
+
+    fp32_path = export(args.output, args.opset)
+    quantize(fp32_path, args.output)
+    print("[EXPORT] Done. Check parity with: python scripts/bench_embedding_backends.py")
+
+
+if __name__ == "__main__":
+    main()